@@ -2,7 +2,12 @@ import dota_utils as util
 import os
 import cv2
 import json
+import numpy as np
 from PIL import Image
+try:
+    from split_manifest import MANIFEST_VERSION, SplitManifest
+except ImportError:
+    from DOTA_devkit.split_manifest import MANIFEST_VERSION, SplitManifest
 
 wordname_15 = ['plane', 'baseball-diamond', 'bridge', 'ground-track-field', 'small-vehicle', 'large-vehicle', 'ship', 'tennis-court',
                'basketball-court', 'storage-tank',  'soccer-ball-field', 'roundabout', 'harbor', 'swimming-pool', 'helicopter']
@@ -99,6 +104,73 @@ def DOTA2COCOTest(srcpath, destfile, cls_names):
             image_id = image_id + 1
         json.dump(data_dict, f_out)
 
+def SplitManifest2COCO(manifestfiles, destfile, cls_names, difficult='2'):
+    """
+        the same as DOTA2COCOTrain, or DOTA2COCOTest for the patches split without labels, but the sizes and the
+        objects of the patches are taken from the manifests of the splits instead of reading the patches and their
+        labels again. The records of the images removed from the sources are
+        dropped when their rate is split, split every rate before
+    :param manifestfiles: the manifest of a split, or a list of them
+    """
+    if isinstance(manifestfiles, str):
+        manifestfiles = [manifestfiles]
+    records = []
+    for manifestfile in manifestfiles:
+        manifest = SplitManifest(manifestfile)
+        for key in sorted(manifest.records):
+            if manifest.records[key].get('version') != MANIFEST_VERSION:
+                raise ValueError(
+                    '{} was written by another version of the split, '
+                    'split the images again'.format(manifestfile))
+            records.append(manifest.records[key])
+
+    data_dict = {}
+    data_dict['images'] = []
+    data_dict['categories'] = []
+    with_labels = any('objects' in tile for record in records for tile in record['tiles'])
+    if with_labels:
+        data_dict['annotations'] = []
+    for idex, name in enumerate(cls_names):
+        single_cat = {'id': idex + 1, 'name': name, 'supercategory': name}
+        data_dict['categories'].append(single_cat)
+
+    inst_count = 1
+    image_id = 1
+    for record in records:
+        for tile in record['tiles']:
+            single_image = {}
+            single_image['file_name'] = tile['name'] + record['params']['patch_ext']
+            single_image['id'] = image_id
+            single_image['width'] = tile['width']
+            single_image['height'] = tile['height']
+            data_dict['images'].append(single_image)
+
+            objects = [obj for obj in tile.get('objects', []) if obj[2] != difficult]
+            # the shoelace areas of the int points are the ones of shapely
+            polys = np.array([obj[0] for obj in objects], dtype=np.float64).reshape(-1, 4, 2)
+            xs, ys = polys[..., 0], polys[..., 1]
+            areas = np.abs((xs * np.roll(ys, -1, axis=1) - np.roll(xs, -1, axis=1) * ys).sum(axis=1)) / 2
+            for obj, area in zip(objects, areas):
+                poly, name, _ = obj
+                single_obj = {}
+                single_obj['area'] = float(area)
+                single_obj['category_id'] = cls_names.index(name) + 1
+                single_obj['segmentation'] = []
+                single_obj['segmentation'].append(poly)
+                single_obj['iscrowd'] = 0
+                xmin, ymin, xmax, ymax = min(poly[0::2]), min(poly[1::2]), \
+                                         max(poly[0::2]), max(poly[1::2])
+
+                width, height = xmax - xmin, ymax - ymin
+                single_obj['bbox'] = xmin, ymin, width, height
+                single_obj['image_id'] = image_id
+                data_dict['annotations'].append(single_obj)
+                single_obj['id'] = inst_count
+                inst_count = inst_count + 1
+            image_id = image_id + 1
+    with open(destfile, 'w') as f_out:
+        json.dump(data_dict, f_out)
+
 if __name__ == '__main__':
 
     DOTA2COCOTrain(r'/home/dj/code/mmdetection_DOTA/data/dota1_1024_v2/trainval1024',
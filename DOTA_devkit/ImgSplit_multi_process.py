@@ -5,38 +5,25 @@ This is the multi-process version
 import os
 import codecs
 import numpy as np
-import math
 from dota_utils import GetFileFromThisRootDir
 import cv2
 import shapely.geometry as shgeo
 import dota_utils as util
-import copy
 from multiprocessing import Pool
 from functools import partial
 import time
-
-def choose_best_pointorder_fit_another(poly1, poly2):
-    """
-        To make the two polygons best fit with each point
-    """
-    x1 = poly1[0]
-    y1 = poly1[1]
-    x2 = poly1[2]
-    y2 = poly1[3]
-    x3 = poly1[4]
-    y3 = poly1[5]
-    x4 = poly1[6]
-    y4 = poly1[7]
-    combinate = [np.array([x1, y1, x2, y2, x3, y3, x4, y4]), np.array([x2, y2, x3, y3, x4, y4, x1, y1]),
-                 np.array([x3, y3, x4, y4, x1, y1, x2, y2]), np.array([x4, y4, x1, y1, x2, y2, x3, y3])]
-    dst_coordinate = np.array(poly2)
-    distances = np.array([np.sum((coord - dst_coordinate)**2) for coord in combinate])
-    sorted = distances.argsort()
-    return combinate[sorted[0]]
-
-def cal_line_length(point1, point2):
-    return math.sqrt( math.pow(point1[0] - point2[0], 2) + math.pow(point1[1] - point2[1], 2))
-
+try:
+    from patch_writer import PatchWriter
+except ImportError:
+    from DOTA_devkit.patch_writer import PatchWriter
+try:
+    from split_manifest import SplitManifest, prune_manifest, split_incremental
+except ImportError:
+    from DOTA_devkit.split_manifest import SplitManifest, prune_manifest, split_incremental
+try:
+    from poly_clip import clip_polys
+except ImportError:
+    from DOTA_devkit.poly_clip import clip_polys
 
 
 class splitbase():
@@ -50,7 +37,11 @@ class splitbase():
                  choosebestpoint=True,
                  ext = '.png',
                  padding=True,
-                 num_process=8
+                 num_process=8,
+                 patch_ext=None,
+                 png_compression=None,
+                 num_threads=2,
+                 resume=True
                  ):
         """
         :param basepath: base path for dota data
@@ -63,6 +54,11 @@ class splitbase():
         :param choosebestpoint: used to choose the first point for the
         :param ext: ext for the image format
         :param padding: if to padding the images so that all the images have the same size
+        :param patch_ext: ext for the format of the patches, the same as ext if None
+        :param png_compression: compression level of the png patches, from 0 to 9
+        :param num_threads: number of threads encoding the patches in each process
+        :param resume: skip the images whose sources and split parameters did not change since they were
+        split into outpath, as recorded in its split_manifest.jsonl
         """
         self.basepath = basepath
         self.outpath = outpath
@@ -78,6 +74,13 @@ class splitbase():
         self.choosebestpoint = choosebestpoint
         self.ext = ext
         self.padding = padding
+        self.patch_ext = ext if patch_ext is None else patch_ext
+        self.png_compression = png_compression
+        self.num_threads = num_threads
+        # created in each process, see patch_writer
+        self._patch_writer = None
+        self.resume = resume
+        self.manifestfile = os.path.join(self.outpath, 'split_manifest.jsonl')
         self.pool = Pool(num_process)
         print('padding:', padding)
 
@@ -94,118 +97,56 @@ class splitbase():
     # def __del__(self):
     #     self.f_sub.close()
     ## grid --> (x, y) position of grids
-    def polyorig2sub(self, left, up, poly):
-        polyInsub = np.zeros(len(poly))
-        for i in range(int(len(poly)/2)):
-            polyInsub[i * 2] = int(poly[i * 2] - left)
-            polyInsub[i * 2 + 1] = int(poly[i * 2 + 1] - up)
-        return polyInsub
-
-    def calchalf_iou(self, poly1, poly2):
-        """
-            It is not the iou on usual, the iou is the value of intersection over poly1
-        """
-        inter_poly = poly1.intersection(poly2)
-        inter_area = inter_poly.area
-        poly1_area = poly1.area
-        half_iou = inter_area / poly1_area
-        return inter_poly, half_iou
+    @property
+    def patch_writer(self):
+        if self._patch_writer is None:
+            self._patch_writer = PatchWriter(self.subsize,
+                                             padding=self.padding,
+                                             png_compression=self.png_compression,
+                                             num_threads=self.num_threads)
+        return self._patch_writer
 
     def saveimagepatches(self, img, subimgname, left, up):
-        subimg = copy.deepcopy(img[up: (up + self.subsize), left: (left + self.subsize)])
-        outdir = os.path.join(self.outimagepath, subimgname + self.ext)
-        h, w, c = np.shape(subimg)
-        if (self.padding):
-            outimg = np.zeros((self.subsize, self.subsize, 3))
-            outimg[0:h, 0:w, :] = subimg
-            cv2.imwrite(outdir, outimg)
-        else:
-            cv2.imwrite(outdir, subimg)
+        outdir = os.path.join(self.outimagepath, subimgname + self.patch_ext)
+        self.patch_writer.write(img[up: (up + self.subsize), left: (left + self.subsize)], outdir)
 
-    def GetPoly4FromPoly5(self, poly):
-        distances = [cal_line_length((poly[i * 2], poly[i * 2 + 1] ), (poly[(i + 1) * 2], poly[(i + 1) * 2 + 1])) for i in range(int(len(poly)/2 - 1))]
-        distances.append(cal_line_length((poly[0], poly[1]), (poly[8], poly[9])))
-        pos = np.array(distances).argsort()[0]
-        count = 0
-        outpoly = []
-        while count < 5:
-            #print('count:', count)
-            if (count == pos):
-                outpoly.append((poly[count * 2] + poly[(count * 2 + 2)%10])/2)
-                outpoly.append((poly[(count * 2 + 1)%10] + poly[(count * 2 + 3)%10])/2)
-                count = count + 1
-            elif (count == (pos + 1)%5):
-                count = count + 1
-                continue
-
-            else:
-                outpoly.append(poly[count * 2])
-                outpoly.append(poly[count * 2 + 1])
-                count = count + 1
-        return outpoly
-
-    def savepatches(self, resizeimg, objects, subimgname, left, up, right, down):
+    def indexobjects(self, objects):
+        """
+            the polygons of the objects of an image, built once for all its patches
+        """
+        polys = np.array([obj['poly'] for obj in objects], dtype=np.float64).reshape(-1, 8)
+        gtpolys = [shgeo.Polygon([(poly[0], poly[1]), (poly[2], poly[3]),
+                                  (poly[4], poly[5]), (poly[6], poly[7])]) for poly in polys]
+        valid = np.array([gtpoly.area > 0 for gtpoly in gtpolys], dtype=bool)
+        return {'polys': polys,
+                'gtpolys': gtpolys,
+                'valid': valid}
+
+    def savepatches(self, resizeimg, objects, subimgname, left, up, right, down, objindex=None):
+        """
+            write the patch and its labels, the objects are clipped to the patch by clip_polys
+        :return: the objects written, as [poly, name, difficult], the points of poly are ints
+        """
+        if objindex is None:
+            objindex = self.indexobjects(objects)
         outdir = os.path.join(self.outlabelpath, subimgname + '.txt')
-        mask_poly = []
-        imgpoly = shgeo.Polygon([(left, up), (right, up), (right, down),
-                                 (left, down)])
+        inds, polysInsub, cut = clip_polys(objindex['polys'], (left, up, right, down), self.subsize,
+                                           self.thresh, self.choosebestpoint, objindex['gtpolys'])
+        written = []
         with codecs.open(outdir, 'w', self.code) as f_out:
-            for obj in objects:
-                gtpoly = shgeo.Polygon([(obj['poly'][0], obj['poly'][1]),
-                                         (obj['poly'][2], obj['poly'][3]),
-                                         (obj['poly'][4], obj['poly'][5]),
-                                         (obj['poly'][6], obj['poly'][7])])
-                if (gtpoly.area <= 0):
-                    continue
-                inter_poly, half_iou = self.calchalf_iou(gtpoly, imgpoly)
-
-                # print('writing...')
-                if (half_iou == 1):
-                    polyInsub = self.polyorig2sub(left, up, obj['poly'])
-                    outline = ' '.join(list(map(str, polyInsub)))
-                    outline = outline + ' ' + obj['name'] + ' ' + str(obj['difficult'])
-                    f_out.write(outline + '\n')
-                elif (half_iou > 0):
-                #elif (half_iou > self.thresh):
-                  ##  print('<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<')
-                    inter_poly = shgeo.polygon.orient(inter_poly, sign=1)
-                    out_poly = list(inter_poly.exterior.coords)[0: -1]
-                    if len(out_poly) < 4:
-                        continue
-
-                    out_poly2 = []
-                    for i in range(len(out_poly)):
-                        out_poly2.append(out_poly[i][0])
-                        out_poly2.append(out_poly[i][1])
-
-                    if (len(out_poly) == 5):
-                        #print('==========================')
-                        out_poly2 = self.GetPoly4FromPoly5(out_poly2)
-                    elif (len(out_poly) > 5):
-                        """
-                            if the cut instance is a polygon with points more than 5, we do not handle it currently
-                        """
-                        continue
-                    if (self.choosebestpoint):
-                        out_poly2 = choose_best_pointorder_fit_another(out_poly2, obj['poly'])
-
-                    polyInsub = self.polyorig2sub(left, up, out_poly2)
-
-                    for index, item in enumerate(polyInsub):
-                        if (item <= 1):
-                            polyInsub[index] = 1
-                        elif (item >= self.subsize):
-                            polyInsub[index] = self.subsize
-                    outline = ' '.join(list(map(str, polyInsub)))
-                    if (half_iou > self.thresh):
-                        outline = outline + ' ' + obj['name'] + ' ' + str(obj['difficult'])
-                    else:
-                        ## if the left part is too small, label as '2'
-                        outline = outline + ' ' + obj['name'] + ' ' + '2'
-                    f_out.write(outline + '\n')
-                #else:
-                 #   mask_poly.append(inter_poly)
+            for i, polyInsub, obj_cut in zip(inds, polysInsub, cut):
+                obj = objects[i]
+                if obj_cut:
+                    ## if the left part is too small, label as '2'
+                    difficult = '2'
+                else:
+                    difficult = str(obj['difficult'])
+                outline = ' '.join(list(map(str, polyInsub)))
+                outline = outline + ' ' + obj['name'] + ' ' + difficult
+                f_out.write(outline + '\n')
+                written.append([list(map(int, polyInsub)), obj['name'], difficult])
         self.saveimagepatches(resizeimg, subimgname, left, up)
+        return written
 
     def SplitSingle(self, name, rate, extent):
         """
@@ -213,7 +154,7 @@ class splitbase():
         :param name: image name
         :param rate: the resize scale for the image
         :param extent: the image format
-        :return:
+        :return: the tiles, as their name, size and objects
         """
         try:
             img = cv2.imread(os.path.join(self.imagepath, name + extent))
@@ -221,7 +162,7 @@ class splitbase():
         except:
             print('img name:', name)
         if np.shape(img) == ():
-            return
+            return []
         fullname = os.path.join(self.labelpath, name + '.txt')
         objects = util.parse_dota_poly2(fullname)
         for obj in objects:
@@ -239,6 +180,8 @@ class splitbase():
         # if (max(weight, height) < self.subsize):
         #     return
 
+        objindex = self.indexobjects(objects)
+        tiles = []
         left, up = 0, 0
         while (left < weight):
             if (left + self.subsize >= weight):
@@ -251,7 +194,8 @@ class splitbase():
                 down = min(up + self.subsize, height - 1)
                 subimgname = outbasename + str(left) + '___' + str(up)
                 # self.f_sub.write(name + ' ' + subimgname + ' ' + str(left) + ' ' + str(up) + '\n')
-                self.savepatches(resizeimg, objects, subimgname, left, up, right, down)
+                written = self.savepatches(resizeimg, objects, subimgname, left, up, right, down, objindex)
+                tiles.append(self.tilerecord(subimgname, weight - left, height - up, written))
                 if (up + self.subsize >= height):
                     break
                 else:
@@ -260,6 +204,31 @@ class splitbase():
                 break
             else:
                 left = left + self.slide
+        self.patch_writer.flush()
+        return tiles
+
+    def tilerecord(self, subimgname, width, height, objects):
+        if self.padding:
+            width, height = self.subsize, self.subsize
+        else:
+            width, height = min(width, self.subsize), min(height, self.subsize)
+        return {'name': subimgname, 'width': width, 'height': height, 'objects': objects}
+
+    def sourcefiles(self, name, extent):
+        return {'image': os.path.join(self.imagepath, name + extent),
+                'label': os.path.join(self.labelpath, name + '.txt')}
+
+    def splitparams(self, rate):
+        return dict(rate=rate, gap=self.gap, subsize=self.subsize, thresh=self.thresh,
+                    choosebestpoint=self.choosebestpoint, padding=self.padding, patch_ext=self.patch_ext)
+
+    def tilefiles(self, tile, params):
+        return [os.path.join(self.outimagepath, tile + params['patch_ext']),
+                os.path.join(self.outlabelpath, tile + '.txt')]
+
+    def SplitIncremental(self, task, rate, extent):
+        name, record = task
+        return split_incremental(self, name, rate, extent, record)
 
     def splitdata(self, rate):
         """
@@ -269,15 +238,22 @@ class splitbase():
         imagelist = GetFileFromThisRootDir(self.imagepath)
         imagenames = [util.custombasename(x) for x in imagelist if (util.custombasename(x) != 'Thumbs')]
 
-        worker = partial(self.SplitSingle, rate=rate, extent=self.ext)
+        manifest = SplitManifest(self.manifestfile)
+        tasks = [(name, manifest.records.get(name + '__' + str(rate) + '__')) for name in imagenames]
+        worker = partial(self.SplitIncremental, rate=rate, extent=self.ext)
         #
         # for name in imagenames:
         #     self.SplitSingle(name, rate, self.ext)
-        self.pool.map(worker, imagenames)
+        for record in self.pool.imap_unordered(worker, tasks):
+            if record != manifest.records.get(record['key']):
+                manifest.add(record)
+        # the images removed from the source directory
+        prune_manifest(self, manifest, imagenames, rate)
 
     def __getstate__(self):
         self_dict = self.__dict__.copy()
         del self_dict['pool']
+        self_dict['_patch_writer'] = None
         return self_dict
 
     def __setstate__(self, state):
@@ -21,7 +21,7 @@ import pdb
 import math
 from multiprocessing import Pool
 from functools import partial
-from DOTA_devkit.nms import obb_hybrid_NMS, obb_HNMS
+from DOTA_devkit.nms import obb_hybrid_NMS, obb_HNMS, py_cpu_nms_poly_grid
 
 #TODO: there is a bug at 5 decimal places of mAP when using the program
 def py_cpu_nms_poly(dets, thresh):
@@ -216,6 +216,88 @@ def mergebase(srcpath, dstpath, nms, nms_thresh):
     for filename in filelist:
         mergesingle(dstpath, nms, nms_thresh, filename)
 
+def parse_subnames(subnames):
+    """
+    subnames: names of the patches, e.g. 'P0001__1__0___824.png'
+    return: names of the original images, and the x, y offsets and the
+        rates of the patches as arrays
+    """
+    orinames, offsets, rates = [], [], []
+    for subname in subnames:
+        orinames.append(subname.split('__')[0])
+        x_y = re.findall(r'__\d+___\d+', subname)
+        x_y_2 = re.findall(r'\d+', x_y[0])
+        offsets.append([int(x_y_2[0]), int(x_y_2[1])])
+        rates.append(float(re.findall(r'__([\d+\.]+)__\d+___', subname)[0]))
+    return orinames, np.array(offsets, dtype=np.float64).reshape(-1, 2), \
+        np.array(rates, dtype=np.float64)
+
+def mergearrays_single(dstpath, nms, nms_thresh, item):
+    """
+    item: (clsname, orinames, ori_ids, dets) with the (n, 9) dets of a class
+        in the coordinates of the original images and ori_ids indexing
+        orinames
+    """
+    clsname, orinames, ori_ids, dets = item
+    order = np.argsort(ori_ids, kind='mergesort')
+    ori_ids, dets = ori_ids[order], dets[order]
+    bounds = np.searchsorted(ori_ids, np.arange(len(orinames) + 1))
+    with open(os.path.join(dstpath, clsname + '.txt'), 'w') as f_out:
+        for i, imgname in enumerate(orinames):
+            img_dets = dets[bounds[i]:bounds[i + 1]]
+            if len(img_dets) == 0:
+                continue
+            keep = nms(img_dets, nms_thresh)
+            for det in img_dets[keep].tolist():
+                confidence = det[-1]
+                bbox = det[0:-1]
+                outline = imgname + ' ' + str(confidence) + ' ' + ' '.join(map(str, bbox))
+                f_out.write(outline + '\n')
+
+def mergearrays(dstpath, subnames, classes, image_ids, class_ids, dets, nms, nms_thresh):
+    """
+    Merge patch detections held in arrays instead of result files, e.g. the
+    columns of a detection store. The patch to image coordinates conversion
+    is done on whole arrays, and one result file is written per class,
+    named after it.
+
+    subnames: names of the patches
+    classes: names of the classes
+    image_ids: (n, ) index of the patch of each detection in subnames
+    class_ids: (n, ) index of the class of each detection in classes
+    dets: (n, 9) polygons and scores in the patch coordinates
+    """
+    if not os.path.exists(dstpath):
+        os.makedirs(dstpath)
+    image_ids = np.asarray(image_ids)
+    class_ids = np.asarray(class_ids)
+    orinames, offsets, rates = parse_subnames(subnames)
+    orinames, sub2ori = np.unique(orinames, return_inverse=True)
+    orinames = orinames.tolist()
+
+    dets = np.array(dets, dtype=np.float64)
+    dets[:, :8] = (dets[:, :8] + np.tile(offsets[image_ids], 4)) / rates[image_ids, None]
+    ori_ids = sub2ori[image_ids]
+    items = [(clsname, orinames, ori_ids[class_ids == i], dets[class_ids == i])
+             for i, clsname in enumerate(classes)]
+    pool = Pool(16)
+    pool.map(partial(mergearrays_single, dstpath, nms, nms_thresh), items)
+    pool.close()
+
+def get_poly_nms(nms_type, o_thresh, h_thresh):
+    """
+    return: the nms function of nms_type and its threshold
+    """
+    if nms_type == 'py_cpu_nms_poly_fast':
+        return py_cpu_nms_poly_fast, o_thresh
+    elif nms_type == 'py_cpu_nms_poly_grid':
+        return py_cpu_nms_poly_grid, o_thresh
+    elif nms_type == 'obb_HNMS':
+        return obb_HNMS, o_thresh
+    elif nms_type == 'obb_hybrid_NMS':
+        return partial(obb_hybrid_NMS, o_thresh), h_thresh
+    raise ValueError('unknown nms_type {}'.format(nms_type))
+
 def mergebyrec(srcpath, dstpath, nms_thresh=0.3):
     mergebase_parallel(srcpath,
               dstpath,
@@ -225,22 +307,27 @@ def mergebypoly_multiprocess(srcpath, dstpath, nms_type='py_cpu_nms_poly_fast',
     """
     srcpath: result files before merge and nms
     dstpath: result files after merge and nms
+    nms_type: 'py_cpu_nms_poly_fast', 'py_cpu_nms_poly_grid', 'obb_HNMS' or
+        'obb_hybrid_NMS'. 'py_cpu_nms_poly_grid' keeps the same boxes as
+        'py_cpu_nms_poly_fast' but only visits nearby boxes at each step,
+        which is much faster on large scenes
     """
     # srcpath = r'/home/dingjian/evaluation_task1/result/faster-rcnn-59/comp4_test_results'
     # dstpath = r'/home/dingjian/evaluation_task1/result/faster-rcnn-59/testtime'
-    if nms_type == 'py_cpu_nms_poly_fast':
-        mergebase_parallel(srcpath,
-                           dstpath,
-                           py_cpu_nms_poly_fast, o_thresh)
-    elif nms_type == 'obb_HNMS':
-        mergebase_parallel(srcpath,
-                           dstpath,
-                           obb_HNMS, o_thresh)
-    elif nms_type == 'obb_hybrid_NMS':
-        obb_hybrid_NMS_partial = partial(obb_hybrid_NMS, o_thresh)
-        mergebase_parallel(srcpath,
-                           dstpath,
-                           obb_hybrid_NMS_partial, h_thresh)
+    nms, nms_thresh = get_poly_nms(nms_type, o_thresh, h_thresh)
+    mergebase_parallel(srcpath,
+                       dstpath,
+                       nms, nms_thresh)
+
+def mergebypoly_arrays(dstpath, subnames, classes, image_ids, class_ids, dets,
+                       nms_type='py_cpu_nms_poly_fast', o_thresh=0.1, h_thresh=0.5):
+    """
+    Same as mergebypoly_multiprocess, but the detections are given as arrays,
+    see mergearrays
+    """
+    nms, nms_thresh = get_poly_nms(nms_type, o_thresh, h_thresh)
+    mergearrays(dstpath, subnames, classes, image_ids, class_ids, dets,
+                nms, nms_thresh)
 if __name__ == '__main__':
     # mergebypoly(r'/home/dingjian/code/DOTA_devkit/Test_nms2/Task1_results', r'/home/dingjian/code/DOTA_devkit/Test_nms2/Task1_results_0.1_nms_fast')
     mergebyrec(r'/home/dingjian/Documents/Research/experiments/mmdetection_DOTA/scratch_faster_rcnn_r50_fpn_gn_2x_dota2/Task2_results',
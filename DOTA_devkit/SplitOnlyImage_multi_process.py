@@ -1,10 +1,17 @@
 import os
 import numpy as np
 import cv2
-import copy
 import dota_utils as util
 from multiprocessing import Pool
 from functools import partial
+try:
+    from patch_writer import PatchWriter
+except ImportError:
+    from DOTA_devkit.patch_writer import PatchWriter
+try:
+    from split_manifest import SplitManifest, prune_manifest, split_incremental
+except ImportError:
+    from DOTA_devkit.split_manifest import SplitManifest, prune_manifest, split_incremental
 
 class splitbase():
     def __init__(self,
@@ -14,7 +21,11 @@ class splitbase():
                  subsize=1024,
                  ext='.png',
                  padding=True,
-                 num_process=32):
+                 num_process=32,
+                 patch_ext='.png',
+                 png_compression=None,
+                 num_threads=2,
+                 resume=True):
         self.srcpath = srcpath
         self.outpath = dstpath
         self.gap = gap
@@ -24,21 +35,34 @@ class splitbase():
         self.dstpath = dstpath
         self.ext = ext
         self.padding = padding
+        self.patch_ext = patch_ext
+        self.png_compression = png_compression
+        self.num_threads = num_threads
+        # created in each process, see patch_writer
+        self._patch_writer = None
+        # skip the images that did not change since they were split, the
+        # manifest is next to dstpath, which only holds the patches
+        self.resume = resume
+        self.manifestfile = os.path.normpath(dstpath) + '_split_manifest.jsonl'
         self.pool = Pool(num_process)
 
         if not os.path.isdir(self.outpath):
             os.mkdir(self.outpath)
 
-    def saveimagepatches(self, img, subimgname, left, up, ext='.png'):
-        subimg = copy.deepcopy(img[up: (up + self.subsize), left: (left + self.subsize)])
+    @property
+    def patch_writer(self):
+        if self._patch_writer is None:
+            self._patch_writer = PatchWriter(self.subsize,
+                                             padding=self.padding,
+                                             png_compression=self.png_compression,
+                                             num_threads=self.num_threads)
+        return self._patch_writer
+
+    def saveimagepatches(self, img, subimgname, left, up, ext=None):
+        if ext is None:
+            ext = self.patch_ext
         outdir = os.path.join(self.dstpath, subimgname + ext)
-        h, w, c = np.shape(subimg)
-        if (self.padding):
-            outimg = np.zeros((self.subsize, self.subsize, 3))
-            outimg[0:h, 0:w, :] = subimg
-            cv2.imwrite(outdir, outimg)
-        else:
-            cv2.imwrite(outdir, subimg)
+        self.patch_writer.write(img[up: (up + self.subsize), left: (left + self.subsize)], outdir)
 
     def SplitSingle(self, name, rate, extent):
         img = cv2.imread(os.path.join(self.srcpath, name + extent))
@@ -56,6 +80,7 @@ class splitbase():
         # if (max(weight, height) < self.subsize/2):
         #     return
 
+        tiles = []
         left, up = 0, 0
         while (left < weight):
             if (left + self.subsize >= weight):
@@ -66,6 +91,7 @@ class splitbase():
                     up = max(height - self.subsize, 0)
                 subimgname = outbasename + str(left) + '___' + str(up)
                 self.saveimagepatches(resizeimg, subimgname, left, up)
+                tiles.append(self.tilerecord(subimgname, weight - left, height - up))
                 if (up + self.subsize >= height):
                     break
                 else:
@@ -74,21 +100,51 @@ class splitbase():
                 break
             else:
                 left = left + self.slide
+        self.patch_writer.flush()
+        return tiles
+
+    def tilerecord(self, subimgname, width, height):
+        if self.padding:
+            width, height = self.subsize, self.subsize
+        else:
+            width, height = min(width, self.subsize), min(height, self.subsize)
+        return {'name': subimgname, 'width': width, 'height': height}
+
+    def sourcefiles(self, name, extent):
+        return {'image': os.path.join(self.srcpath, name + extent)}
+
+    def splitparams(self, rate):
+        return dict(rate=rate, gap=self.gap, subsize=self.subsize, padding=self.padding,
+                    patch_ext=self.patch_ext)
+
+    def tilefiles(self, tile, params):
+        return [os.path.join(self.dstpath, tile + params['patch_ext'])]
+
+    def SplitIncremental(self, task, rate, extent):
+        name, record = task
+        return split_incremental(self, name, rate, extent, record)
 
     def splitdata(self, rate):
 
         imagelist = util.GetFileFromThisRootDir(self.srcpath)
         imagenames = [util.custombasename(x) for x in imagelist if (util.custombasename(x) != 'Thumbs')]
 
-        worker = partial(self.SplitSingle, rate=rate, extent=self.ext)
+        manifest = SplitManifest(self.manifestfile)
+        tasks = [(name, manifest.records.get(name + '__' + str(rate) + '__')) for name in imagenames]
+        worker = partial(self.SplitIncremental, rate=rate, extent=self.ext)
 
-        self.pool.map(worker, imagenames)
+        for record in self.pool.imap_unordered(worker, tasks):
+            if record != manifest.records.get(record['key']):
+                manifest.add(record)
+        # the images removed from the source directory
+        prune_manifest(self, manifest, imagenames, rate)
         #
         # for name in imagenames:
         #     self.SplitSingle(name, rate, self.ext)
     def __getstate__(self):
         self_dict = self.__dict__.copy()
         del self_dict['pool']
+        self_dict['_patch_writer'] = None
         return self_dict
 
     def __setstate__(self, state):
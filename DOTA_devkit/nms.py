@@ -74,6 +74,96 @@ def py_cpu_nms_poly_fast(dets, thresh):
         # order = np.concatenate((order_obb, order_hbb), axis=0).astype(np.int)
     return keep
 
+def _build_hbb_grid(x1, y1, x2, y2, cell_size):
+    """Bucket boxes into the cells of a uniform grid covering their hbbs.
+
+    :return: (cell_starts, cell_boxes, grid_origin, grid_shape), the boxes of
+        cell c are cell_boxes[cell_starts[c]:cell_starts[c + 1]]
+    """
+    x0, y0 = x1.min(), y1.min()
+    cx1 = ((x1 - x0) // cell_size).astype(np.int64)
+    cy1 = ((y1 - y0) // cell_size).astype(np.int64)
+    cx2 = ((x2 - x0) // cell_size).astype(np.int64)
+    cy2 = ((y2 - y0) // cell_size).astype(np.int64)
+    nx, ny = cx2.max() + 1, cy2.max() + 1
+
+    # one (cell, box) entry for every cell covered by a box
+    spans_x = cx2 - cx1 + 1
+    spans_y = cy2 - cy1 + 1
+    counts = spans_x * spans_y
+    box_ids = np.repeat(np.arange(len(x1)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts,
+                                                  counts)
+    gx = cx1[box_ids] + offsets % spans_x[box_ids]
+    gy = cy1[box_ids] + offsets // spans_x[box_ids]
+    cell_ids = gy * nx + gx
+
+    sort_inds = np.argsort(cell_ids, kind='stable')
+    cell_boxes = box_ids[sort_inds]
+    cell_starts = np.searchsorted(cell_ids[sort_inds], np.arange(nx * ny + 1))
+    return cell_starts, cell_boxes, (x0, y0), (nx, ny)
+
+def py_cpu_nms_poly_grid(dets, thresh, cell_size=None):
+    """
+    same result as py_cpu_nms_poly_fast, but the candidates of every kept box
+    are looked up in a uniform grid bucketed on the hbbs instead of scanning
+    all remaining boxes, so each step only visits nearby boxes
+    :param dets: shape (n, 9) (x1, y1, ..., x4, y4, score)
+    :param thresh: iou threshold of the polygons
+    :param cell_size: side of the grid cells, default is twice the median
+        side of the hbbs
+    :return: indices of the kept dets, in descending score order
+    """
+    if len(dets) == 0:
+        return []
+    obbs = dets[:, 0:-1]
+    x1 = np.min(obbs[:, 0::2], axis=1)
+    y1 = np.min(obbs[:, 1::2], axis=1)
+    x2 = np.max(obbs[:, 0::2], axis=1)
+    y2 = np.max(obbs[:, 1::2], axis=1)
+    scores = dets[:, 8]
+    if cell_size is None:
+        cell_size = 2 * np.median(np.maximum(x2 - x1, y2 - y1))
+    cell_size = max(float(cell_size), 1.0)
+    cell_starts, cell_boxes, (x0, y0), (nx, ny) = _build_hbb_grid(
+        x1, y1, x2, y2, cell_size)
+
+    order = scores.argsort()[::-1]
+    rank = np.empty(len(dets), dtype=np.int64)
+    rank[order] = np.arange(len(dets))
+    suppressed = np.zeros(len(dets), dtype=bool)
+    polys = {}
+
+    def get_poly(i):
+        if i not in polys:
+            polys[i] = polyiou.VectorDouble(obbs[i, :8].tolist())
+        return polys[i]
+
+    keep = []
+    for i in order:
+        if suppressed[i]:
+            continue
+        keep.append(i)
+        gx1 = int((x1[i] - x0) // cell_size)
+        gy1 = int((y1[i] - y0) // cell_size)
+        gx2 = min(int((x2[i] - x0) // cell_size), nx - 1)
+        gy2 = min(int((y2[i] - y0) // cell_size), ny - 1)
+        cand = np.concatenate([
+            cell_boxes[cell_starts[gy * nx + gx1]:cell_starts[gy * nx + gx2 + 1]]
+            for gy in range(gy1, gy2 + 1)])
+        cand = np.unique(cand)
+        cand = cand[(rank[cand] > rank[i]) & ~suppressed[cand]]
+        # same hbb prefilter as py_cpu_nms_poly_fast
+        w = np.minimum(x2[i], x2[cand]) - np.maximum(x1[i], x1[cand])
+        h = np.minimum(y2[i], y2[cand]) - np.maximum(y1[i], y1[cand])
+        cand = cand[(w > 0) & (h > 0)]
+        for j in cand:
+            iou = polyiou.iou_poly(get_poly(i), get_poly(j))
+            # written so that a nan iou suppresses, like the other poly nms
+            if not iou <= thresh:
+                suppressed[j] = True
+    return keep
+
 def py_cpu_nms(dets, thresh):
     """Pure Python NMS baseline."""
     #print('dets:', dets)
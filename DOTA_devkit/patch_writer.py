@@ -0,0 +1,131 @@
+"""
+    Writer of the image patches of the splits.
+
+    The patches are padded in reused uint8 buffers and encoded by a few
+    threads, cv2 releases the GIL while it encodes and writes the files.
+"""
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import cv2
+import numpy as np
+
+
+class PatchWriter(object):
+    """Write the patches of an image, asynchronously.
+
+    Args:
+        subsize (int): Size of the patches, smaller crops are padded with
+            zeros on the bottom and the right to this size.
+        padding (bool): Pad the crops smaller than subsize.
+        png_compression (int): PNG compression level from 0 to 9, the default
+            of cv2 if None. Lower levels encode faster but give larger files.
+        jpg_quality (int): JPEG quality from 0 to 100, used when the patches
+            are written as .jpg files.
+        num_threads (int): Number of encoding threads, the patches are
+            encoded in the calling thread if 0.
+        max_pending (int): Number of patches queued or being encoded at most,
+            ``write`` blocks when it is reached. 2 * num_threads if None.
+    """
+
+    def __init__(self,
+                 subsize,
+                 padding=True,
+                 png_compression=None,
+                 jpg_quality=None,
+                 num_threads=4,
+                 max_pending=None):
+        self.subsize = subsize
+        self.padding = padding
+        self.params = []
+        if png_compression is not None:
+            self.params += [cv2.IMWRITE_PNG_COMPRESSION, png_compression]
+        if jpg_quality is not None:
+            self.params += [cv2.IMWRITE_JPEG_QUALITY, jpg_quality]
+        self.num_threads = num_threads
+        if max_pending is None:
+            max_pending = max(2 * num_threads, 1)
+        self.max_pending = max_pending
+        self.executor = None
+        if num_threads > 0:
+            self.executor = ThreadPoolExecutor(num_threads)
+        # the padding canvases of each shape, free to be reused
+        self.buffers = {}
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.futures = []
+
+    def write(self, patch, filename):
+        """Write a crop of an image, padded to subsize.
+
+        The crop is a view of the image, which must not be modified until
+        :meth:`flush` returns.
+        """
+        h, w = patch.shape[:2]
+        buffer = None
+        if self.padding and (h < self.subsize or w < self.subsize):
+            buffer = self._get_buffer(patch.shape[2:], patch.dtype)
+            buffer[:h, :w] = patch
+            buffer[h:] = 0
+            buffer[:h, w:] = 0
+            patch = buffer
+        if self.executor is None:
+            self._imwrite(filename, patch, buffer)
+            return
+        self.slots.acquire()
+        try:
+            future = self.executor.submit(self._imwrite, filename, patch,
+                                          buffer)
+        except BaseException:
+            self._release(buffer)
+            self.slots.release()
+            raise
+        self.futures.append(future)
+        # raise the errors of the patches written so far
+        if len(self.futures) > 2 * self.max_pending:
+            futures, self.futures = self.futures, []
+            for future in futures:
+                if future.done():
+                    future.result()
+                else:
+                    self.futures.append(future)
+
+    def _get_buffer(self, channels, dtype):
+        free = self.buffers.setdefault((channels, dtype), queue.Queue())
+        try:
+            return free.get_nowait()
+        except queue.Empty:
+            return np.empty((self.subsize, self.subsize) + channels, dtype)
+
+    def _release(self, buffer):
+        if buffer is not None:
+            self.buffers[(buffer.shape[2:], buffer.dtype)].put(buffer)
+
+    def _imwrite(self, filename, img, buffer):
+        try:
+            if not cv2.imwrite(filename, img, self.params):
+                raise IOError('failed to write ' + filename)
+        finally:
+            self._release(buffer)
+            if self.executor is not None:
+                self.slots.release()
+
+    def flush(self):
+        """Wait for the patches written so far, raise the first error."""
+        futures, self.futures = self.futures, []
+        wait(futures)
+        for future in futures:
+            future.result()
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,104 @@
+"""
+    Clipping of the objects of an image to its patches.
+
+    These are the rules of the splits: ``splitbase.savepatches`` writes the
+    labels of the patches with them and ``DOTADatasetTiles`` of mmdet cuts
+    its virtual tiles with them, so both give the same objects.
+"""
+import numpy as np
+from shapely.geometry import Polygon
+from shapely.geometry.polygon import orient
+
+
+def poly4_from_poly5(poly):
+    """Merge the two points of the shortest edge of a pentagon."""
+    points = np.asarray(poly, dtype=np.float64).reshape(5, 2)
+    edges = np.linalg.norm(points - np.roll(points, -1, axis=0), axis=1)
+    pos = int(edges.argmin())
+    merged = (points[pos] + points[(pos + 1) % 5]) / 2
+    points = [
+        merged if i == pos else points[i] for i in range(5)
+        if i != (pos + 1) % 5
+    ]
+    return np.concatenate(points)
+
+
+def best_point_order(poly, ref_poly):
+    """Rotate the points of poly to start at the closest one to ref_poly."""
+    points = np.asarray(poly, dtype=np.float64).reshape(4, 2)
+    orders = np.stack([np.roll(points, -i, axis=0) for i in range(4)])
+    ref = np.asarray(ref_poly, dtype=np.float64).reshape(1, 4, 2)
+    dists = ((orders - ref)**2).sum(axis=(1, 2))
+    return orders[dists.argmin()].reshape(8)
+
+
+def clip_polys(polys, window, subsize, thresh=0.7, choosebestpoint=True,
+               shapes=None):
+    """Clip the polygons of an image to a patch.
+
+    The polygons within the patch are moved to it, the ones cut by its
+    border are replaced by their intersection with it when it still is a
+    quadrilateral (or a pentagon, whose shortest edge is merged), and are
+    marked as cut when less than ``thresh`` of their area is kept. The
+    coordinates are truncated to ints as in the label files of the patches.
+
+    Args:
+        polys (ndarray): (n, 8) polygons in the coordinates of the image.
+        window (tuple): (left, up, right, down) of the patch, right and down
+            are the last pixels of the image in the patch.
+        subsize (int): Side of the patches.
+        thresh (float): Kept part of the area under which a cut polygon is
+            marked as cut.
+        choosebestpoint (bool): Start the clipped polygons at the point the
+            closest to the first one of the original polygons.
+        shapes (list[Polygon], optional): The shapely polygons of polys,
+            built if None.
+
+    Returns:
+        tuple: The indices of the polygons in the patch, their (k, 8)
+            polygons in the patch and whether they were cut.
+    """
+    left, up, right, down = window
+    polys = np.asarray(polys, dtype=np.float64).reshape(-1, 8)
+    if shapes is None:
+        shapes = [Polygon(poly.reshape(4, 2)) for poly in polys]
+    xs, ys = polys[:, 0::2], polys[:, 1::2]
+    xmin, xmax = xs.min(axis=1), xs.max(axis=1)
+    ymin, ymax = ys.min(axis=1), ys.max(axis=1)
+    candidates = np.nonzero((xmax >= left) & (xmin <= right)
+                            & (ymax >= up) & (ymin <= down))[0]
+    offset = np.array([left, up] * 4, dtype=np.float64)
+    patch = Polygon([(left, up), (right, up), (right, down), (left, down)])
+    inds, tile_polys, cut = [], [], []
+    for i in candidates:
+        shape = shapes[i]
+        if shape.area <= 0:
+            continue
+        if (xmin[i] >= left and xmax[i] <= right and ymin[i] >= up
+                and ymax[i] <= down):
+            inter, ratio = None, 1
+        else:
+            inter = shape.intersection(patch)
+            ratio = inter.area / shape.area
+        if ratio == 1:
+            inds.append(i)
+            tile_polys.append(np.trunc(polys[i] - offset))
+            cut.append(False)
+        elif ratio > 0:
+            if inter.geom_type != 'Polygon':
+                continue
+            points = list(orient(inter, sign=1).exterior.coords)[:-1]
+            if len(points) < 4 or len(points) > 5:
+                continue
+            poly = np.array(points, dtype=np.float64).reshape(-1)
+            if len(points) == 5:
+                poly = poly4_from_poly5(poly)
+            if choosebestpoint:
+                poly = best_point_order(poly, polys[i])
+            inds.append(i)
+            tile_polys.append(
+                np.clip(np.trunc(poly - offset), 1, subsize))
+            cut.append(ratio <= thresh)
+    return (np.array(inds, dtype=np.int64),
+            np.array(tile_polys, dtype=np.float64).reshape(-1, 8),
+            np.array(cut, dtype=bool))
@@ -4,7 +4,7 @@ import ImgSplit_multi_process
 import SplitOnlyImage_multi_process
 import shutil
 from multiprocessing import Pool
-from DOTA2COCO import DOTA2COCOTest, DOTA2COCOTrain
+from DOTA2COCO import SplitManifest2COCO
 import argparse
 
 wordname_16 = ['plane', 'baseball-diamond', 'bridge', 'ground-track-field', 'small-vehicle', 'large-vehicle', 'ship', 'tennis-court',
@@ -121,11 +121,11 @@ def prepare(srcpath, dstpath):
     split_test_ms.splitdata(0.5)
     split_test_ms.splitdata(1.5)
 
-    DOTA2COCOTrain(os.path.join(dstpath, 'trainval1024'), os.path.join(dstpath, 'trainval1024', 'DOTA1_5_trainval1024.json'), wordname_16, difficult='2')
-    DOTA2COCOTrain(os.path.join(dstpath, 'trainval1024_ms'), os.path.join(dstpath, 'trainval1024_ms', 'DOTA1_5_trainval1024_ms.json'), wordname_16, difficult='2')
+    SplitManifest2COCO(split_train.manifestfile, os.path.join(dstpath, 'trainval1024', 'DOTA1_5_trainval1024.json'), wordname_16, difficult='2')
+    SplitManifest2COCO(split_train_ms.manifestfile, os.path.join(dstpath, 'trainval1024_ms', 'DOTA1_5_trainval1024_ms.json'), wordname_16, difficult='2')
 
-    DOTA2COCOTest(os.path.join(dstpath, 'test1024'), os.path.join(dstpath, 'test1024', 'DOTA1_5_test1024.json'), wordname_16)
-    DOTA2COCOTest(os.path.join(dstpath, 'test1024_ms'), os.path.join(dstpath, 'test1024_ms', 'DOTA1_5_test1024_ms.json'), wordname_16)
+    SplitManifest2COCO(split_test.manifestfile, os.path.join(dstpath, 'test1024', 'DOTA1_5_test1024.json'), wordname_16)
+    SplitManifest2COCO(split_test_ms.manifestfile, os.path.join(dstpath, 'test1024_ms', 'DOTA1_5_test1024_ms.json'), wordname_16)
 if __name__ == '__main__':
     args = parse_args()
     srcpath = args.srcpath
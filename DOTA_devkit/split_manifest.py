@@ -0,0 +1,151 @@
+"""
+    Manifest of the splits, to only split again the images that changed.
+
+    The manifest is a json lines file, each line records an image split at
+    a rate: the digests of its source files, the split parameters and the
+    tiles it gave, with their sizes and the objects written in their
+    labels, so the COCO annotations are made without reading the patches.
+    Lines are appended as the images are done, so an interrupted split
+    resumes where it stopped. The last line of an image wins, the file is
+    compacted when it is loaded.
+
+    Records carry the ``version`` of their schema, the images of the
+    records of another version are split again. The records of the images
+    no longer in the source directory are dropped with their tiles.
+"""
+import hashlib
+import json
+import os
+
+MANIFEST_VERSION = 2
+
+
+def file_digest(filename, record=None):
+    """md5 of a file, with its size and mtime.
+
+    The md5 of record is reused if the size and the mtime did not change,
+    None is returned if the file does not exist.
+    """
+    if not os.path.isfile(filename):
+        return None
+    stat = os.stat(filename)
+    if (record is not None and record['size'] == stat.st_size
+            and record['mtime'] == stat.st_mtime_ns):
+        return record
+    md5 = hashlib.md5()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            md5.update(chunk)
+    return dict(size=stat.st_size, mtime=stat.st_mtime_ns, md5=md5.hexdigest())
+
+
+def same_sources(sources1, sources2):
+    if sorted(sources1) != sorted(sources2):
+        return False
+    for kind, digest in sources1.items():
+        other = sources2[kind]
+        if (digest is None) != (other is None):
+            return False
+        if digest is not None and digest['md5'] != other['md5']:
+            return False
+    return True
+
+
+class SplitManifest(object):
+    """Records of the images split into a directory.
+
+    Args:
+        filename (str): The json lines file, created if it does not exist.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.records = {}
+        if os.path.isfile(filename):
+            with open(filename) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # the last line of an interrupted split
+                        continue
+                    self.records[record['key']] = record
+        self.compact()
+
+    def compact(self):
+        """Rewrite the file with the last record of each image."""
+        tmpfile = self.filename + '.tmp'
+        with open(tmpfile, 'w') as f:
+            for record in self.records.values():
+                f.write(json.dumps(record) + '\n')
+        os.replace(tmpfile, self.filename)
+
+    def add(self, record):
+        self.records[record['key']] = record
+        with open(self.filename, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+
+
+def split_incremental(splitter, name, rate, extent, record=None):
+    """Split an image with ``splitter.SplitSingle`` unless its record shows
+    that its tiles are up to date.
+
+    The splitter gives the files of an image with ``sourcefiles(name,
+    extent)``, a dict of paths, the parameters of a split with
+    ``splitparams(rate)`` and the files of a tile with ``tilefiles(name,
+    params)``. ``SplitSingle`` returns the records of the tiles, dicts with
+    at least their ``name``. A record of another version is never up to
+    date.
+
+    Returns:
+        dict: The new record of the image.
+    """
+    key = name + '__' + str(rate) + '__'
+    if record is not None and record.get('version') != MANIFEST_VERSION:
+        record = None
+    old_sources = record['sources'] if record is not None else {}
+    sources = {
+        kind: file_digest(path, old_sources.get(kind))
+        for kind, path in splitter.sourcefiles(name, extent).items()
+    }
+    params = splitter.splitparams(rate)
+    if (splitter.resume and record is not None and record['params'] == params
+            and same_sources(record['sources'], sources)
+            and all(os.path.isfile(path) for tile in record['tiles']
+                    for path in splitter.tilefiles(tile['name'], params))):
+        tiles = record['tiles']
+    else:
+        if record is not None:
+            # the tiles of the image may not be the same ones
+            remove_tiles(splitter, record)
+        tiles = splitter.SplitSingle(name, rate, extent)
+    return dict(version=MANIFEST_VERSION, key=key, sources=sources,
+                params=params, tiles=tiles)
+
+
+def remove_tiles(splitter, record):
+    """Remove the files of the tiles of a record."""
+    for tile in record['tiles']:
+        for path in splitter.tilefiles(tile['name'], record['params']):
+            if os.path.isfile(path):
+                os.remove(path)
+
+
+def prune_manifest(splitter, manifest, names, rate):
+    """Drop the records of the images split at ``rate`` that are not in
+    ``names`` any more, with their tiles, and compact the manifest.
+
+    The records of other versions are dropped without touching their tiles.
+    """
+    suffix = '__' + str(rate) + '__'
+    keys = set(name + suffix for name in names)
+    stale = [
+        key for key in manifest.records
+        if key.endswith(suffix) and key not in keys
+    ]
+    for key in stale:
+        record = manifest.records.pop(key)
+        if record.get('version') == MANIFEST_VERSION:
+            remove_tiles(splitter, record)
+    if stale:
+        manifest.compact()
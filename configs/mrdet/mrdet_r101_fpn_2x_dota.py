@@ -64,7 +64,8 @@ train_cfg = dict(
             pos_iou_thr=0.7,
             neg_iou_thr=0.3,
             min_pos_iou=0.3,
-            ignore_iof_thr=-1),
+            ignore_iof_thr=-1,
+            chunk_size=65536),
         sampler=dict(
             type='RandomSampler',
             num=256,
@@ -106,10 +107,14 @@ test_cfg = dict(
         nms_thr=0.7,
         min_bbox_size=0),
     rcnn=dict(
-        score_thr=0.05, nms=dict(type='poly_nms', iou_thr=0.1), max_per_img=2000)
+        score_thr=0.05,
+        nms=dict(type='poly_nms', iou_thr=0.1, batched=True),
+        max_per_img=2000),
     # soft-nms is also supported for rcnn testing
     # e.g., nms=dict(type='soft_nms', iou_thr=0.5, min_score=0.05)
-)
+    # features of the test-time augmentations between the rpn and the rcnn:
+    # 'recompute', 'keep' or 'half'
+    aug_feats='keep')
 # dataset settings
 dataset_type = 'DOTADatasetCoco'
 data_root = 'data/DOTA/'
@@ -117,14 +122,14 @@ img_norm_cfg = dict(
     mean=[123.675, 116.28, 103.53], std=[58.395, 57.12, 57.375], to_rgb=True)
 train_pipeline = [
     dict(type='LoadImageFromFile'),
-    dict(type='LoadAnnotations', with_bbox=True, with_mask=True),
+    dict(type='LoadAnnotations', with_bbox=True, with_poly_bbox=True),
     dict(type='RotateAugmentation', rotate_ratio=0.5, small_filter=4),
     dict(type='Resize',  resize_ratio=1, img_scale=(1024, 1024), keep_ratio=True),
     dict(type='RandomFlip', flip_ratio=0.5),
     dict(type='Normalize', **img_norm_cfg),
     dict(type='Pad', size_divisor=32),
     dict(type='DefaultFormatBundle'),
-    dict(type='Collect', keys=['img', 'gt_bboxes', 'gt_labels', 'gt_masks'],
+    dict(type='Collect', keys=['img', 'gt_bboxes', 'gt_labels', 'gt_rbboxes'],
          meta_keys=('filename', 'ori_shape', 'img_shape', 'pad_shape',
                     'scale_factor', 'flip', 'rotate', 'img_norm_cfg'))
 ]
@@ -123,7 +123,7 @@ img_norm_cfg = dict(
     mean=[123.675, 116.28, 103.53], std=[58.395, 57.12, 57.375], to_rgb=True)
 train_pipeline = [
     dict(type='LoadImageFromFile'),
-    dict(type='LoadAnnotations', with_bbox=True, with_mask=True),
+    dict(type='LoadAnnotations', with_bbox=True, with_poly_bbox=True),
     # dict(type='MixUp', mixup_ratio=0.5, alpha=1.5, max_bbox_num=500),
     dict(type='RotateAugmentation', rotate_ratio=0.5, small_filter=0),
     # dict(type='Resize', small_filter=6, resize_ratio=1, ratio_range=(0.6, 1), img_scale=(1024, 1024), keep_ratio=True),
@@ -132,7 +132,7 @@ train_pipeline = [
     dict(type='Normalize', **img_norm_cfg),
     dict(type='Pad', size_divisor=32),
     dict(type='DefaultFormatBundle'),
-    dict(type='Collect', keys=['img', 'gt_bboxes', 'gt_labels', 'gt_masks'],
+    dict(type='Collect', keys=['img', 'gt_bboxes', 'gt_labels', 'gt_rbboxes'],
          meta_keys=('filename', 'ori_shape', 'img_shape', 'pad_shape',
                     'scale_factor', 'flip', 'img_norm_cfg'))
      #                'mixup', 'mixup_lambd','mixup_num1', 'mixup_num2'))
@@ -1,9 +1,11 @@
-from .env import get_root_logger, init_dist, set_random_seed
-from .inference import (inference_detector, init_detector, show_result,
-                        show_result_pyplot)
+from .env import get_root_logger, init_cpu_env, init_dist, set_random_seed
+from .inference import (get_sliding_windows, inference_detector,
+                        inference_detector_sliding_window, init_detector,
+                        show_result, show_result_pyplot)
 from .train import train_detector
 
 __all__ = [
     'init_dist', 'get_root_logger', 'set_random_seed', 'train_detector',
-    'init_detector', 'inference_detector', 'show_result', 'show_result_pyplot'
+    'init_detector', 'inference_detector', 'show_result', 'show_result_pyplot',
+    'get_sliding_windows', 'inference_detector_sliding_window', 'init_cpu_env'
 ]
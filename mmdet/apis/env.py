@@ -2,6 +2,7 @@ import logging
 import os
 import random
 import subprocess
+from functools import partial
 
 import numpy as np
 import torch
@@ -27,7 +28,9 @@ def _init_dist_pytorch(backend, **kwargs):
     # TODO: use local_rank instead of rank % num_gpus
     rank = int(os.environ['RANK'])
     num_gpus = torch.cuda.device_count()
-    torch.cuda.set_device(rank % num_gpus)
+    # cpu-only nodes run with the gloo backend and no device
+    if num_gpus > 0:
+        torch.cuda.set_device(rank % num_gpus)
     # print(**kwargs)
     ######################
     print('MASTER_ADDR: ', os.environ['MASTER_ADDR'])
@@ -46,7 +49,8 @@ def _init_dist_slurm(backend, port=29500, **kwargs):
     ntasks = int(os.environ['SLURM_NTASKS'])
     node_list = os.environ['SLURM_NODELIST']
     num_gpus = torch.cuda.device_count()
-    torch.cuda.set_device(proc_id % num_gpus)
+    if num_gpus > 0:
+        torch.cuda.set_device(proc_id % num_gpus)
     addr = subprocess.getoutput(
         'scontrol show hostname {} | head -n1'.format(node_list))
     os.environ['MASTER_PORT'] = str(port)
@@ -56,6 +60,51 @@ def _init_dist_slurm(backend, port=29500, **kwargs):
     dist.init_process_group(backend=backend)
 
 
+def init_cpu_env(num_threads=None, num_interop_threads=None, num_workers=0):
+    """Set up the threads of a process running a model on the cpu.
+
+    The cores available to the process are split between the intra-op
+    threads of the model and the data loader workers. When there are enough
+    cores the process is pinned to the first ``num_threads`` of them and each
+    worker to one of the following ones, so the workers do not compete with
+    the model for the same cores.
+
+    Args:
+        num_threads (int, optional): Intra-op threads, defaults to the cores
+            not used by the workers.
+        num_interop_threads (int, optional): Inter-op threads, left to torch
+            if not given. Must be set before any parallel work is done.
+        num_workers (int): Number of data loader workers.
+
+    Returns:
+        callable | None: ``worker_init_fn`` of the data loader.
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        cpus = sorted(os.sched_getaffinity(0))
+    else:
+        cpus = list(range(os.cpu_count()))
+    if num_threads is None:
+        num_threads = max(len(cpus) - num_workers, 1)
+    torch.set_num_threads(num_threads)
+    if num_interop_threads is not None:
+        torch.set_num_interop_threads(num_interop_threads)
+    if not hasattr(os, 'sched_setaffinity'):
+        return None
+    if num_threads + num_workers <= len(cpus):
+        os.sched_setaffinity(0, cpus[:num_threads])
+        worker_cpus = cpus[num_threads:num_threads + num_workers]
+    else:
+        worker_cpus = cpus
+    if num_workers == 0:
+        return None
+    return partial(_pin_worker, cpus=worker_cpus)
+
+
+def _pin_worker(worker_id, cpus):
+    os.sched_setaffinity(0, [cpus[worker_id % len(cpus)]])
+    torch.set_num_threads(1)
+
+
 def set_random_seed(seed):
     random.seed(seed)
     np.random.seed(seed)
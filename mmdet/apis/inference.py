@@ -8,9 +8,11 @@ import torch
 from mmcv.parallel import collate, scatter
 from mmcv.runner import load_checkpoint
 
-from mmdet.core import get_classes
+from mmdet.core import get_classes, scatter_cpu
+from mmdet.datasets import get_sliding_windows
 from mmdet.datasets.pipelines import Compose
 from mmdet.models import build_detector
+from mmdet.ops.poly_nms import poly_nms_wrapper
 
 
 def init_detector(config, checkpoint=None, device='cuda:0'):
@@ -33,7 +35,7 @@ def init_detector(config, checkpoint=None, device='cuda:0'):
     config.model.pretrained = None
     model = build_detector(config.model, test_cfg=config.test_cfg)
     if checkpoint is not None:
-        checkpoint = load_checkpoint(model, checkpoint)
+        checkpoint = load_checkpoint(model, checkpoint, map_location='cpu')
         if 'CLASSES' in checkpoint['meta']:
             model.CLASSES = checkpoint['meta']['CLASSES']
         else:
@@ -46,6 +48,13 @@ def init_detector(config, checkpoint=None, device='cuda:0'):
     return model
 
 
+def scatter_data(data, device):
+    """Move a collated batch to the device of the model."""
+    if torch.device(device).type == 'cpu':
+        return scatter_cpu(data)
+    return scatter(data, [device])[0]
+
+
 class LoadImage(object):
 
     def __call__(self, results):
@@ -80,7 +89,7 @@ def inference_detector(model, img):
     # prepare data
     data = dict(img=img)
     data = test_pipeline(data)
-    data = scatter(collate([data], samples_per_gpu=1), [device])[0]
+    data = scatter_data(collate([data], samples_per_gpu=1), device)
     # forward the model
     with torch.no_grad():
         result = model(return_loss=False, rescale=True, **data)
@@ -88,6 +97,88 @@ def inference_detector(model, img):
     return result
 
 
+def inference_detector_sliding_window(model,
+                                      img,
+                                      subsize=1024,
+                                      gap=200,
+                                      rates=(1.0, ),
+                                      nms_cfg=dict(
+                                          type='poly_nms', iou_thr=0.1),
+                                      imgs_per_batch=1):
+    """Inference a large image with an oriented detector, patch by patch.
+
+    The image is cut into overlapping patches in memory, each patch goes
+    through the test pipeline and the detector, the polygons are moved back
+    to image coordinates and a poly NMS over all patches, on the cpu, removes
+    the duplicates found in the overlaps. No patch or result file is
+    written.
+
+    Args:
+        model (nn.Module): The loaded detector, its results must be lists of
+            (n, 9) polygons with scores, one array per class.
+        img (str or ndarray): Image file or loaded image.
+        subsize (int): Side of the square patches.
+        gap (int): Overlap between neighbouring patches.
+        rates (Sequence[float]): The image is resized by each rate before
+            being cut, the detections of all rates are merged.
+        nms_cfg (dict): Config of the NMS across patches.
+        imgs_per_batch (int): Number of patches in each forward, detectors
+            that do not test batches (see ``batch_simple_test``, e.g. MRDet
+            does) test them one by one.
+
+    Returns:
+        list[ndarray]: (n, 9) polygons and scores of each class in the
+            coordinates of the full image.
+    """
+    cfg = model.cfg
+    device = next(model.parameters()).device  # model device
+    test_pipeline = Compose([LoadImage()] + cfg.data.test.pipeline[1:])
+    img = mmcv.imread(img)
+
+    dets = [[] for _ in model.CLASSES]
+    for rate in rates:
+        if rate != 1:
+            scaled_img = mmcv.imrescale(img, rate, interpolation='bicubic')
+        else:
+            scaled_img = img
+        height, width = scaled_img.shape[:2]
+        windows = get_sliding_windows(width, height, subsize, gap)
+        for start in range(0, len(windows), imgs_per_batch):
+            batch_windows = windows[start:start + imgs_per_batch]
+            batch = []
+            for left, up in batch_windows:
+                patch = scaled_img[up:up + subsize, left:left + subsize]
+                if patch.shape[:2] != (subsize, subsize):
+                    # border patches are zero padded as in ImgSplit
+                    patch = mmcv.impad(patch, shape=(subsize, subsize))
+                batch.append(test_pipeline(dict(img=patch)))
+            data = scatter_data(
+                collate(batch, samples_per_gpu=len(batch)), device)
+            with torch.no_grad():
+                results = model(
+                    return_loss=False, rescale=True, batched=True, **data)
+            scale = np.array([rate] * 8 + [1], dtype=np.float32)
+            for (left, up), result in zip(batch_windows, results):
+                offset = np.array([left, up] * 4 + [0], dtype=np.float32)
+                for i, cls_dets in enumerate(result):
+                    if len(cls_dets) > 0:
+                        dets[i].append((cls_dets + offset) / scale)
+
+    # the merge runs on the cpu, whose poly nms only compares the polygons
+    # whose horizontal boxes overlap, the cuda one compares all the pairs of
+    # the scene
+    nms_cfg_ = nms_cfg.copy()
+    nms_op = getattr(poly_nms_wrapper, nms_cfg_.pop('type', 'poly_nms'))
+    results = []
+    for cls_dets in dets:
+        if len(cls_dets) == 0:
+            results.append(np.zeros((0, 9), dtype=np.float32))
+            continue
+        cls_dets, _ = nms_op(np.concatenate(cls_dets), **nms_cfg_)
+        results.append(cls_dets)
+    return results
+
+
 # TODO: merge this method with the one in BaseDetector
 def show_result(img,
                 result,
@@ -2,7 +2,8 @@ from .assigners import (AssignResult, BaseAssigner, MaxIoUAssigner,
                         MaxIoUAssignerRbbox)
 from .bbox_target import bbox_target
 from .bbox_target_rbbox import rbbox_target_rbbox
-from .geometry import bbox_overlaps, rbbox_overlaps, rbbox_overlaps_cy_warp
+from .geometry import (bbox_overlaps, rbbox_overlaps, rbbox_overlaps_cy_warp,
+                       rbbox_overlaps_batched)
 from .samplers import (BaseSampler, CombinedSampler,
                        InstanceBalancedPosSampler, IoUBalancedNegSampler,
                        PseudoSampler, RandomSampler, SamplingResult,
@@ -41,7 +42,7 @@ __all__ = [
     'rbbox2result', 'bbox_target_rbbox', 'get_best_begin_point',
     'hbbox2rbboxRec', 'BaseRotationSampler',
     'get_best_begin_point_list', "mask_2_rbbox_list", 'ndarray2tensor',
-    'rbbox_overlaps_cy_warp', 'bbox_overlaps_cython',
+    'rbbox_overlaps_cy_warp', 'bbox_overlaps_cython', 'rbbox_overlaps_batched',
 
     # transformer_obb
     'get_new_begin_point_v1', 'rbboxPoly2Rectangle', 'hbbox2rbboxRec_v2',
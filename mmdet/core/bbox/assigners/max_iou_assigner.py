@@ -31,6 +31,10 @@ class MaxIoUAssigner(BaseAssigner):
         gpu_assign_thr (int): The upper bound of the number of GT for GPU
             assign. When the number of gt is above this threshold, will assign
             on CPU device. Negative values mean not assign on CPU.
+        chunk_size (int): If positive, bboxes are assigned in chunks of this
+            size so that at most (k, chunk_size) overlaps are in memory, the
+            result is the same as assigning all bboxes at once. Negative
+            values mean no chunking.
     """
 
     def __init__(self,
@@ -40,7 +44,8 @@ class MaxIoUAssigner(BaseAssigner):
                  gt_max_assign_all=True,
                  ignore_iof_thr=-1,
                  ignore_wrt_candidates=True,
-                 gpu_assign_thr=-1):
+                 gpu_assign_thr=-1,
+                 chunk_size=-1):
         self.pos_iou_thr = pos_iou_thr
         self.neg_iou_thr = neg_iou_thr
         self.min_pos_iou = min_pos_iou
@@ -48,6 +53,7 @@ class MaxIoUAssigner(BaseAssigner):
         self.ignore_iof_thr = ignore_iof_thr
         self.ignore_wrt_candidates = ignore_wrt_candidates
         self.gpu_assign_thr = gpu_assign_thr
+        self.chunk_size = chunk_size
 
     def assign(self, bboxes, gt_bboxes, gt_bboxes_ignore=None, gt_labels=None):
         """Assign gt to bboxes.
@@ -90,6 +96,25 @@ class MaxIoUAssigner(BaseAssigner):
                 gt_labels = gt_labels.cpu()
         bboxes = bboxes[:, :4]
         gt_bboxes = gt_bboxes[:, :4]
+        if 0 < self.chunk_size < bboxes.shape[0]:
+            assign_result = self.assign_chunked(bboxes, gt_bboxes,
+                                                gt_bboxes_ignore, gt_labels)
+        else:
+            overlaps = self.get_overlaps(bboxes, gt_bboxes, gt_bboxes_ignore)
+            assign_result = self.assign_wrt_overlaps(overlaps, gt_labels)
+            del overlaps
+        if assign_on_cpu:
+            assign_result.gt_inds = assign_result.gt_inds.to(device)
+            assign_result.max_overlaps = assign_result.max_overlaps.to(device)
+            if assign_result.labels is not None:
+                assign_result.labels = assign_result.labels.to(device)
+        return assign_result
+
+    def get_overlaps(self, bboxes, gt_bboxes, gt_bboxes_ignore=None):
+        """Overlaps between gt_bboxes and bboxes, shape (k, n).
+
+        The overlaps of bboxes that should be ignored are set to -1.
+        """
         overlaps = bbox_overlaps(gt_bboxes, bboxes)
         # 计算bbox(m)和gt_bbox(n)之间的overlap(n,m)
 
@@ -104,15 +129,110 @@ class MaxIoUAssigner(BaseAssigner):
                     gt_bboxes_ignore, bboxes, mode='iof')
                 ignore_max_overlaps, _ = ignore_overlaps.max(dim=0)
             overlaps[:, ignore_max_overlaps > self.ignore_iof_thr] = -1
+        return overlaps
 
-        assign_result = self.assign_wrt_overlaps(overlaps, gt_labels)
-        if assign_on_cpu:
-            assign_result.gt_inds = assign_result.gt_inds.to(device)
-            assign_result.max_overlaps = assign_result.max_overlaps.to(device)
-            if assign_result.labels is not None:
-                assign_result.labels = assign_result.labels.to(device)
-        del overlaps
-        return assign_result
+    def assign_chunked(self,
+                       bboxes,
+                       gt_bboxes,
+                       gt_bboxes_ignore=None,
+                       gt_labels=None):
+        """Assign gt to bboxes chunk by chunk.
+
+        Gives the same result as :meth:`assign_wrt_overlaps` on the full
+        overlaps, but only the overlaps of ``chunk_size`` bboxes are kept in
+        memory. Steps 2 and 3 only need the max overlap of each bbox, so they
+        are done in a first pass that also keeps the running max of each gt.
+        Step 4 needs the max of each gt over all bboxes and, when
+        ``gt_max_assign_all`` is set, a second pass over the chunks.
+
+        Args:
+            bboxes (Tensor): Bounding boxes to be assigned, shape(n, 4).
+            gt_bboxes (Tensor): Groundtruth boxes, shape (k, 4).
+            gt_bboxes_ignore (Tensor, optional): Ground truth bboxes that are
+                labelled as `ignored`, e.g., crowd boxes in COCO.
+            gt_labels (Tensor, optional): Label of gt_bboxes, shape (k, ).
+
+        Returns:
+            :obj:`AssignResult`: The assign result.
+        """
+        num_gts, num_bboxes = gt_bboxes.size(0), bboxes.size(0)
+        chunk_starts = range(0, num_bboxes, self.chunk_size)
+
+        # 1. assign -1 by default
+        assigned_gt_inds = bboxes.new_full((num_bboxes, ),
+                                           -1,
+                                           dtype=torch.long)
+        max_overlaps = bboxes.new_empty((num_bboxes, ))
+        gt_max_overlaps = bboxes.new_full((num_gts, ), -float('inf'))
+        gt_argmax_overlaps = bboxes.new_zeros((num_gts, ), dtype=torch.long)
+        for start in chunk_starts:
+            end = min(start + self.chunk_size, num_bboxes)
+            overlaps = self.get_overlaps(bboxes[start:end], gt_bboxes,
+                                         gt_bboxes_ignore)
+            chunk_max_overlaps, chunk_argmax_overlaps = overlaps.max(dim=0)
+            max_overlaps[start:end] = chunk_max_overlaps
+            # 2. and 3. assign negative and positive
+            self._assign_neg_and_pos(assigned_gt_inds[start:end],
+                                     chunk_max_overlaps,
+                                     chunk_argmax_overlaps)
+            # keep the first bbox with the highest overlap of each gt
+            chunk_gt_max, chunk_gt_argmax = overlaps.max(dim=1)
+            update = chunk_gt_max > gt_max_overlaps
+            gt_max_overlaps[update] = chunk_gt_max[update]
+            gt_argmax_overlaps[update] = chunk_gt_argmax[update] + start
+
+        # 4. assign fg: for each gt, proposals with highest IoU
+        valid_gts = gt_max_overlaps >= self.min_pos_iou
+        if self.gt_max_assign_all:
+            gt_ids = torch.arange(
+                1, num_gts + 1, device=bboxes.device)[:, None]
+            for start in chunk_starts:
+                end = min(start + self.chunk_size, num_bboxes)
+                overlaps = self.get_overlaps(bboxes[start:end], gt_bboxes,
+                                             gt_bboxes_ignore)
+                # a bbox that is the best match of several gts goes to the
+                # last of them, as in the gt loop of assign_wrt_overlaps
+                is_gt_max = (overlaps == gt_max_overlaps[:, None]) & \
+                    valid_gts[:, None]
+                best_gt_ids, _ = (is_gt_max.long() * gt_ids).max(dim=0)
+                chunk_gt_inds = assigned_gt_inds[start:end]
+                assigned_gt_inds[start:end] = torch.where(
+                    best_gt_ids > 0, best_gt_ids, chunk_gt_inds)
+        else:
+            for i in range(num_gts):
+                if valid_gts[i]:
+                    assigned_gt_inds[gt_argmax_overlaps[i]] = i + 1
+
+        assigned_labels = self._assign_labels(assigned_gt_inds, gt_labels)
+        return AssignResult(
+            num_gts, assigned_gt_inds, max_overlaps, labels=assigned_labels)
+
+    def _assign_neg_and_pos(self, assigned_gt_inds, max_overlaps,
+                            argmax_overlaps):
+        """Steps 2 and 3 of the assignment, modifies assigned_gt_inds."""
+        # 2. assign negative: below
+        if isinstance(self.neg_iou_thr, float):
+            assigned_gt_inds[(max_overlaps >= 0)
+                             & (max_overlaps < self.neg_iou_thr)] = 0
+        elif isinstance(self.neg_iou_thr, tuple):
+            assert len(self.neg_iou_thr) == 2
+            assigned_gt_inds[(max_overlaps >= self.neg_iou_thr[0])
+                             & (max_overlaps < self.neg_iou_thr[1])] = 0
+
+        # 3. assign positive: above positive IoU threshold
+        pos_inds = max_overlaps >= self.pos_iou_thr
+        assigned_gt_inds[pos_inds] = argmax_overlaps[pos_inds] + 1
+
+    def _assign_labels(self, assigned_gt_inds, gt_labels):
+        if gt_labels is None:
+            return None
+        assigned_labels = assigned_gt_inds.new_zeros(
+            (assigned_gt_inds.size(0), ))
+        pos_inds = torch.nonzero(assigned_gt_inds > 0).squeeze()
+        if pos_inds.numel() > 0:
+            assigned_labels[pos_inds] = gt_labels[assigned_gt_inds[pos_inds] -
+                                                  1]
+        return assigned_labels
 
     def assign_wrt_overlaps(self, overlaps, gt_labels=None):
         """Assign w.r.t. the overlaps of bboxes with gts.
@@ -142,18 +262,9 @@ class MaxIoUAssigner(BaseAssigner):
         # for each gt, the max iou of all proposals
         gt_max_overlaps, gt_argmax_overlaps = overlaps.max(dim=1)
 
-        # 2. assign negative: below
-        if isinstance(self.neg_iou_thr, float):
-            assigned_gt_inds[(max_overlaps >= 0)
-                             & (max_overlaps < self.neg_iou_thr)] = 0
-        elif isinstance(self.neg_iou_thr, tuple):
-            assert len(self.neg_iou_thr) == 2
-            assigned_gt_inds[(max_overlaps >= self.neg_iou_thr[0])
-                             & (max_overlaps < self.neg_iou_thr[1])] = 0
-
-        # 3. assign positive: above positive IoU threshold
-        pos_inds = max_overlaps >= self.pos_iou_thr
-        assigned_gt_inds[pos_inds] = argmax_overlaps[pos_inds] + 1
+        # 2. assign negative and 3. assign positive
+        self._assign_neg_and_pos(assigned_gt_inds, max_overlaps,
+                                 argmax_overlaps)
 
         # 4. assign fg: for each gt, proposals with highest IoU
         for i in range(num_gts):
@@ -164,14 +275,7 @@ class MaxIoUAssigner(BaseAssigner):
                 else:
                     assigned_gt_inds[gt_argmax_overlaps[i]] = i + 1
 
-        if gt_labels is not None:
-            assigned_labels = assigned_gt_inds.new_zeros((num_bboxes, ))
-            pos_inds = torch.nonzero(assigned_gt_inds > 0).squeeze()
-            if pos_inds.numel() > 0:
-                assigned_labels[pos_inds] = gt_labels[
-                    assigned_gt_inds[pos_inds] - 1]
-        else:
-            assigned_labels = None
+        assigned_labels = self._assign_labels(assigned_gt_inds, gt_labels)
 
         return AssignResult(
             num_gts, assigned_gt_inds, max_overlaps, labels=assigned_labels)
@@ -1,7 +1,7 @@
 import torch
 from .assign_result import AssignResult
 from .base_assigner import BaseAssigner
-from ..geometry import rbbox_overlaps_cy_warp
+from ..geometry import rbbox_overlaps_batched
 
 class MaxIoUAssignerRbbox(BaseAssigner):
     """Assign a corresponding gt bbox or background to each bbox.
@@ -88,18 +88,17 @@ class MaxIoUAssignerRbbox(BaseAssigner):
                 gt_labels = gt_labels.cpu()
         bboxes = bboxes[:, :8]
         # print(torch.cuda.current_device())
-        overlaps = rbbox_overlaps_cy_warp(gt_bboxes, bboxes)
-        overlaps = gt_bboxes.new_tensor(overlaps)
+        overlaps = rbbox_overlaps_batched(gt_bboxes, bboxes)
         # 计算bbox(m)和gt_bbox(n)之间的overlap(n,m)
 
         if (self.ignore_iof_thr > 0) and (gt_bboxes_ignore is not None) and (
                 gt_bboxes_ignore.numel() > 0):
             if self.ignore_wrt_candidates:
-                ignore_overlaps = rbbox_overlaps_cy_warp(
+                ignore_overlaps = rbbox_overlaps_batched(
                     bboxes, gt_bboxes_ignore, mode='iof')
                 ignore_max_overlaps, _ = ignore_overlaps.max(dim=1)
             else:
-                ignore_overlaps = rbbox_overlaps_cy_warp(
+                ignore_overlaps = rbbox_overlaps_batched(
                     gt_bboxes_ignore, bboxes, mode='iof')
                 ignore_max_overlaps, _ = ignore_overlaps.max(dim=0)
             overlaps[:, ignore_max_overlaps > self.ignore_iof_thr] = -1
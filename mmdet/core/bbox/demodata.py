@@ -0,0 +1,37 @@
+import numpy as np
+
+
+def random_rbboxes(num,
+                   span=200,
+                   size_range=(2, 52),
+                   theta_range=(0, np.pi),
+                   rng=None):
+    """Random rotated rectangles, as the 4 corners of each.
+
+    Args:
+        num (int): Number of rectangles.
+        span (float): The centers are drawn in [0, span) along both axes.
+        size_range (tuple): Range of the widths and the heights.
+        theta_range (tuple): Range of the angles, in radians.
+        rng (np.random.RandomState, optional): Random state, the global one
+            of numpy if None.
+
+    Returns:
+        ndarray: (num, 8) corners in float64.
+
+    Example:
+        >>> rbboxes = random_rbboxes(3, rng=np.random.RandomState(0))
+        >>> assert rbboxes.shape == (3, 8)
+    """
+    if rng is None:
+        rng = np.random.mtrand._rand
+    ctr = rng.rand(num, 2) * span
+    wh = rng.rand(num, 2) * (size_range[1] - size_range[0]) + size_range[0]
+    theta = rng.rand(num) * (theta_range[1] - theta_range[0]) + theta_range[0]
+    cos, sin = np.cos(theta), np.sin(theta)
+    corners = []
+    for dx, dy in [(-1, -1), (1, -1), (1, 1), (-1, 1)]:
+        dw, dh = dx * wh[:, 0] / 2, dy * wh[:, 1] / 2
+        corners.append(ctr[:, 0] + dw * cos - dh * sin)
+        corners.append(ctr[:, 1] + dw * sin + dh * cos)
+    return np.stack(corners, axis=1)
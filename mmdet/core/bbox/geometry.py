@@ -151,4 +151,134 @@ def rbbox_overlaps_cy_warp(rbboxes, query_boxes):
         overlap = polyiou.iou_poly(polyiou.VectorDouble(box), polyiou.VectorDouble(query_box))
         ious[box_index][query_box_index] = overlap
 
-    return torch.from_numpy(ious).to(box_device)
\ No newline at end of file
+    return torch.from_numpy(ious).to(box_device)
+
+
+def _poly_areas(polys):
+    """Signed shoelace areas of polygons with shape (n, k, 2)."""
+    x, y = polys[..., 0], polys[..., 1]
+    return 0.5 * (x * y.roll(-1, 1) - y * x.roll(-1, 1)).sum(dim=1)
+
+
+def _clip_polys(polys, edge_start, edge_end):
+    """One Sutherland-Hodgman step.
+
+    Clip every polygon in ``polys`` (n, k, 2) with the half plane on the left
+    of its own edge ``edge_start -> edge_end`` (n, 2). Polygons are stored
+    with a fixed number of slots, unused slots repeat the last vertex so that
+    they only add zero-length edges.
+
+    Returns:
+        Tensor: clipped polygons, shape (n, k + 1, 2).
+    """
+    num_polys, num_slots = polys.shape[:2]
+    edge = (edge_end - edge_start)[:, None, :]
+    rel = polys - edge_start[:, None, :]
+    side = edge[..., 0] * rel[..., 1] - edge[..., 1] * rel[..., 0]
+
+    next_polys = polys.roll(-1, 1)
+    next_side = side.roll(-1, 1)
+    inside = side >= 0
+    crossing = inside != (next_side >= 0)
+    denom = torch.where(crossing, side - next_side, torch.ones_like(side))
+    cross_pts = polys + (side / denom)[..., None] * (next_polys - polys)
+
+    # each edge emits its start point if inside and the crossing point if it
+    # crosses the clip line, then valid points are compacted to the front
+    cands = torch.stack([polys, cross_pts], dim=2).view(num_polys, -1, 2)
+    valid = torch.stack([inside, crossing], dim=2).view(num_polys, -1)
+    num_valid = valid.long().sum(dim=1)
+    rank = valid.long().cumsum(dim=1) - 1
+    rank[~valid] = cands.size(1)
+    packed = cands.new_zeros(num_polys, cands.size(1) + 1, 2)
+    packed.scatter_(1, rank[..., None].expand(-1, -1, 2), cands)
+
+    slots = torch.arange(num_slots + 1, device=polys.device)
+    slots = torch.min(slots[None, :], (num_valid - 1).clamp(min=0)[:, None])
+    return packed.gather(1, slots[..., None].expand(-1, -1, 2))
+
+
+def _convex_quad_inter_areas(polys1, polys2):
+    """Intersection areas of aligned pairs of convex quadrilaterals.
+
+    Args:
+        polys1 (Tensor): shape (n, 4, 2)
+        polys2 (Tensor): shape (n, 4, 2)
+
+    Returns:
+        Tensor: shape (n, )
+    """
+    # clip edges must run counter-clockwise so that "inside" is on the left
+    clockwise = _poly_areas(polys2) < 0
+    polys2 = torch.where(clockwise[:, None, None], polys2.flip(1), polys2)
+    inter = polys1
+    for k in range(4):
+        inter = _clip_polys(inter, polys2[:, k], polys2[:, (k + 1) % 4])
+    return _poly_areas(inter).abs()
+
+
+def rbbox_overlaps_batched(rbboxes1, rbboxes2, mode='iou', chunk_size=65536):
+    """Calculate overlap between two sets of rbboxes on their device.
+
+    Only pairs whose enclosing horizontal boxes overlap are evaluated, with
+    exact convex-quad intersection (Sutherland-Hodgman clipping of
+    ``rbboxes1`` by the four edges of ``rbboxes2``). The pairs are processed
+    ``chunk_size`` at a time to bound memory. The results match
+    :func:`rbbox_overlaps_cy_warp` for convex polygons.
+
+    Args:
+        rbboxes1 (Tensor): shape (m, 8)
+        rbboxes2 (Tensor): shape (n, 8)
+        mode (str): "iou" (intersection over union) or iof (intersection over
+            foreground).
+        chunk_size (int): Max number of box pairs evaluated at once.
+
+    Returns:
+        ious(Tensor): shape (m, n)
+
+    Example:
+        >>> rbboxes1 = torch.FloatTensor([[0, 0, 10, 0, 10, 10, 0, 10]])
+        >>> rbboxes2 = torch.FloatTensor([[5, 0, 15, 0, 15, 10, 5, 10],
+        >>>                               [20, 20, 30, 20, 30, 30, 20, 30]])
+        >>> ious = rbbox_overlaps_batched(rbboxes1, rbboxes2)
+        >>> assert torch.allclose(ious, torch.FloatTensor([[1 / 3, 0]]))
+    """
+    assert mode in ['iou', 'iof']
+
+    rows = rbboxes1.size(0)
+    cols = rbboxes2.size(0)
+    ious = rbboxes1.new_zeros(rows, cols)
+    if rows * cols == 0:
+        return ious
+
+    polys1 = rbboxes1[:, :8].reshape(-1, 4, 2)
+    polys2 = rbboxes2[:, :8].reshape(-1, 4, 2)
+
+    # horizontal box prefilter, pairs that do not touch have zero overlap
+    lt = torch.max(polys1.min(dim=1)[0][:, None], polys2.min(dim=1)[0])
+    rb = torch.min(polys1.max(dim=1)[0][:, None], polys2.max(dim=1)[0])
+    inds1, inds2 = ((lt <= rb).all(dim=2)).nonzero().t()
+
+    for start in range(0, inds1.numel(), chunk_size):
+        chunk_inds1 = inds1[start:start + chunk_size]
+        chunk_inds2 = inds2[start:start + chunk_size]
+        p1 = polys1[chunk_inds1]
+        p2 = polys2[chunk_inds2]
+        # work around the pair centre to keep float32 cross products precise
+        origin = p2.mean(dim=1, keepdim=True)
+        p1 = p1 - origin
+        p2 = p2 - origin
+
+        inter = _convex_quad_inter_areas(p1, p2)
+        area1 = _poly_areas(p1).abs()
+        if mode == 'iou':
+            union = area1 + _poly_areas(p2).abs() - inter
+            # degenerated pairs follow DOTA_devkit.polyiou
+            overlaps = torch.where(union == 0, (inter + 1) / (union + 1),
+                                   inter / union)
+        else:
+            overlaps = torch.where(area1 == 0, torch.zeros_like(inter),
+                                   inter / area1)
+        ious[chunk_inds1, chunk_inds2] = overlaps
+
+    return ious
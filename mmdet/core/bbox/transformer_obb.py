@@ -43,32 +43,24 @@ def rbboxPoly2Rectangle(rbbox):
         rec = rbbox.new_zeros(0, 5)
         return rec
     rbbox = rbbox.view(-1, 4, 2)
-    rbbox = rbbox.permute(0, 2, 1)
-    angle = torch.atan2((rbbox[:, 1, 1] - rbbox[:, 1, 0]), (rbbox[:, 0, 1] - rbbox[:, 0, 0]))
+    xs = rbbox[:, :, 0]
+    ys = rbbox[:, :, 1]
+    angle = torch.atan2((ys[:, 1] - ys[:, 0]), (xs[:, 1] - xs[:, 0]))
     # arctan((y2 - y1) / (x2 - x1))
     # angle = torch.atan2((rbbox[:, 1, 3] - rbbox[:, 1, 0]), (rbbox[:, 0, 3] - rbbox[:, 0, 0]))
-    center = rbbox.new_zeros((rbbox.shape[0], 2, 1))
-    for i in range(4):
-        center[:, 0, 0] += rbbox[:, 0, i]
-        center[:, 1, 0] += rbbox[:, 1, i]
-    center = center / 4.0
-
-    R = rbbox.new_tensor([[[torch.cos(_angle), -torch.sin(_angle)],
-                           [torch.sin(_angle), torch.cos(_angle)]] for _angle in angle])
-    RT = R.permute(0, 2, 1)
-    normalized = [torch.mm(RT[i], rbbox[i] - center[i]) for i in range(rbbox.shape[0])]  # list([Tensor])
-    normalized = torch.stack(normalized, dim=0)
-
-    xmin = torch.min(normalized[:, 0, :], dim=1)[0]
-    ymin = torch.min(normalized[:, 1, :], dim=1)[0]
-    xmax = torch.max(normalized[:, 0, :], dim=1)[0]
-    ymax = torch.max(normalized[:, 1, :], dim=1)[0]
-
-    w = xmax - xmin + 1
-    h = ymax - ymin + 1
-    angle = angle
-    x_center = center[:, 0, 0]
-    y_center = center[:, 1, 0]
+    x_center = (xs[:, 0] + xs[:, 1] + xs[:, 2] + xs[:, 3]) / 4.0
+    y_center = (ys[:, 0] + ys[:, 1] + ys[:, 2] + ys[:, 3]) / 4.0
+
+    # rotate the corners by -angle around the center, R^T * (p - c)
+    cos = torch.cos(angle)[:, None]
+    sin = torch.sin(angle)[:, None]
+    dx = xs - x_center[:, None]
+    dy = ys - y_center[:, None]
+    normalized_x = cos * dx + sin * dy
+    normalized_y = cos * dy - sin * dx
+
+    w = normalized_x.max(dim=1)[0] - normalized_x.min(dim=1)[0] + 1
+    h = normalized_y.max(dim=1)[0] - normalized_y.min(dim=1)[0] + 1
 
     rec = torch.stack([x_center, y_center, w, h, angle], dim=-1)
 
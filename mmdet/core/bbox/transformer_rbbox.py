@@ -3,7 +3,6 @@ import numpy as np
 import math
 import math
 import torch
-import copy
 import cv2
 
 def ndarray2tensor(arrays, device_id):
@@ -32,37 +31,26 @@ def get_best_begin_point(rbboxes):
     :return: 调整顺序成(x1', y1', x2', y2', x3', y3', x4', y4')
             使得与(xmin, ymin, xmax, ymin, xmax, ymax, xmin, ymax）的空间位置一致
    '''
-    rbboxes_best = rbboxes.new_zeros(rbboxes.size())
-    for i in range(len(rbboxes)):
-        rbbox = rbboxes[i]
-        x1 = rbbox[0]
-        y1 = rbbox[1]
-        x2 = rbbox[2]
-        y2 = rbbox[3]
-        x3 = rbbox[4]
-        y3 = rbbox[5]
-        x4 = rbbox[6]
-        y4 = rbbox[7]
-
-        xmin = min(x1, x2, x3, x4)
-        ymin = min(y1, y2, y3, y4)
-        xmax = max(x1, x2, x3, x4)
-        ymax = max(y1, y2, y3, y4)
-        combinate = rbbox.new_tensor([[[x1, y1], [x2, y2], [x3, y3], [x4, y4]], [[x2, y2], [x3, y3], [x4, y4], [x1, y1]],
-                     [[x3, y3], [x4, y4], [x1, y1], [x2, y2]], [[x4, y4], [x1, y1], [x2, y2], [x3, y3]]])
-        dst_coordinate = torch.tensor([[xmin, ymin], [xmax, ymin], [xmax, ymax], [xmin, ymax]])
-        force = 100000000.0
-        force_flag = 0
-        for j in range(4):
-            temp_force = cal_line_length(combinate[j][0], dst_coordinate[0]) + \
-                         cal_line_length(combinate[j][1], dst_coordinate[1]) + \
-                         cal_line_length(combinate[j][2], dst_coordinate[2]) + \
-                         cal_line_length(combinate[j][3], dst_coordinate[3])
-            if temp_force < force:
-                force = temp_force
-                force_flag = j
-        temp = combinate[force_flag].view(1, 8)
-        rbboxes_best[i] = temp
+    num_rbboxes = rbboxes.size(0)
+    if num_rbboxes == 0:
+        return rbboxes.new_zeros(rbboxes.size())
+    points = rbboxes.reshape(num_rbboxes, 4, 2)
+    xmin, ymin = points.min(dim=1)[0].unbind(dim=1)
+    xmax, ymax = points.max(dim=1)[0].unbind(dim=1)
+    dst_coordinate = torch.stack(
+        [xmin, ymin, xmax, ymin, xmax, ymax, xmin, ymax],
+        dim=1).view(num_rbboxes, 1, 4, 2)
+    # the 4 cyclic rotations of every polygon, (n, 4, 4, 2)
+    shifts = torch.arange(4, device=rbboxes.device)
+    shifts = (shifts[:, None] + shifts[None, :]) % 4
+    combinate = points[:, shifts]
+    # the distances are summed in double as cal_line_length does, so near
+    # ties choose the same begin point as the per-polygon loop did
+    dists = (combinate - dst_coordinate).double().norm(dim=3)
+    force = dists[..., 0] + dists[..., 1] + dists[..., 2] + dists[..., 3]
+    force_flag = force.argmin(dim=1)
+    rbboxes_best = combinate.view(num_rbboxes, 4, 8)[
+        torch.arange(num_rbboxes, device=rbboxes.device), force_flag]
 
     return rbboxes_best
 
@@ -125,37 +113,33 @@ def choose_best_match(rrois, gt_rrois):
     :return: gt_rroi_news: gt_roi with new representation
             shape: (n, 5)
     """
-    # TODO: check the dimensions
     rroi_angles = rrois[:, 4].unsqueeze(1)
 
-    gt_xs, gt_ys, gt_ws, gt_hs, gt_angles = copy.deepcopy(gt_rrois[:, 0]), copy.deepcopy(gt_rrois[:, 1]), \
-                                            copy.deepcopy(gt_rrois[:, 2]), copy.deepcopy(gt_rrois[:, 3]), \
-                                            copy.deepcopy(gt_rrois[:, 4])
+    gt_xs, gt_ys, gt_ws, gt_hs, gt_angles = gt_rrois[:, :5].unbind(dim=1)
 
-    gt_angle_extent = torch.cat(((gt_angles - math.pi/2.)[:, np.newaxis], (gt_angles)[:, np.newaxis],
-                                 (gt_angles + math.pi/2.)[:, np.newaxis], (gt_angles + math.pi)[:, np.newaxis]), 1)
+    gt_angle_extent = torch.stack(
+        (gt_angles - math.pi / 2., gt_angles, gt_angles + math.pi / 2.,
+         gt_angles + math.pi), 1)
     dist = abs(rroi_angles - gt_angle_extent)
     min_index = torch.argmin(dist, 1)
 
-    gt_rrois_extent0 = torch.cat((gt_xs.unsqueeze(1), gt_ys.unsqueeze(1), \
-                                 gt_hs.unsqueeze(1), gt_ws.unsqueeze(1), gt_angles.unsqueeze(1) - np.pi/2.), 1)
-    gt_rrois_extent1 = copy.deepcopy(gt_rrois)
-    gt_rrois_extent2 = torch.cat((gt_xs.unsqueeze(1), gt_ys.unsqueeze(1), \
-                                 gt_hs.unsqueeze(1), gt_ws.unsqueeze(1), gt_angles.unsqueeze(1) + np.pi/2.), 1)
-    gt_rrois_extent3 = torch.cat((gt_xs.unsqueeze(1), gt_ys.unsqueeze(1), \
-                                 gt_ws.unsqueeze(1), gt_hs.unsqueeze(1), gt_angles.unsqueeze(1) + np.pi), 1)
-    gt_rrois_extent = torch.cat((gt_rrois_extent0.unsqueeze(1),
-                                     gt_rrois_extent1.unsqueeze(1),
-                                     gt_rrois_extent2.unsqueeze(1),
-                                     gt_rrois_extent3.unsqueeze(1)), 1)
-
-    gt_rrois_new = torch.zeros_like(gt_rrois)
-    # TODO: add pool.map here
-    for curiter, index in enumerate(min_index):
-        gt_rrois_new[curiter, :] = gt_rrois_extent[curiter, index, :]
-
-
-    return gt_rrois_new
+    gt_rrois_extent0 = torch.stack(
+        (gt_xs, gt_ys, gt_hs, gt_ws, gt_angles - np.pi / 2.), 1)
+    gt_rrois_extent1 = gt_rrois
+    gt_rrois_extent2 = torch.stack(
+        (gt_xs, gt_ys, gt_hs, gt_ws, gt_angles + np.pi / 2.), 1)
+    gt_rrois_extent3 = torch.stack(
+        (gt_xs, gt_ys, gt_ws, gt_hs, gt_angles + np.pi), 1)
+    gt_rrois_extent = torch.stack((gt_rrois_extent0,
+                                   gt_rrois_extent1,
+                                   gt_rrois_extent2,
+                                   gt_rrois_extent3), 1)
+
+    # pick extent min_index[i] for every row i, (n, 4, 5) -> (n, 5)
+    gt_rrois_new = gt_rrois_extent.gather(
+        1, min_index.view(-1, 1, 1).expand(-1, 1, gt_rrois_extent.size(2)))
+
+    return gt_rrois_new.squeeze(1)
 
 def rbbox2hbbox(rbboxes):
     '''
@@ -10,6 +10,9 @@ from .recall import (eval_recalls, plot_iou_recall, plot_num_recall,
 from .dota_utils import (TuplePoly2Poly, seg2poly, OBBDet2Comp4,
                          HBBDet2Comp4, HBBOBB2Comp4,
                          HBBSeg2Comp4)
+from .rbbox_format import rbboxes2lines, rbboxes2text
+from .result_writers import (DetectionStore, DetectionStoreWriter,
+                             ResultWriter, Task1ResultWriter)
 
 __all__ = [
     'voc_classes', 'imagenet_det_classes', 'imagenet_vid_classes',
@@ -19,5 +22,6 @@ __all__ = [
     'eval_map', 'print_map_summary', 'eval_recalls', 'print_recall_summary',
     'plot_num_recall', 'plot_iou_recall', 'TuplePoly2Poly', 'seg2poly',
     'OBBDet2Comp4', 'HBBSeg2Comp4', 'HBBOBB2Comp4',
-    'HBBDet2Comp4'
+    'HBBDet2Comp4', 'rbboxes2lines', 'rbboxes2text', 'ResultWriter',
+    'Task1ResultWriter', 'DetectionStore', 'DetectionStoreWriter'
 ]
@@ -5,6 +5,8 @@ import pycocotools.mask as mask_utils
 import os
 import cv2
 
+from .rbbox_format import rbboxes2lines
+
 # get dataset
 
 import os
@@ -161,45 +163,23 @@ def seg2poly(rle):
 
 def OBBDet2Comp4(dataset, results):
     results_dict = {}
-    if hasattr(dataset, 'datasets'):
-        for data in dataset.datasets:
-            for idx in range(len(data)):
-                # import pdb
-                # pdb.set_trace()
-                filename = data.img_infos[idx]['filename']
-                filename = os.path.basename(filename)
-                result = results[idx]
-                for label in range(len(result)):
-                    rbboxes = result[label]
-                    # import pdb
-                    # pdb.set_trace()
-                    cls_name = data.CLASSES[label]
-                    if cls_name not in results_dict:
-                        results_dict[cls_name] = []
-                    for i in range(rbboxes.shape[0]):
-                        poly = rbboxes[i][:-1]
-                        score = float(rbboxes[i][-1])
-                        outline = filename + ' ' + str(score) + ' ' + ' '.join(map(str, poly))
-                        results_dict[cls_name].append(outline)
-    else:
-        for idx in range(len(dataset)):
-            # import pdb
-            # pdb.set_trace()
-            filename = dataset.img_infos[idx]['filename']
-            filename = os.path.basename(filename)
-            result = results[idx]
-            for label in range(len(result)):
-                rbboxes = result[label]
-                # import pdb
-                # pdb.set_trace()
-                cls_name = dataset.CLASSES[label]
-                if cls_name not in results_dict:
-                    results_dict[cls_name] = []
-                for i in range(rbboxes.shape[0]):
-                    poly = rbboxes[i][:-1]
-                    score = float(rbboxes[i][-1])
-                    outline = filename + ' ' + str(score) + ' ' + ' '.join(map(str, poly))
-                    results_dict[cls_name].append(outline)
+    datasets = dataset.datasets if hasattr(dataset, 'datasets') else [dataset]
+    for data in datasets:
+        if len(data) == 0:
+            continue
+        # the results of each dataset are indexed from 0
+        filenames = [
+            os.path.basename(data.img_infos[idx]['filename'])
+            for idx in range(len(data))
+        ]
+        for label in range(len(results[0])):
+            cls_name = data.CLASSES[label]
+            if cls_name not in results_dict:
+                results_dict[cls_name] = []
+            rbboxes = [results[idx][label] for idx in range(len(data))]
+            names = np.repeat(filenames, [len(r) for r in rbboxes])
+            results_dict[cls_name].extend(
+                rbboxes2lines(names, np.concatenate(rbboxes)))
     return results_dict
 
 def HBBDet2Comp4(dataset, results):
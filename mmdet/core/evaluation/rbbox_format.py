@@ -0,0 +1,227 @@
+"""Formatting of rbbox results as the lines of the DOTA result files.
+
+The lines are ``name + ' ' + str(float(score)) + ' ' + ' '.join(map(str,
+poly))``. Calling ``str`` on every number dominates the time to write the
+results of a test set, so the float32 points are formatted on whole arrays
+here, with the same digits numpy gives: the shortest decimal that reads back
+to the same float32, found exactly with int64 arithmetic.
+"""
+import numpy as np
+
+# str() prints the float32 values in this range positionally, the others
+# fall back to str()
+_FAST_MIN, _FAST_MAX = 2e-4, 9e5
+# ints in this range are formatted on arrays
+_FAST_INT_MAX = 10**12
+
+_POW5 = 5**np.arange(13, dtype=np.int64)
+_POW10 = 10**np.arange(19, dtype=np.int64)
+# '0000' to '9999' as uint32 words
+_DIGITS4 = np.array([b'%04d' % i for i in range(10000)]).view(np.uint32)
+
+# rows of chunks are formatted at once
+_CHUNK_SIZE = 16384
+
+
+def _shortest_digits(x):
+    """Shortest decimal M / 10**K reading back to each float32 in x.
+
+    Args:
+        x (ndarray): float32 values in (_FAST_MIN, _FAST_MAX).
+
+    Returns:
+        tuple[ndarray]: int64 M and K.
+    """
+    mant, exp = np.frexp(x)
+    m = (mant * (1 << 24)).astype(np.int64)
+    xd = x.astype(np.float64)
+    e = np.floor(np.log10(xd)).astype(np.int64)
+    e -= 10.0**e > xd
+    e += 10.0**(e + 1) <= xd
+    # x * 10**k = num / 2**s has 9 digits before the point, k and s are
+    # positive in the fast range
+    k = 8 - e
+    s = 24 - exp.astype(np.int64) - k
+    num = m * _POW5[k]
+    # the decimals reading back to x are in (lo, hi) / 2**(s + 2), the
+    # float below a power of two is closer
+    margin = _POW5[k]
+    lo = 4 * num - np.where(m == 1 << 23, margin, 2 * margin)
+    hi = 4 * num + 2 * margin
+    low = (lo >> (s + 2)) + 1
+    high = (hi - 1) >> (s + 2)
+    # drop as many digits as the interval allows, low and high have 9
+    # digits so the float divisions are exact
+    low_f, high_f = low.astype(np.float64), high.astype(np.float64)
+    j = np.zeros(len(x), dtype=np.int64)
+    for i in range(1, 9):
+        p = float(10**i)
+        j += np.floor(high_f / p) * p >= low_f
+    # the closest multiple of 10**j in the interval, ties to even
+    scale = _POW10[j]
+    q = np.floor((num >> s).astype(np.float64) / scale).astype(np.int64)
+    r2 = 2 * (num - ((q * scale) << s))
+    half = scale << s
+    M = q + ((r2 > half) | ((r2 == half) & (q % 2 == 1)))
+    M = np.where(M * scale > high, M - 1, M)
+    M = np.where(M * scale < low, M + 1, M)
+    return M, k - j
+
+
+def _build_masks():
+    """Byte masks of the float rows by number of digits before and after the
+    point, see _float32_bytes."""
+    masks = np.zeros((7, 13, 24), dtype=np.uint8)
+    for num_int in range(1, 7):
+        for num_frac in range(1, 13):
+            keep = [1, 2, 3, 5, 6, 7][6 - num_int:] + [8]
+            keep += list(range(12, 12 + num_frac))
+            masks[num_int, num_frac, keep] = 0xff
+    return masks.reshape(-1, 24).view(np.uint64)
+
+
+_FLOAT_MASKS = _build_masks()
+
+
+def _fallback(out, values, inds):
+    """Write str() of values[inds] into the rows inds of out."""
+    strs = values[inds].astype(str).astype('S')
+    width = strs.dtype.itemsize
+    if width > out.shape[1]:
+        out = np.concatenate(
+            [out, np.zeros((len(out), width - out.shape[1]), np.uint8)],
+            axis=1)
+    out[inds] = 0
+    out[inds, :width] = strs.view(np.uint8).reshape(-1, width)
+    return out
+
+
+def _float32_bytes(values):
+    """str() of each float32 value as a row of bytes, padded with zeros."""
+    ax = np.abs(values)
+    fast = ((ax > _FAST_MIN) & (ax < _FAST_MAX)) | (ax == 0)
+    M, K = _shortest_digits(np.where(fast & (ax > 0), ax, 1))
+    M[ax == 0] = 0
+    # each row is the sign, the 6 digits before the point in two groups of
+    # 3, the point, and the 12 digits after it in groups of 4. Leading and
+    # trailing zeros are masked out
+    places = np.maximum(K, 0)
+    integer = (M // _POW10[places] * _POW10[places - K]).astype(np.float64)
+    frac = (M % _POW10[places] * _POW10[12 - places]).astype(np.float64)
+    words = np.empty((len(values), 6), dtype=np.uint32)
+    high = np.floor(integer / 1e3)
+    words[:, 0] = _DIGITS4[high.astype(np.intp)]
+    words[:, 1] = _DIGITS4[(integer - high * 1e3).astype(np.intp)]
+    words[:, 2] = np.frombuffer(b'.\0\0\0', dtype=np.uint32)[0]
+    high = np.floor(frac / 1e8)
+    words[:, 3] = _DIGITS4[high.astype(np.intp)]
+    frac -= high * 1e8
+    high = np.floor(frac / 1e4)
+    words[:, 4] = _DIGITS4[high.astype(np.intp)]
+    words[:, 5] = _DIGITS4[(frac - high * 1e4).astype(np.intp)]
+    num_int = 1 + (integer >= 10).astype(np.intp) + (integer >= 100) + (
+        integer >= 1e3) + (integer >= 1e4) + (integer >= 1e5)
+    rows = words.view(np.uint64)
+    rows &= _FLOAT_MASKS[num_int * 13 + np.maximum(K, 1)]
+    out = rows.view(np.uint8)
+    out[:, 0] = np.signbit(values) * ord('-')
+    slow = np.nonzero(~fast)[0]
+    if len(slow) > 0:
+        out = _fallback(out, values, slow)
+    return out
+
+
+def _int_bytes(values):
+    """str() of each int64 value as a row of bytes, padded with zeros."""
+    av = np.abs(values)
+    fast = av < _FAST_INT_MAX
+    av = np.where(fast, av, 0).astype(np.float64)
+    words = np.zeros((len(values), 4), dtype=np.uint32)
+    high = np.floor(av / 1e8)
+    words[:, 1] = _DIGITS4[high.astype(np.intp)]
+    av -= high * 1e8
+    high = np.floor(av / 1e4)
+    words[:, 2] = _DIGITS4[high.astype(np.intp)]
+    words[:, 3] = _DIGITS4[(av - high * 1e4).astype(np.intp)]
+    out = words.view(np.uint8)
+    # mask the leading zeros, the last digit is kept
+    digits = out[:, 4:]
+    nonzero = np.maximum.accumulate(digits != ord('0'), axis=1)
+    nonzero[:, -1] = True
+    digits *= nonzero
+    out[:, 3] = (values < 0) * ord('-')
+    slow = np.nonzero(~fast)[0]
+    if len(slow) > 0:
+        out = _fallback(out, values, slow)
+    return out
+
+
+def _text_bytes(strs):
+    """Encode strs as rows of bytes, padded with zeros."""
+    strs = np.asarray(strs)
+    if strs.dtype.kind == 'U':
+        try:
+            strs = strs.astype('S')
+        except UnicodeEncodeError:
+            strs = np.char.encode(strs, 'utf-8')
+    elif strs.dtype.kind != 'S':
+        strs = np.array([str(s).encode('utf-8') for s in strs], dtype='S')
+    return strs.view(np.uint8).reshape(len(strs), strs.dtype.itemsize)
+
+
+def _rbboxes2bytes(filenames, rbboxes, int_points):
+    n = len(rbboxes)
+    space = np.full((n, 1), ord(' '), dtype=np.uint8)
+    newline = np.full((n, 1), ord('\n'), dtype=np.uint8)
+    scores = np.array(
+        list(map(repr, rbboxes[:, -1].astype(np.float64).tolist())),
+        dtype='S')
+    points = rbboxes[:, :-1]
+    if int_points:
+        points = _int_bytes(points.astype(np.int64).ravel())
+    elif points.dtype == np.float32:
+        points = _float32_bytes(points.ravel())
+    else:
+        points = _text_bytes(points.ravel().astype(str))
+    points = points.reshape(n, 8, -1)
+    points = np.concatenate(
+        [np.broadcast_to(space[:, None], (n, 8, 1)), points], axis=2)
+    table = np.concatenate([
+        _text_bytes(filenames), space,
+        _text_bytes(scores),
+        points.reshape(n, -1), newline
+    ],
+                           axis=1)
+    return table[table != 0].tobytes()
+
+
+def rbboxes2text(filenames, rbboxes, int_points=False):
+    """Format rbboxes as the text of a Task1 result file.
+
+    Each line is ``filename + ' ' + str(float(score)) + ' ' +
+    ' '.join(map(str, poly))``, or the points are truncated to int first
+    with ``int_points``.
+
+    Args:
+        filenames (ndarray | list[str]): Image name of each rbbox.
+        rbboxes (ndarray): (n, 9) polygons and scores.
+        int_points (bool): Write the points as ints.
+
+    Returns:
+        str: The lines, each ended by a line break.
+    """
+    filenames = np.asarray(filenames)
+    chunks = [
+        _rbboxes2bytes(filenames[i:i + _CHUNK_SIZE],
+                       rbboxes[i:i + _CHUNK_SIZE], int_points)
+        for i in range(0, len(rbboxes), _CHUNK_SIZE)
+    ]
+    return b''.join(chunks).decode('utf-8')
+
+
+def rbboxes2lines(filenames, rbboxes):
+    """Same as :func:`rbboxes2text`, but returns the lines without line
+    breaks."""
+    if len(rbboxes) == 0:
+        return []
+    return rbboxes2text(filenames, rbboxes).split('\n')[:-1]
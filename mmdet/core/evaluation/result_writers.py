@@ -0,0 +1,312 @@
+import os
+import os.path as osp
+import re
+import shutil
+
+import mmcv
+import numpy as np
+
+from .rbbox_format import rbboxes2text
+
+
+class ResultWriter(object):
+    """Base class of the sinks the test loop hands its results to.
+
+    The results of a batch are passed to :meth:`write` as soon as the batch
+    is done, so the writers only hold what they have not flushed yet.
+    """
+
+    def write(self, img_inds, results):
+        """Write the results of some images.
+
+        Args:
+            img_inds (list[int]): Dataset indices of the images.
+            results (list[list[ndarray]]): Per class (n, 9) rbbox results of
+                each image.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class Task1ResultWriter(ResultWriter):
+    """Append rbbox results to the per-class Task1 files.
+
+    The lines are the ones written by ``OBBDet2Comp4``, so the files can be
+    merged with ``mergebypoly_multiprocess`` directly.
+
+    Args:
+        outdir (str): Output directory of the ``Task1_<class>.txt`` files.
+        classes (list[str]): Class names.
+        img_names (list[str]): Image name of each dataset index.
+        score_thr (float): Detections with a lower score are not written.
+        suffix (str): Appended to the file names, e.g. to let several
+            processes write their own part.
+    """
+
+    def __init__(self, outdir, classes, img_names, score_thr=0, suffix=''):
+        mmcv.mkdir_or_exist(outdir)
+        self.img_names = img_names
+        self.score_thr = score_thr
+        self.files = [
+            open(task1_filename(outdir, cls) + suffix, 'w') for cls in classes
+        ]
+
+    def write(self, img_inds, results):
+        if len(results) == 0:
+            return
+        for label, f_out in enumerate(self.files):
+            rbboxes = [result[label] for result in results]
+            names = np.repeat([self.img_names[i] for i in img_inds],
+                              [len(r) for r in rbboxes])
+            rbboxes = np.concatenate(rbboxes)
+            if self.score_thr > 0:
+                keep = rbboxes[:, -1] > self.score_thr
+                names, rbboxes = names[keep], rbboxes[keep]
+            f_out.write(rbboxes2text(names, rbboxes))
+
+    def close(self):
+        for f_out in self.files:
+            f_out.close()
+
+
+class DetectionStoreWriter(ResultWriter):
+    """Append rbbox results to a :class:`DetectionStore` directory.
+
+    The detections are buffered and dumped as a new shard every
+    ``shard_size`` detections, a crash keeps the shards dumped so far. Each
+    writer lists its shards in ``<prefix>.json`` and ``meta.json`` lists the
+    writers of the store, so the shards left by a previous run with other
+    writers (e.g. another number of ranks) are not loaded.
+
+    Args:
+        dirname (str): Directory of the store.
+        img_names (list[str]): Image name of each dataset index.
+        classes (list[str]): Class names.
+        score_thr (float): Detections with a lower score are not written.
+        shard_size (int): Number of detections of each shard.
+        prefix (str): Prefix of the shard names, e.g. to let several
+            processes write into the same store.
+        prefixes (list[str], optional): Prefixes of all the writers of the
+            store, ``[prefix]`` if None.
+    """
+
+    def __init__(self,
+                 dirname,
+                 img_names,
+                 classes,
+                 score_thr=0,
+                 shard_size=1000000,
+                 prefix='shard',
+                 prefixes=None):
+        if prefixes is None:
+            prefixes = [prefix]
+        if prefix not in prefixes:
+            raise ValueError('prefix {} is not in the prefixes {}'.format(
+                prefix, prefixes))
+        mmcv.mkdir_or_exist(dirname)
+        # shards left by a previous run under the same prefix are replaced
+        for name in os.listdir(dirname):
+            if re.match(re.escape(prefix) + r'_\d{5}$', name):
+                shutil.rmtree(osp.join(dirname, name))
+        self.dirname = dirname
+        self.score_thr = score_thr
+        self.shard_size = shard_size
+        self.prefix = prefix
+        self.shards = []
+        self.buffer = []
+        self.buffer_size = 0
+        self._dump_atomic(self.shards, prefix + '.json')
+        # several writers may share the store, they write the same meta
+        self._dump_atomic(
+            dict(
+                img_names=list(img_names),
+                classes=list(classes),
+                writers=list(prefixes)), 'meta.json')
+
+    def _dump_atomic(self, obj, name):
+        filename = osp.join(self.dirname, name)
+        tmp_filename = '{}.{}.tmp'.format(filename, self.prefix)
+        mmcv.dump(obj, tmp_filename, file_format='json')
+        os.replace(tmp_filename, filename)
+
+    def write(self, img_inds, results):
+        for img_ind, result in zip(img_inds, results):
+            self.write_columns(
+                *result2columns(img_ind, result, self.score_thr))
+
+    def write_columns(self, image_ids, class_ids, scores, polys):
+        """Append detections given as the columns of a store."""
+        self.buffer.append((image_ids, class_ids, scores, polys))
+        self.buffer_size += len(scores)
+        if self.buffer_size >= self.shard_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer_size == 0:
+            return
+        shard = '{}_{:05d}'.format(self.prefix, len(self.shards))
+        shard_dir = osp.join(self.dirname, shard)
+        mmcv.mkdir_or_exist(shard_dir)
+        for field, column in zip(DetectionStore.FIELDS, zip(*self.buffer)):
+            np.save(
+                osp.join(shard_dir, field + '.npy'), np.concatenate(column))
+        self.shards.append(shard)
+        self._dump_atomic(self.shards, self.prefix + '.json')
+        self.buffer = []
+        self.buffer_size = 0
+
+    def close(self):
+        self.flush()
+
+
+class DetectionStore(object):
+    """Columnar store of rbbox detections.
+
+    Each detection is a row of four contiguous columns, ``image_ids`` (n, )
+    int32, ``class_ids`` (n, ) int16, ``scores`` (n, ) float32 and ``polys``
+    (n, 8) float32. On disk a store is a directory holding ``meta.json``
+    (the image names, the class names and the writers), the lists of the
+    shards of each writer and the shard directories of one ``.npy`` file
+    per column, which are memory mapped when loaded.
+
+    Args:
+        image_ids, class_ids, scores, polys (ndarray): The columns.
+        img_names (list[str]): Image name of each image id.
+        classes (list[str]): Class names.
+    """
+
+    FIELDS = ('image_ids', 'class_ids', 'scores', 'polys')
+
+    def __init__(self, image_ids, class_ids, scores, polys, img_names,
+                 classes):
+        self.image_ids = image_ids
+        self.class_ids = class_ids
+        self.scores = scores
+        self.polys = polys
+        self.img_names = img_names
+        self.classes = classes
+
+    def __len__(self):
+        return len(self.scores)
+
+    @property
+    def dets(self):
+        """(n, 9) polygons and scores, as in the rbbox results."""
+        return np.concatenate([self.polys, self.scores[:, None]], axis=1)
+
+    @classmethod
+    def from_results(cls, results, img_names, classes, score_thr=0):
+        """Build a store from the per image, per class rbbox results."""
+        columns = [
+            result2columns(img_ind, result, score_thr)
+            for img_ind, result in enumerate(results)
+        ]
+        if len(columns) == 0:
+            columns = [result2columns(0, [], score_thr)]
+        return cls(*[np.concatenate(column) for column in zip(*columns)],
+                   img_names, classes)
+
+    @classmethod
+    def load(cls, dirname, mmap_mode='r'):
+        """Load a store written by :class:`DetectionStoreWriter` or
+        :meth:`dump`.
+
+        Only the shards listed by the writers of the store are loaded. With
+        a single shard the columns are memory mapped, several shards are
+        concatenated in memory.
+        """
+        meta = mmcv.load(osp.join(dirname, 'meta.json'))
+        shard_dirs = [
+            osp.join(dirname, shard) for prefix in meta['writers']
+            for shard in mmcv.load(osp.join(dirname, prefix + '.json'))
+        ]
+        columns = []
+        for field in cls.FIELDS:
+            column = [
+                np.load(osp.join(shard_dir, field + '.npy'),
+                        mmap_mode=mmap_mode) for shard_dir in shard_dirs
+            ]
+            if len(column) == 1:
+                columns.append(column[0])
+            elif len(column) > 1:
+                columns.append(np.concatenate(column))
+        if len(columns) == 0:
+            columns = result2columns(0, [])
+        return cls(*columns, meta['img_names'], meta['classes'])
+
+    def dump(self, dirname):
+        """Dump the store as a single shard."""
+        with DetectionStoreWriter(
+                dirname, self.img_names, self.classes,
+                shard_size=len(self) + 1) as writer:
+            writer.write_columns(self.image_ids, self.class_ids, self.scores,
+                                 self.polys)
+
+    def select(self, inds):
+        """Return a store of the detections selected by ``inds``, which is a
+        boolean mask or an index array."""
+        return DetectionStore(self.image_ids[inds], self.class_ids[inds],
+                              self.scores[inds], self.polys[inds],
+                              self.img_names, self.classes)
+
+    def to_results(self):
+        """Convert back to the per image, per class rbbox results.
+
+        Detections of the same image and class keep the order they were
+        written in, so this inverts :meth:`from_results` exactly.
+        """
+        num_imgs, num_classes = len(self.img_names), len(self.classes)
+        order = np.lexsort((self.class_ids, self.image_ids))
+        dets = self.select(order).dets
+        bins = self.image_ids[order].astype(np.int64) * num_classes + \
+            self.class_ids[order]
+        bounds = np.searchsorted(bins, np.arange(num_imgs * num_classes + 1))
+        return [[
+            dets[bounds[i * num_classes + j]:bounds[i * num_classes + j + 1]]
+            for j in range(num_classes)
+        ] for i in range(num_imgs)]
+
+
+def task1_filename(outdir, cls):
+    return osp.join(outdir, 'Task1_' + cls + '.txt')
+
+
+def result2columns(img_ind, result, score_thr=0):
+    """Convert the per class rbbox results of an image to the columns of a
+    :class:`DetectionStore`."""
+    num_dets = [len(rbboxes) for rbboxes in result]
+    if sum(num_dets) > 0:
+        rbboxes = np.concatenate(result).astype(np.float32)
+    else:
+        rbboxes = np.zeros((0, 9), dtype=np.float32)
+    image_ids = np.full(len(rbboxes), img_ind, dtype=np.int32)
+    class_ids = np.repeat(np.arange(len(result), dtype=np.int16), num_dets)
+    if score_thr > 0:
+        keep = rbboxes[:, 8] > score_thr
+        image_ids, class_ids, rbboxes = image_ids[keep], class_ids[
+            keep], rbboxes[keep]
+    return image_ids, class_ids, rbboxes[:, 8].copy(), rbboxes[:, :8].copy()
+
+
+def merge_parts(filenames, num_parts, remove=True):
+    """Concatenate the parts written by several processes.
+
+    ``filenames`` are the final paths, the parts are expected at
+    ``<filename>.part<i>`` for i in ``range(num_parts)``.
+    """
+    for filename in filenames:
+        with open(filename, 'wb') as f_out:
+            for i in range(num_parts):
+                part = filename + '.part{}'.format(i)
+                with open(part, 'rb') as f_in:
+                    shutil.copyfileobj(f_in, f_out)
+                if remove:
+                    os.remove(part)
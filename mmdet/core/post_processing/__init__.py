@@ -1,4 +1,6 @@
-from .bbox_nms import multiclass_nms, multiclass_poly_nms_8_points
+from .bbox_nms import (multiclass_nms, multiclass_poly_nms_8_points,
+                       multiclass_poly_nms_candidates,
+                       select_multiclass_candidates)
 from .merge_augs import (merge_aug_bboxes, merge_aug_masks,
                          merge_aug_proposals, merge_aug_scores)
 from .merge_aug_rotate import merge_aug_rotate_proposals, merge_aug_rotate_bboxes
@@ -6,6 +8,8 @@ from .merge_aug_rotate import merge_aug_rotate_proposals, merge_aug_rotate_bboxe
 __all__ = [
     'multiclass_nms', 'merge_aug_proposals', 'merge_aug_bboxes',
     'merge_aug_scores', 'merge_aug_masks',
-    'multiclass_poly_nms_8_points', 'merge_aug_rotate_proposals',
+    'multiclass_poly_nms_8_points',
+    'select_multiclass_candidates', 'multiclass_poly_nms_candidates',
+    'merge_aug_rotate_proposals',
     'merge_aug_rotate_bboxes'
 ]
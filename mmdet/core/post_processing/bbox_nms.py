@@ -86,48 +86,117 @@ def multiclass_poly_nms_8_points(multi_bboxes,
         max_num (int): if there are more than max_num bboxes after NMS,
             only top max_num will be kept.
 
+    Returns:
+        tuple: (bboxes, labels), tensors of shape (k, 9) and (k, 1). Labels
+            are 0-based.
+
+    Note:
+        With ``nms_cfg=dict(type='poly_nms', iou_thr=..., batched=True)`` all
+        classes are suppressed in a single ``poly_nms`` call, the polygons
+        of each class being shifted into a disjoint coordinate range.
+    """
+    bbox_inds, labels, scores = select_multiclass_candidates(
+        multi_scores, score_thr)
+    if multi_bboxes.shape[1] == 8:
+        bboxes = multi_bboxes[bbox_inds]
+    else:
+        bboxes = multi_bboxes.reshape(multi_bboxes.size(0), -1, 8)[
+            bbox_inds, labels + 1]
+    return multiclass_poly_nms_candidates(bboxes, scores, labels, nms_cfg,
+                                          max_num)
+
+
+def select_multiclass_candidates(multi_scores, score_thr, nms_pre=-1):
+    """Select the (box, class) pairs scoring above ``score_thr``.
+
+    Args:
+        multi_scores (Tensor): shape (n, #class), where the 0th column
+            contains scores of the background class, but this will be ignored.
+        score_thr (float): bbox threshold.
+        nms_pre (int): if positive, only the top ``nms_pre`` pairs of each
+            class are selected.
+
+    Returns:
+        tuple: (bbox_inds, labels, scores) of the pairs, ordered by class then
+            by box. Labels are 0-based.
+    """
+    scores = multi_scores[:, 1:]
+    # transposed so that the candidates are ordered by class, then by box
+    labels, bbox_inds = (scores > score_thr).t().nonzero().t()
+    scores = scores[bbox_inds, labels]
+    if nms_pre > 0 and bbox_inds.numel() > nms_pre:
+        # the candidates of a class are contiguous
+        keep = []
+        for label in labels.unique():
+            inds = (labels == label).nonzero().view(-1)
+            if inds.numel() > nms_pre:
+                _, topk_inds = scores[inds].topk(nms_pre)
+                inds = inds[topk_inds.sort()[0]]
+            keep.append(inds)
+        keep = torch.cat(keep)
+        bbox_inds, labels, scores = bbox_inds[keep], labels[keep], scores[keep]
+    return bbox_inds, labels, scores
+
+
+def multiclass_poly_nms_candidates(bboxes, scores, labels, nms_cfg,
+                                   max_num=-1):
+    """NMS of candidates given by :func:`select_multiclass_candidates`.
+
+    This is the second half of :func:`multiclass_poly_nms_8_points`, so
+    callers that decode only the selected candidates get the same results.
+
+    Args:
+        bboxes (Tensor): shape (k, 8), polygons of the candidates.
+        scores (Tensor): shape (k, ), their scores.
+        labels (Tensor): shape (k, ), their 0-based labels, the candidates
+            are ordered by class.
+        nms_cfg (dict): ``poly_nms`` config, see
+            :func:`multiclass_poly_nms_8_points`.
+        max_num (int): if there are more than max_num bboxes after NMS,
+            only top max_num will be kept.
+
     Returns:
         tuple: (bboxes, labels), tensors of shape (k, 9) and (k, 1). Labels
             are 0-based.
     """
-    num_classes = multi_scores.shape[1]
-    bboxes, labels = [], []
     nms_cfg_ = nms_cfg.copy()
     nms_type = nms_cfg_.pop('type', 'nms')
     if nms_type == 'poly_nms':
         nms_op = getattr(poly_nms_wrapper, nms_type)
     else:
         raise AssertionError("nms_type must be poly_nms")
-    for i in range(1, num_classes):
-        cls_inds = multi_scores[:, i] > score_thr
-        if not cls_inds.any():
-            continue
-        # get bboxes and scores of this class
-        if multi_bboxes.shape[1] == 8:
-            _bboxes = multi_bboxes[cls_inds, :] + 1
-        else:
-            _bboxes = multi_bboxes[cls_inds, i * 8:(i + 1) * 8] + 1
-
-        _scores = multi_scores[cls_inds, i]
-
-        cls_dets = torch.cat([_bboxes, _scores[:, None]], dim=1)
-        cls_dets, _ = nms_op(cls_dets, **nms_cfg_)
-        cls_labels = multi_bboxes.new_full((cls_dets.shape[0],),
-                                           i - 1,
-                                           dtype=torch.long)
-        bboxes.append(cls_dets)
-        labels.append(cls_labels)
-    if bboxes:
-        bboxes = torch.cat(bboxes)
-        labels = torch.cat(labels)
-        if bboxes.shape[0] > max_num:
-            _, inds = bboxes[:, -1].sort(descending=True)
-            inds = inds[:max_num]
+    if labels.numel() == 0:
+        bboxes = bboxes.new_zeros((0, 9))
+        labels = bboxes.new_zeros((0,), dtype=torch.long)
+        return bboxes, labels
+    if nms_cfg_.pop('batched', False):
+        dets = torch.cat([bboxes + 1, scores[:, None]], dim=1)
+        bboxes, keep = poly_nms_wrapper.batched_poly_nms(
+            dets, labels, **nms_cfg_)
+        labels = labels[keep]
+        if max_num > 0 and bboxes.shape[0] > max_num:
+            _, inds = bboxes[:, -1].topk(max_num)
             bboxes = bboxes[inds]
             labels = labels[inds]
-    else:
-        bboxes = multi_bboxes.new_zeros((0, 9))
-        labels = multi_bboxes.new_zeros((0,), dtype=torch.long)
+        return bboxes, labels
 
-    return bboxes, labels
+    dets, det_labels = [], []
+    for i in labels.unique():
+        cls_inds = labels == i
+        cls_dets = torch.cat(
+            [bboxes[cls_inds] + 1, scores[cls_inds, None]], dim=1)
+        cls_dets, _ = nms_op(cls_dets, **nms_cfg_)
+        cls_labels = bboxes.new_full((cls_dets.shape[0],),
+                                     int(i),
+                                     dtype=torch.long)
+        dets.append(cls_dets)
+        det_labels.append(cls_labels)
+    bboxes = torch.cat(dets)
+    labels = torch.cat(det_labels)
+    if bboxes.shape[0] > max_num:
+        _, inds = bboxes[:, -1].sort(descending=True)
+        inds = inds[:max_num]
+        bboxes = bboxes[inds]
+        labels = labels[inds]
 
+    return bboxes, labels
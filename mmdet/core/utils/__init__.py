@@ -1,7 +1,8 @@
+from .data_parallel import CPUDataParallel, scatter_cpu
 from .dist_utils import DistOptimizerHook, allreduce_grads
 from .misc import multi_apply, tensor2imgs, unmap
 
 __all__ = [
     'allreduce_grads', 'DistOptimizerHook', 'tensor2imgs', 'unmap',
-    'multi_apply'
+    'multi_apply', 'CPUDataParallel', 'scatter_cpu'
 ]
@@ -0,0 +1,37 @@
+import torch
+import torch.nn as nn
+from mmcv.parallel import DataContainer
+
+
+def scatter_cpu(inputs):
+    """Unwrap a collated batch for a model on the cpu.
+
+    This is what ``mmcv.parallel.scatter`` does for a single device, without
+    moving the tensors to a gpu.
+    """
+    if isinstance(inputs, DataContainer):
+        return inputs.data[0]
+    if isinstance(inputs, torch.Tensor):
+        return inputs
+    if isinstance(inputs, tuple):
+        return tuple(scatter_cpu(obj) for obj in inputs)
+    if isinstance(inputs, list):
+        return [scatter_cpu(obj) for obj in inputs]
+    if isinstance(inputs, dict):
+        return {key: scatter_cpu(obj) for key, obj in inputs.items()}
+    return inputs
+
+
+class CPUDataParallel(nn.Module):
+    """Counterpart of ``MMDataParallel`` for a model on the cpu.
+
+    The batches of the data loader are unwrapped by :func:`scatter_cpu` and
+    passed to the module, so the test loops run unchanged on cpu-only nodes.
+    """
+
+    def __init__(self, module):
+        super(CPUDataParallel, self).__init__()
+        self.module = module
+
+    def forward(self, *inputs, **kwargs):
+        return self.module(*scatter_cpu(inputs), **scatter_cpu(kwargs))
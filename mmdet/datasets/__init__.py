@@ -9,6 +9,7 @@ from .voc import VOCDataset
 from .wider_face import WIDERFaceDataset
 from .xml_style import XMLDataset
 from .dota import DOTADatasetCoco
+from .dota_tiles import DOTADatasetTiles, clip_polys, get_sliding_windows
 from .hrsc2016 import HRSC2016DatasetCoco, HRSC2016DatasetVOCH
 
 __all__ = [
@@ -16,6 +17,7 @@ __all__ = [
     'CityscapesDataset', 'GroupSampler', 'DistributedGroupSampler',
     'build_dataloader', 'ConcatDataset', 'RepeatDataset', 'WIDERFaceDataset',
     'DATASETS', 'build_dataset',
-    'DOTADatasetCoco', 'HRSC2016DatasetCoco',
+    'DOTADatasetCoco', 'DOTADatasetTiles', 'clip_polys',
+    'get_sliding_windows', 'HRSC2016DatasetCoco',
     'HRSC2016DatasetVOCH'
 ]
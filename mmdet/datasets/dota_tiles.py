@@ -0,0 +1,269 @@
+import os
+import os.path as osp
+
+import cv2
+import numpy as np
+from DOTA_devkit.poly_clip import clip_polys
+from shapely.geometry import Polygon
+
+from .custom import CustomDataset
+from .dota import DOTADatasetCoco
+from .registry import DATASETS
+
+
+def get_sliding_windows(width, height, subsize=1024, gap=200):
+    """Get the top-left corners of the patches that cover an image.
+
+    The patches are laid out as in ``DOTA_devkit/ImgSplit``, so inference on
+    them gives the same detections as splitting the image into files first.
+
+    Args:
+        width (int): Image width.
+        height (int): Image height.
+        subsize (int): Side of the square patches.
+        gap (int): Overlap between neighbouring patches.
+
+    Returns:
+        list[tuple]: (left, up) of every patch.
+    """
+    slide = subsize - gap
+    windows = []
+    left = 0
+    while left < width:
+        if left + subsize >= width:
+            left = max(width - subsize, 0)
+        up = 0
+        while up < height:
+            if up + subsize >= height:
+                up = max(height - subsize, 0)
+            windows.append((left, up))
+            if up + subsize >= height:
+                break
+            up += slide
+        if left + subsize >= width:
+            break
+        left += slide
+    return windows
+
+
+@DATASETS.register_module
+class DOTADatasetTiles(CustomDataset):
+    """DOTA patches cut from the full scenes when they are loaded.
+
+    The patches of ``DOTA_devkit/ImgSplit`` are not written to disk: the
+    dataset lists the windows of the scenes at each rate and
+    ``LoadTileFromScene`` crops them from the decoded scenes, which are
+    cached once as raw ``.npy`` arrays and memory-mapped, so only the pixels
+    of a patch are read. The labels of the patches are clipped from the
+    ones of the scenes with the rules of ImgSplit, so the patches, their
+    names and their annotations are the ones of the split and of
+    ``DOTA2COCOTrain``, and gap or subsize are changed without splitting
+    the data again.
+
+    The pipelines start with ``LoadTileFromScene`` instead of
+    ``LoadImageFromFile``, e.g.::
+
+        train=dict(
+            type='DOTADatasetTiles',
+            ann_file=data_root + 'trainval/labelTxt/',
+            img_prefix=data_root + 'trainval/images/',
+            subsize=1024,
+            gap=200,
+            rates=(1, 0.5),
+            pipeline=[dict(type='LoadTileFromScene'), ...])
+
+    Args:
+        ann_file (str): Directory of the DOTA label files of the scenes,
+            not read in test mode.
+        img_prefix (str): Directory of the scenes.
+        cache_dir (str): Directory of the decoded scenes,
+            ``<img_prefix>_raw`` if None. The cache of a scene is made again
+            when the scene is newer.
+        subsize (int): Side of the patches.
+        gap (int): Overlap between neighbouring patches.
+        rates (Sequence[float]): The scenes are resized by each rate before
+            being cut.
+        thresh (float): Objects of which less is kept in a patch are marked
+            as difficult '2'.
+        choosebestpoint (bool): See :func:`clip_polys`.
+        padding (bool): Pad the patches at the borders to subsize.
+        difficult (str): Objects of this difficulty are not loaded, as in
+            ``DOTA2COCOTrain``, '-1' to load all of them.
+        ext (str): Extension of the scenes.
+    """
+
+    CLASSES = DOTADatasetCoco.CLASSES
+
+    def __init__(self,
+                 ann_file,
+                 pipeline,
+                 cache_dir=None,
+                 subsize=1024,
+                 gap=200,
+                 rates=(1, ),
+                 thresh=0.7,
+                 choosebestpoint=True,
+                 padding=True,
+                 difficult='2',
+                 ext='.png',
+                 **kwargs):
+        data_root = kwargs.get('data_root', None)
+        if cache_dir is None:
+            cache_dir = osp.normpath(kwargs.get('img_prefix', '')) + '_raw'
+        if not (data_root is None or osp.isabs(cache_dir)):
+            cache_dir = osp.join(data_root, cache_dir)
+        self.cache_dir = cache_dir
+        self.subsize = subsize
+        self.gap = gap
+        self.rates = rates
+        self.thresh = thresh
+        self.choosebestpoint = choosebestpoint
+        self.padding = padding
+        self.difficult = difficult
+        self.ext = ext
+        # the memory-mapped scenes of each process
+        self._scenes = {}
+        super(DOTADatasetTiles, self).__init__(ann_file, pipeline, **kwargs)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_scenes'] = {}
+        return state
+
+    def load_annotations(self, ann_file):
+        names = sorted(
+            osp.splitext(filename)[0]
+            for filename in os.listdir(self.img_prefix)
+            if osp.splitext(filename)[1] == self.ext)
+        img_infos = []
+        for name in names:
+            objects = None
+            if not self.test_mode:
+                objects = self._load_objects(
+                    osp.join(ann_file, name + '.txt'))
+            for rate in self.rates:
+                scene = self.load_scene(name, rate)
+                if scene is None:
+                    continue
+                height, width = scene.shape[:2]
+                if objects is not None:
+                    polys = objects[0] * rate
+                    shapes = [Polygon(poly.reshape(4, 2)) for poly in polys]
+                for left, up in get_sliding_windows(width, height,
+                                                    self.subsize, self.gap):
+                    tile_name = '{}__{}__{}___{}'.format(name, rate, left, up)
+                    if self.padding:
+                        tile_width = tile_height = self.subsize
+                    else:
+                        tile_width = min(width - left, self.subsize)
+                        tile_height = min(height - up, self.subsize)
+                    img_info = dict(
+                        filename=tile_name + self.ext,
+                        width=tile_width,
+                        height=tile_height,
+                        scene=name,
+                        rate=rate,
+                        left=left,
+                        up=up)
+                    if objects is not None:
+                        window = (left, up,
+                                  min(left + self.subsize, width - 1),
+                                  min(up + self.subsize, height - 1))
+                        img_info['ann'] = self._tile_ann(
+                            img_info, objects, polys, shapes, window)
+                    img_infos.append(img_info)
+        return img_infos
+
+    def _load_objects(self, filename):
+        """Parse a label file as ``dota_utils.parse_dota_poly2``.
+
+        Returns:
+            tuple: (n, 8) polygons, their class names and difficulties.
+        """
+        polys, names, difficults = [], [], []
+        with open(filename) as f:
+            for line in f:
+                splitlines = line.strip().split(' ')
+                if len(splitlines) < 9:
+                    continue
+                polys.append([float(x) for x in splitlines[:8]])
+                names.append(splitlines[8])
+                difficults.append(
+                    splitlines[9] if len(splitlines) >= 10 else '0')
+        return (np.array(polys, dtype=np.float64).reshape(-1, 8), names,
+                difficults)
+
+    def _tile_ann(self, img_info, objects, polys, shapes, window):
+        """Clip the objects of a scene to a patch, as they would be loaded
+        from its label file by ``DOTA2COCOTrain`` and ``DOTADatasetCoco``.
+        """
+        _, names, difficults = objects
+        inds, tile_polys, cut = clip_polys(polys, window, self.subsize,
+                                           self.thresh, self.choosebestpoint,
+                                           shapes)
+        keep = [
+            j for j, i in enumerate(inds)
+            if names[i] in self.CLASSES and
+            ('2' if cut[j] else difficults[i]) != self.difficult
+        ]
+        inds, tile_polys = inds[keep], tile_polys[keep]
+        xs, ys = tile_polys[:, 0::2], tile_polys[:, 1::2]
+        areas = np.abs((xs * np.roll(ys, -1, axis=1) -
+                        np.roll(xs, -1, axis=1) * ys).sum(axis=1)) / 2
+        xmin, ymin = xs.min(axis=1), ys.min(axis=1)
+        xmax, ymax = xs.max(axis=1), ys.max(axis=1)
+        valid = (areas > 0) & (xmax - xmin >= 1) & (ymax - ymin >= 1)
+        gt_bboxes = np.stack([xmin, ymin, xmax, ymax], axis=1)[valid] - 1
+        gt_labels = [self.CLASSES.index(names[i]) + 1 for i in inds[valid]]
+        return dict(
+            bboxes=gt_bboxes.astype(np.float32),
+            labels=np.array(gt_labels, dtype=np.int64),
+            bboxes_ignore=np.zeros((0, 4), dtype=np.float32),
+            masks=[[list(poly - 1)] for poly in tile_polys[valid]],
+            seg_map=img_info['filename'],
+            # the patch is in the annotations of DOTA2COCOTrain
+            num_objects=len(inds))
+
+    def load_scene(self, name, rate):
+        """Get a scene resized by rate, as a read-only memory-mapped array.
+
+        The scene is decoded, resized and cached as ImgSplit does the first
+        time, None is returned if it cannot be decoded.
+        """
+        cachefile = osp.join(self.cache_dir,
+                             '{}__{}__.npy'.format(name, rate))
+        imgfile = osp.join(self.img_prefix, name + self.ext)
+        if not (osp.isfile(cachefile)
+                and osp.getmtime(cachefile) >= osp.getmtime(imgfile)):
+            img = cv2.imread(imgfile)
+            if img is None:
+                return None
+            if rate != 1:
+                img = cv2.resize(
+                    img, None, fx=rate, fy=rate, interpolation=cv2.INTER_CUBIC)
+            if not osp.isdir(self.cache_dir):
+                os.makedirs(self.cache_dir, exist_ok=True)
+            # the processes building the same cache do not see partial files
+            tmpfile = '{}.{}.tmp'.format(cachefile, os.getpid())
+            with open(tmpfile, 'wb') as f:
+                np.save(f, img)
+            os.replace(tmpfile, cachefile)
+        return np.load(cachefile, mmap_mode='r')
+
+    def _filter_imgs(self, min_size=32):
+        """Filter patches too small or without ground truths."""
+        valid_inds = []
+        for i, img_info in enumerate(self.img_infos):
+            if img_info['ann']['num_objects'] == 0:
+                continue
+            if min(img_info['width'], img_info['height']) >= min_size:
+                valid_inds.append(i)
+        return valid_inds
+
+    def pre_pipeline(self, results):
+        super(DOTADatasetTiles, self).pre_pipeline(results)
+        img_info = results['img_info']
+        key = (img_info['scene'], img_info['rate'])
+        if key not in self._scenes:
+            self._scenes[key] = self.load_scene(*key)
+        results['scene'] = self._scenes[key]
@@ -1,7 +1,8 @@
 from .compose import Compose
 from .formating import (Collect, ImageToTensor, ToDataContainer, ToTensor,
                         Transpose, to_tensor)
-from .loading import LoadAnnotations, LoadImageFromFile, LoadProposals
+from .loading import (LoadAnnotations, LoadImageFromFile, LoadProposals,
+                      LoadTileFromScene)
 from .test_aug import MultiScaleFlipAug
 from .transforms import (Albu, Expand, MinIoURandomCrop, Normalize, Pad,
                          PhotoMetricDistortion, RandomCrop, RandomFlip, Resize,
@@ -11,8 +12,8 @@ from .rotate_aug import RotateAugmentation
 __all__ = [
     'Compose', 'to_tensor', 'ToTensor', 'ImageToTensor', 'ToDataContainer',
     'Transpose', 'Collect', 'LoadAnnotations', 'LoadImageFromFile',
-    'LoadProposals', 'MultiScaleFlipAug', 'Resize', 'RandomFlip', 'Pad',
-    'RandomCrop', 'Normalize', 'SegResizeFlipPadRescale', 'MinIoURandomCrop',
-    'Expand', 'PhotoMetricDistortion', 'Albu', 'RotateAugmentation', 'MixUp',
-    'Filter'
+    'LoadProposals', 'LoadTileFromScene', 'MultiScaleFlipAug', 'Resize',
+    'RandomFlip', 'Pad', 'RandomCrop', 'Normalize', 'SegResizeFlipPadRescale',
+    'MinIoURandomCrop', 'Expand', 'PhotoMetricDistortion', 'Albu',
+    'RotateAugmentation', 'MixUp', 'Filter'
 ]
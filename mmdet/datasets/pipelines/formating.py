@@ -100,13 +100,15 @@ class DefaultFormatBundle(object):
     """Default formatting bundle.
 
     It simplifies the pipeline of formatting common fields, including "img",
-    "proposals", "gt_bboxes", "gt_labels", "gt_masks" and "gt_semantic_seg".
+    "proposals", "gt_bboxes", "gt_rbboxes", "gt_labels", "gt_masks" and
+    "gt_semantic_seg".
     These fields are formatted as follows.
 
     - img: (1)transpose, (2)to tensor, (3)to DataContainer (stack=True)
     - proposals: (1)to tensor, (2)to DataContainer
     - gt_bboxes: (1)to tensor, (2)to DataContainer
     - gt_bboxes_ignore: (1)to tensor, (2)to DataContainer
+    - gt_rbboxes: (1)to tensor, (2)to DataContainer
     - gt_labels: (1)to tensor, (2)to DataContainer
     - gt_masks: (1)to tensor, (2)to DataContainer (cpu_only=True)
     - gt_semantic_seg: (1)unsqueeze dim-0 (2)to tensor,
@@ -117,7 +119,10 @@ class DefaultFormatBundle(object):
         if 'img' in results:
             img = np.ascontiguousarray(results['img'].transpose(2, 0, 1))
             results['img'] = DC(to_tensor(img), stack=True)
-        for key in ['proposals', 'gt_bboxes', 'gt_bboxes_ignore', 'gt_labels']:
+        for key in [
+                'proposals', 'gt_bboxes', 'gt_bboxes_ignore', 'gt_rbboxes',
+                'gt_labels'
+        ]:
             if key not in results:
                 continue
             results[key] = DC(to_tensor(results[key]))
@@ -139,7 +144,7 @@ class Collect(object):
 
     This is usually the last stage of the data loader pipeline. Typically keys
     is set to some subset of "img", "proposals", "gt_bboxes",
-    "gt_bboxes_ignore", "gt_labels", and/or "gt_masks".
+    "gt_bboxes_ignore", "gt_rbboxes", "gt_labels", and/or "gt_masks".
 
     The "img_meta" item is always populated.  The contents of the "img_meta"
     dictionary depends on "meta_keys". By default this includes:
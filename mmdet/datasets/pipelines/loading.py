@@ -1,6 +1,7 @@
 import os.path as osp
 import warnings
 
+import cv2
 import mmcv
 import numpy as np
 import pycocotools.mask as maskUtils
@@ -34,6 +35,40 @@ class LoadImageFromFile(object):
             self.to_float32)
 
 
+@PIPELINES.register_module
+class LoadTileFromScene(object):
+    """Crop the patch of ``img_info`` from the scene given by the dataset.
+
+    The window starts at ``left`` and ``up`` and is ``width`` by ``height``,
+    the parts out of the scene are padded with zeros as in ImgSplit.
+    """
+
+    def __init__(self, to_float32=False):
+        self.to_float32 = to_float32
+
+    def __call__(self, results):
+        img_info = results['img_info']
+        if results['img_prefix'] is not None:
+            filename = osp.join(results['img_prefix'], img_info['filename'])
+        else:
+            filename = img_info['filename']
+        left, up = img_info['left'], img_info['up']
+        width, height = img_info['width'], img_info['height']
+        patch = results.pop('scene')[up:up + height, left:left + width]
+        img = np.zeros((height, width) + patch.shape[2:],
+                       dtype=np.float32 if self.to_float32 else patch.dtype)
+        img[:patch.shape[0], :patch.shape[1]] = patch
+        results['filename'] = filename
+        results['img'] = img
+        results['img_shape'] = img.shape
+        results['ori_shape'] = img.shape
+        return results
+
+    def __repr__(self):
+        return self.__class__.__name__ + '(to_float32={})'.format(
+            self.to_float32)
+
+
 @PIPELINES.register_module
 class LoadAnnotations(object):
 
@@ -71,9 +106,6 @@ class LoadAnnotations(object):
         if gt_bboxes_ignore is not None:
             results['gt_bboxes_ignore'] = gt_bboxes_ignore
             results['bbox_fields'].append('gt_bboxes_ignore')
-        # if self.with_poly_bbox:
-        #     results['gt_poly_bboxes'] = results['ann_info']['masks']
-        #     results['bbox_fields'].append('gt_poly_bboxes')
         results['bbox_fields'].append('gt_bboxes')
         return results
 
@@ -105,6 +137,22 @@ class LoadAnnotations(object):
         results['mask_fields'].append('gt_masks')
         return results
 
+    def _load_poly_bboxes(self, results):
+        """Load the quadrilateral annotations as (n, 8) rotated rectangles.
+
+        Each polygon is replaced by its minimum area rectangle, the same
+        result as rasterizing it to a mask and fitting a rectangle to the
+        mask contour, but without allocating any mask.
+        """
+        gt_rbboxes = []
+        for mask_ann in results['ann_info']['masks']:
+            points = np.array(mask_ann[0], dtype=np.float32).reshape(-1, 2)
+            gt_rbboxes.append(cv2.boxPoints(cv2.minAreaRect(points)))
+        results['gt_rbboxes'] = np.array(
+            gt_rbboxes, dtype=np.float32).reshape(-1, 8)
+        results['rbbox_fields'].append('gt_rbboxes')
+        return results
+
     def _load_semantic_seg(self, results):
         results['gt_semantic_seg'] = mmcv.imread(
             osp.join(results['seg_prefix'], results['ann_info']['seg_map']),
@@ -120,6 +168,8 @@ class LoadAnnotations(object):
             results = self._load_labels(results)
         if self.with_mask:
             results = self._load_masks(results)
+        if self.with_poly_bbox:
+            results = self._load_poly_bboxes(results)
         if self.with_seg:
             results = self._load_semantic_seg(results)
         return results
@@ -127,8 +177,9 @@ class LoadAnnotations(object):
     def __repr__(self):
         repr_str = self.__class__.__name__
         repr_str += ('(with_bbox={}, with_label={}, with_mask={},'
-                     ' with_seg={})').format(self.with_bbox, self.with_label,
-                                             self.with_mask, self.with_seg)
+                     ' with_seg={}, with_poly_bbox={})').format(
+                         self.with_bbox, self.with_label, self.with_mask,
+                         self.with_seg, self.with_poly_bbox)
         return repr_str
 
 
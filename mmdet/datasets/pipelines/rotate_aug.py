@@ -80,27 +80,27 @@ def poly2mask(polys, h, w):
     # TODO: check if len(masks) == 0
     return masks
 
-def rotate_poly_single(h, w, new_h, new_w, rotate_matrix_T, poly):
-    poly[::2] = poly[::2] - (w - 1) * 0.5
-    poly[1::2] = poly[1::2] - (h - 1) * 0.5
-    coords = poly.reshape(4, 2)
-    new_coords = np.matmul(coords,  rotate_matrix_T) + np.array([(new_w - 1) * 0.5, (new_h - 1) * 0.5])
-    rotated_polys = new_coords.reshape(-1, ).tolist()
-
-    return rotated_polys
-
-# TODO: refactor the single - map to whole numpy computation
 def rotate_poly(h, w, new_h, new_w, rotate_matrix_T, polys):
-    rotate_poly_fn = partial(rotate_poly_single, h, w, new_h, new_w, rotate_matrix_T)
-    rotated_polys = list(map(rotate_poly_fn, polys))
+    """
+    rotate all the polygons of an image at once
+    :param polys: (x1, y1, ..., x4, y4) (n, 8)
+    :return: rotated polys (n, 8)
+    """
+    coords = np.asarray(polys, dtype=np.float64).reshape(-1, 4, 2)
+    coords = coords - np.array([(w - 1) * 0.5, (h - 1) * 0.5])
+    new_coords = np.matmul(coords, rotate_matrix_T) + np.array(
+        [(new_w - 1) * 0.5, (new_h - 1) * 0.5])
 
-    return rotated_polys
+    return new_coords.reshape(-1, 8)
 
 @PIPELINES.register_module
 class RotateAugmentation(object):
     """
     1. rotate image and polygons, transfer polygons to masks
     2. polygon 2 mask
+
+    if the results contain gt_rbboxes (LoadAnnotations with_poly_bbox=True),
+    the (n, 8) polygons are rotated directly and no mask is used
     """
     def __init__(self,
                  # center=None,
@@ -181,9 +181,14 @@ class RotateAugmentation(object):
         results['img_shape'] = rotated_img.shape
         results['rotate_shape'] = rotated_img.shape
 
-
+        with_poly_bbox = 'gt_rbboxes' in results
+        # rotate polygons
+        if with_poly_bbox:
+            rotated_polys_np = rotate_poly(img.shape[0], img.shape[1], h, w,
+                                           matrix_T, results['gt_rbboxes'])
+            rotated_boxes = poly2bbox(rotated_polys_np).astype(np.float32)
         # rotate mask
-        if results['gt_masks'] is not None and len(results['gt_masks']) > 0:
+        elif results['gt_masks'] is not None and len(results['gt_masks']) > 0:
             masks = results['gt_masks']
             polys = mask2poly(masks)
             rotated_polys = rotate_poly(img.shape[0], img.shape[1], h, w, matrix_T, np.array(polys))
@@ -227,6 +232,15 @@ class RotateAugmentation(object):
         # keep_inds = [(keep_inds[i] and rotated_masks[i].any()) for i in range(len(rotated_masks))]
         #########################
         # print(keep_inds)
+        if with_poly_bbox:
+            results['gt_rbboxes'] = rotated_polys_np[keep_inds].astype(
+                np.float32)
+            results['gt_bboxes'] = rotated_boxes[keep_inds]
+            results['gt_labels'] = gt_labels[keep_inds]
+            if len(results['gt_rbboxes']) == 0:
+                return None
+            return results
+
         if len(keep_inds) > 0:
             rotated_boxes = np.array(rotated_boxes)[keep_inds]
             rotated_masks = np.array(rotated_masks)[keep_inds]
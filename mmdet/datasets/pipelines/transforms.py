@@ -15,7 +15,7 @@ import random
 
 @PIPELINES.register_module
 class Resize(object):
-    """Resize images & bbox & mask.
+    """Resize images & bbox & rbbox & mask.
 
     This transform resizes the input image to some scale. Bboxes and masks are
     then resized with the same scale factor. If the input dict contains the key
@@ -154,6 +154,16 @@ class Resize(object):
             else:
                 results[key] = bboxes
 
+    def _resize_rbboxes(self, results):
+        scale_factor = results['scale_factor']
+        if isinstance(scale_factor, np.ndarray):
+            scale_factor = np.tile(scale_factor[:2], 4)
+        for key in results.get('rbbox_fields', []):
+            rbboxes = results[key] * scale_factor
+            # drop the same objects as the small gt_bboxes filter
+            if key == 'gt_rbboxes' and 'inds' in results:
+                rbboxes = rbboxes[results['inds']]
+            results[key] = rbboxes
 
     def _resize_masks(self, results):
         for key in results.get('mask_fields', []):
@@ -181,6 +191,7 @@ class Resize(object):
             self._random_scale(results)
         self._resize_img(results)
         self._resize_bboxes(results)
+        self._resize_rbboxes(results)
         self._resize_masks(results)
         if 'gt_bboxes' in results and len(results['gt_bboxes']) == 0:
             return None
@@ -198,7 +209,7 @@ class Resize(object):
 
 @PIPELINES.register_module
 class RandomFlip(object):
-    """Flip the image & bbox & mask.
+    """Flip the image & bbox & rbbox & mask.
 
     If the input dict contains the key "flip", then the flag will be used,
     otherwise it will be randomly decided by a ratio specified in the init
@@ -237,6 +248,26 @@ class RandomFlip(object):
                 'Invalid flipping direction "{}"'.format(direction))
         return flipped
 
+    def rbbox_flip(self, rbboxes, img_shape, direction):
+        """Flip rotated bboxes.
+
+        The vertices are reversed after flipping, so that the polygons keep
+        their orientation.
+
+        Args:
+            rbboxes(ndarray): shape (n, 8)
+            img_shape(tuple): (height, width)
+        """
+        flipped = rbboxes.copy()
+        if direction == 'horizontal':
+            flipped[:, 0::2] = img_shape[1] - rbboxes[:, 0::2] - 1
+        elif direction == 'vertical':
+            flipped[:, 1::2] = img_shape[0] - rbboxes[:, 1::2] - 1
+        else:
+            raise ValueError(
+                'Invalid flipping direction "{}"'.format(direction))
+        return flipped.reshape(-1, 4, 2)[:, ::-1].reshape(-1, 8)
+
     def __call__(self, results):
         if 'flip' not in results:
             flip = True if np.random.rand() < self.flip_ratio else False
@@ -252,6 +283,11 @@ class RandomFlip(object):
                 results[key] = self.bbox_flip(results[key],
                                               results['img_shape'],
                                               results['flip_direction'])
+            # flip rbboxes
+            for key in results.get('rbbox_fields', []):
+                results[key] = self.rbbox_flip(results[key],
+                                               results['img_shape'],
+                                               results['flip_direction'])
             # flip masks
             for key in results.get('mask_fields', []):
                 results[key] = [
@@ -10,7 +10,7 @@ from mmdet.core import (AnchorGenerator, orient_anchor_target, force_fp32,
 from ..builder import build_loss
 from ..registry import HEADS
 import torch.nn.functional as F
-from mmdet.ops import poly_nms
+from mmdet.ops import batched_poly_nms
 
 @HEADS.register_module
 class AO_RPNHead(nn.Module):
@@ -275,7 +275,7 @@ class AO_RPNHead(nn.Module):
                    cfg,
                    rescale=False):
         # 根据cls_scores + bbox_preds + anchors（所有，不筛选，无正负样本的区分）得到proposals，并完成NMS
-        # 其中，get_bboxes_single中完成了proposals生成+NMS
+        # 其中，get_bboxes_batch中完成了proposals生成+NMS
         """
         Transform network output for a batch into labeled boxes.
 
@@ -328,101 +328,141 @@ class AO_RPNHead(nn.Module):
         # m1v1_anchors：生成所有的anchors，对应不同层的特征图+locations+scales+ratios
         # 这里“不同层的特征图”主要是在尺寸，并没有用到特征图具体的值，只是根据不同特征图的尺寸生成了不同anchor
         # anchor的生成不会用的特征图的值，只会用到特征图的尺寸
-        result_list = []
-        # 生成每张图的proposals
-        for img_id in range(len(img_metas)):
-            cls_score_list = [
-                cls_scores[i][img_id].detach() for i in range(num_levels)
-            ]
-            bbox_pred_list = [
-                bbox_preds[i][img_id].detach() for i in range(num_levels)
-            ]
-            obb_pred_list = [
-                obb_preds[i][img_id].detach() for i in range(num_levels)
-            ]
-            img_shape = img_metas[img_id]['img_shape']
-            scale_factor = img_metas[img_id]['scale_factor']
-            # cls_score_list:这张图片所有特征图的cls_score
-            # bbox_pred_list:这张图片所有特征图的bbox_pred
-            # m1v1_anchor:所有特征图的所有anchors，仅与特征图尺寸有关，与具体的输入图片无关，因此每张输入图片使用的m1v1_anchor是一样的
-            # todo:r_nms，bbox2delta以及delta2bbox等需要修改，适应带方向
-            proposals = self.get_bboxes_single(cls_score_list, bbox_pred_list,
-                                               obb_pred_list,
-                                               mlvl_anchors, img_shape,
-                                               scale_factor, cfg, rescale)
-            # get_bboxes_single:由anchor和bbox_pred得到proposals，并实现NMS
-            result_list.append(proposals)
-        return result_list
-        # 得到经过NMS的proposals
-
-    def get_bboxes_single(self,
-                          cls_score_list,
-                          bbox_pred_list,
-                          obb_pred_list,
-                          mlvl_anchors,
-                          img_shape,
-                          scale_factor,
-                          cfg,
-                          rescale=False):
+        return self.get_bboxes_batch(
+            [cls_score.detach() for cls_score in cls_scores],
+            [bbox_pred.detach() for bbox_pred in bbox_preds],
+            [obb_pred.detach() for obb_pred in obb_preds], mlvl_anchors,
+            img_metas, cfg)
+
+    def get_bboxes_batch(self, cls_scores, bbox_preds, obb_preds,
+                         mlvl_anchors, img_metas, cfg):
+        """Transform the outputs of all the levels and images of a batch into
+        rotated proposals at once.
+
+        The top ``cfg.nms_pre`` anchors of every level are decoded together,
+        and a single poly NMS suppresses the proposals within each (image,
+        level) group, as a separate NMS per level and image would.
+
+        Returns:
+            list[Tensor]: (n, 9) proposals of each image, sorted by score.
         """
-        Transform outputs for a single batch item into labeled boxes.
+        num_imgs = len(img_metas)
+        num_levels = len(cls_scores)
+        proposals_rotate, img_ids, level_ids = self.get_candidates_batch(
+            cls_scores, bbox_preds, obb_preds, mlvl_anchors, img_metas, cfg)
+
+        # one NMS for all the levels of all the images
+        proposals_rotate, keep = batched_poly_nms(
+            proposals_rotate, img_ids * num_levels + level_ids, cfg.nms_thr)
+        img_ids, level_ids = img_ids[keep], level_ids[keep]
+        keep = _topk_per_group(proposals_rotate[:, 8],
+                               img_ids * num_levels + level_ids,
+                               num_imgs * num_levels, cfg.nms_post)
+        proposals_rotate, img_ids = proposals_rotate[keep], img_ids[keep]
+        if cfg.nms_across_levels:
+            proposals_rotate, keep = batched_poly_nms(proposals_rotate,
+                                                      img_ids, cfg.nms_thr)
+            img_ids = img_ids[keep]
+        keep = _topk_per_group(proposals_rotate[:, 8], img_ids, num_imgs,
+                               cfg.max_num)
+        proposals_rotate, img_ids = proposals_rotate[keep], img_ids[keep]
+        num_proposals = torch.bincount(img_ids, minlength=num_imgs)
+        return list(proposals_rotate.split(num_proposals.tolist()))
+
+    def get_candidates_batch(self, cls_scores, bbox_preds, obb_preds,
+                             mlvl_anchors, img_metas, cfg):
+        """Decode the top ``cfg.nms_pre`` anchors of every level and image,
+        the proposals before the NMS of :meth:`get_bboxes_batch`.
+
+        Returns:
+            tuple[Tensor]: (n, 9) proposals with their scores, the image and
+                the level of each, ordered by image then by level.
         """
-        mlvl_proposals_rotate = []
-        # m1v1_proposals = []
-        for idx in range(len(cls_score_list)):
-            cls_score = cls_score_list[idx]
-            bbox_pred = bbox_pred_list[idx]
-            obb_pred = obb_pred_list[idx]
+        num_imgs = len(img_metas)
+        num_levels = len(cls_scores)
+        mlvl_scores, mlvl_bbox_preds, mlvl_obb_preds = [], [], []
+        mlvl_level_anchors, mlvl_level_ids = [], []
+        for level in range(num_levels):
+            cls_score = cls_scores[level]
+            bbox_pred = bbox_preds[level]
+            obb_pred = obb_preds[level]
             assert cls_score.size()[-2:] == bbox_pred.size()[-2:]
-            anchors = mlvl_anchors[idx]
-            cls_score = cls_score.permute(1, 2, 0)
+            anchors = mlvl_anchors[level]
+            cls_score = cls_score.permute(0, 2, 3, 1)
             if self.use_sigmoid_cls:
-                cls_score = cls_score.reshape(-1)
-                scores = cls_score.sigmoid()
+                scores = cls_score.reshape(num_imgs, -1).sigmoid()
             else:
-                cls_score = cls_score.reshape(-1, 2)
-                scores = cls_score.softmax(dim=1)[:, 1]
-            bbox_pred = bbox_pred.permute(1, 2, 0).reshape(-1, 4)
-            obb_pred = obb_pred.permute(1, 2, 0).reshape(-1, 4)
+                cls_score = cls_score.reshape(num_imgs, -1, 2)
+                scores = cls_score.softmax(dim=2)[..., 1]
+            bbox_pred = bbox_pred.permute(0, 2, 3, 1).reshape(num_imgs, -1, 4)
+            obb_pred = obb_pred.permute(0, 2, 3, 1).reshape(num_imgs, -1, 4)
             # nms_pre:NMS前，选出置信度前nms_pre高的anchor
-            if cfg.nms_pre > 0 and scores.shape[0] > cfg.nms_pre:
-                _, topk_inds = scores.topk(cfg.nms_pre)  # 置信度前nms_pre高的anchor inds
-                bbox_pred = bbox_pred[topk_inds, :]
-                anchors = anchors[topk_inds, :]
-                scores = scores[topk_inds]
-                obb_pred = obb_pred[topk_inds, :]
-            # 将选出的anchor由delta变换得到proposals(x1,y1,x2,y2)
-            proposals = delta2bbox(anchors, bbox_pred, self.target_means_hbb,
-                                     self.target_stds_hbb)
-            proposals_rec = hbbox2rec(proposals)
-            if cfg.min_bbox_size > 0:
-                w = proposals_rec[:, 2]
-                h = proposals_rec[:, 3]
-                valid_inds = torch.nonzero((w >= cfg.min_bbox_size) &
-                                           (h >= cfg.min_bbox_size)).squeeze()
-                # proposals = proposals[valid_inds, :]
-                proposals_rec = proposals_rec[valid_inds, :]
-                scores = scores[valid_inds]
-            proposals_rotate = target2poly(proposals_rec, obb_pred, img_shape,
-                                       self.target_means_obb, self.target_stds_obb)
-            proposals_rotate = torch.cat([proposals_rotate, scores.unsqueeze(-1)], dim=-1)
-            proposals_rotate, _ = poly_nms(proposals_rotate, cfg.nms_thr)  # 根据nms_thr完成NMS
-            # proposals = proposals[_, :]
-            proposals_rotate = proposals_rotate[:cfg.nms_post, :]  # 选出置信度前nms_post的proposals
-            # proposals = proposals[:cfg.nms_post, :]
-            mlvl_proposals_rotate.append(proposals_rotate)
-            # m1v1_proposals.append(proposals)
-        proposals_rotate = torch.cat(mlvl_proposals_rotate, 0)
-        # proposals = torch.cat(m1v1_proposals, 0)
-        if cfg.nms_across_levels:
-            proposals_rotate, _ = poly_nms(proposals_rotate, cfg.nms_thr)
-            proposals = proposals[_, :]
-            proposals_rotate = proposals_rotate[:cfg.max_num, :]
-            # proposals = proposals[:cfg.max_num, :]
-        else:
-            scores = proposals_rotate[:, 8]
-            num = min(cfg.max_num, proposals_rotate.shape[0])
-            _, topk_inds = scores.topk(num)
-            proposals_rotate = proposals_rotate[topk_inds, :]
-            # proposals = proposals[topk_inds, :]
-        return proposals_rotate #, proposals
\ No newline at end of file
+            if cfg.nms_pre > 0 and scores.shape[1] > cfg.nms_pre:
+                scores, topk_inds = scores.topk(cfg.nms_pre, dim=1)
+                bbox_pred = bbox_pred.gather(
+                    1, topk_inds.unsqueeze(-1).expand(-1, -1, 4))
+                obb_pred = obb_pred.gather(
+                    1, topk_inds.unsqueeze(-1).expand(-1, -1, 4))
+                anchors = anchors[topk_inds]
+            else:
+                anchors = anchors.unsqueeze(0).expand(num_imgs, -1, -1)
+            mlvl_scores.append(scores)
+            mlvl_bbox_preds.append(bbox_pred)
+            mlvl_obb_preds.append(obb_pred)
+            mlvl_level_anchors.append(anchors)
+            mlvl_level_ids.append(
+                scores.new_full(scores.shape, level, dtype=torch.long))
+        scores = torch.cat(mlvl_scores, dim=1)
+        img_ids = torch.arange(
+            num_imgs, device=scores.device).unsqueeze(1).expand_as(scores)
+        img_ids = img_ids.reshape(-1)
+        scores = scores.reshape(-1)
+        bbox_pred = torch.cat(mlvl_bbox_preds, dim=1).reshape(-1, 4)
+        obb_pred = torch.cat(mlvl_obb_preds, dim=1).reshape(-1, 4)
+        anchors = torch.cat(mlvl_level_anchors, dim=1).reshape(-1, 4)
+        level_ids = torch.cat(mlvl_level_ids, dim=1).reshape(-1)
+
+        # 将选出的anchor由delta变换得到proposals(x1,y1,x2,y2)
+        proposals = delta2bbox(anchors, bbox_pred, self.target_means_hbb,
+                               self.target_stds_hbb)
+        proposals_rec = hbbox2rec(proposals)
+        if cfg.min_bbox_size > 0:
+            w = proposals_rec[:, 2]
+            h = proposals_rec[:, 3]
+            valid_inds = torch.nonzero((w >= cfg.min_bbox_size) &
+                                       (h >= cfg.min_bbox_size)).view(-1)
+            proposals_rec = proposals_rec[valid_inds]
+            obb_pred = obb_pred[valid_inds]
+            scores = scores[valid_inds]
+            img_ids = img_ids[valid_inds]
+            level_ids = level_ids[valid_inds]
+        # the images of a batch may have different shapes, the polygons are
+        # clamped to the shape of their image
+        proposals_rotate = target2poly(proposals_rec, obb_pred,
+                                       (float('inf'), float('inf')),
+                                       self.target_means_obb,
+                                       self.target_stds_obb)
+        max_xy = proposals_rotate.new_tensor([[
+            img_meta['img_shape'][1] - 1, img_meta['img_shape'][0] - 1
+        ] for img_meta in img_metas]).repeat(1, 4)
+        proposals_rotate = torch.min(proposals_rotate, max_xy[img_ids])
+        proposals_rotate = torch.cat([proposals_rotate, scores.unsqueeze(-1)],
+                                     dim=-1)
+        return proposals_rotate, img_ids, level_ids
+
+
+def _topk_per_group(scores, groups, num_groups, k):
+    """Indices of the top ``k`` scores of each group, sorted by group then by
+    descending score."""
+    order = scores.argsort(descending=True)
+    ranks = torch.empty_like(order)
+    ranks[order] = torch.arange(order.numel(), device=order.device)
+    _, inds = (groups * order.numel() + ranks).sort()
+    if k > 0:
+        sorted_groups = groups[inds]
+        counts = torch.bincount(sorted_groups, minlength=num_groups)
+        starts = counts.cumsum(0) - counts
+        ranks = torch.arange(
+            inds.numel(), device=inds.device) - starts[sorted_groups]
+        inds = inds[ranks < k]
+    return inds
@@ -11,8 +11,8 @@ from ..losses import accuracy
 from ..builder import build_loss
 import torch.nn.functional as F
 from mmdet.core import (auto_fp16,  force_fp32, delta2rec,
-                        multiclass_poly_nms_8_points,
-                        rbboxRec2Poly)
+                        multiclass_poly_nms_candidates, rbboxRec2Poly,
+                        select_multiclass_candidates)
 
 @HEADS.register_module
 class MHNet(BBoxHeadOBB):
@@ -256,6 +256,11 @@ class MHNet(BBoxHeadOBB):
         bbox_pred_temp = torch.cat([bbox_xy_pred_temp, bbox_wh_pred_temp, bbox_theta_pred_temp], dim=-1)
         bbox_pred = bbox_pred_temp.view(bbox_pred_temp.size(0), -1)
 
+        if cfg is not None:
+            return self.get_det_rbbox2rbbox_score_first(
+                rrois, scores, bbox_pred, img_shape, scale_factor, rescale,
+                cfg)
+
         if bbox_pred is not None:
             rbboxes_rec = delta2rec(bbox_pred, rrois[:, 1:], self.target_means,
                                            self.target_stds, img_shape)
@@ -268,15 +273,43 @@ class MHNet(BBoxHeadOBB):
             rbboxes_rec[:, 2::5] /= scale_factor
             rbboxes_rec[:, 3::5] /= scale_factor
         rbboxes_poly = rbboxRec2Poly(rbboxes_rec, img_shape)
-        if cfg is None:
-            return rbboxes_poly, scores
-        else:
-            det_rbboxes, det_labels = multiclass_poly_nms_8_points(rbboxes_poly, scores,
-                                                     cfg.score_thr,
-                                                     cfg.nms,
-                                                     max_num=cfg.max_per_img)
+        return rbboxes_poly, scores
 
-            return det_rbboxes, det_labels
+    def get_det_rbbox2rbbox_score_first(self, rrois, scores, bbox_pred,
+                                        img_shape, scale_factor, rescale,
+                                        cfg):
+        """Threshold the scores first and decode only the (roi, class) pairs
+        that pass, the detections are the same as decoding all of them
+        before ``multiclass_poly_nms_8_points``.
 
+        ``cfg.nms_pre`` (optional) keeps the top scoring pairs of each class
+        before the NMS.
+        """
+        rbboxes_poly, det_scores, labels = self.get_det_candidates(
+            rrois, scores, bbox_pred, img_shape, scale_factor, rescale, cfg)
+        return multiclass_poly_nms_candidates(rbboxes_poly, det_scores,
+                                              labels, cfg.nms,
+                                              max_num=cfg.max_per_img)
 
+    def get_det_candidates(self, rrois, scores, bbox_pred, img_shape,
+                           scale_factor, rescale, cfg):
+        """Decode the (roi, class) pairs scoring above ``cfg.score_thr``.
 
+        Returns:
+            tuple[Tensor]: (k, 8) polygons, (k, ) scores and (k, ) 0-based
+                labels of the pairs, ordered by class then by roi.
+        """
+        bbox_inds, labels, det_scores = select_multiclass_candidates(
+            scores, cfg.score_thr, cfg.get('nms_pre', -1))
+        deltas = bbox_pred.view(bbox_pred.size(0), -1, 5)
+        if self.reg_class_agnostic:
+            deltas = deltas[bbox_inds, 0]
+        else:
+            deltas = deltas[bbox_inds, labels + 1]
+        rbboxes_rec = delta2rec(deltas, rrois[bbox_inds, 1:],
+                                self.target_means, self.target_stds,
+                                img_shape)
+        if rescale:
+            rbboxes_rec[:, :4] /= scale_factor
+        rbboxes_poly = rbboxRec2Poly(rbboxes_rec, img_shape)
+        return rbboxes_poly, det_scores, labels
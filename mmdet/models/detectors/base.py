@@ -76,7 +76,25 @@ class BaseDetector(nn.Module):
             logger = logging.getLogger()
             logger.info('load model from: {}'.format(pretrained))
 
-    def forward_test(self, imgs, img_metas, **kwargs):
+    def batch_simple_test(self, imgs, img_metas, **kwargs):
+        """Test the images of a batch without augmentation.
+
+        The images are tested one by one with :meth:`simple_test`, detectors
+        that can test them together override it.
+
+        Returns:
+            list: The results of each image.
+        """
+        proposals = kwargs.pop('proposals', None)
+        results = []
+        for i in range(imgs.size(0)):
+            if proposals is not None:
+                kwargs['proposals'] = proposals[i:i + 1]
+            results.append(
+                self.simple_test(imgs[i:i + 1], img_metas[i:i + 1], **kwargs))
+        return results
+
+    def forward_test(self, imgs, img_metas, batched=False, **kwargs):
         """
         Args:
             imgs (List[Tensor]): the outer list indicates test-time
@@ -85,6 +103,8 @@ class BaseDetector(nn.Module):
             img_meta (List[List[dict]]): the outer list indicates test-time
                 augs (multiscale, flip, etc.) and the inner list indicates
                 images in a batch
+            batched (bool): Return a list with the results of each image,
+                without augmentation the batch may then hold several images.
         """
         for var, name in [(imgs, 'imgs'), (img_metas, 'img_metas')]:
             if not isinstance(var, list):
@@ -96,10 +116,14 @@ class BaseDetector(nn.Module):
             raise ValueError(
                 'num of augmentations ({}) != num of image meta ({})'.format(
                     len(imgs), len(img_metas)))
+        if batched and num_augs == 1:
+            return self.batch_simple_test(imgs[0], img_metas[0], **kwargs)
         # TODO: remove the restriction of imgs_per_gpu == 1 when prepared
         imgs_per_gpu = imgs[0].size(0)
         assert imgs_per_gpu == 1
 
+        if batched:
+            return [self.aug_test(imgs, img_metas, **kwargs)]
         if num_augs == 1:
             return self.simple_test(imgs[0], img_metas[0], **kwargs)
         else:
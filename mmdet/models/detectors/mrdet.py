@@ -118,7 +118,7 @@ class MRDet(BaseDetector, RPNTestMixin, BBoxTestMixin):
         if self.with_rpn:
             rpn_outs = self.rpn_head(x)
             outs = outs + (rpn_outs, )
-        proposals = torch.randn(1000, 4).cuda()
+        proposals = torch.randn(1000, 4).to(img.device)
         # bbox head
         rois = bbox2roi([proposals])
         bbox_cls_feats = self.bbox_roi_extractor(
@@ -152,13 +152,19 @@ class MRDet(BaseDetector, RPNTestMixin, BBoxTestMixin):
                       gt_labels,
                       gt_bboxes_ignore=None,
                       gt_masks=None,
-                      proposals=None):
+                      proposals=None,
+                      gt_rbboxes=None):
 
         x = self.extract_feat(img)
 
-
-        gt_rbboxes_poly = mask_2_rbbox_list(gt_masks)  # list(ndarray)
-        gt_rbboxes_poly = ndarray2tensor(gt_rbboxes_poly, gt_bboxes[0].device)
+        # gt_rbboxes come from a with_poly_bbox pipeline, otherwise the
+        # rotated boxes are recovered from gt_masks
+        if gt_rbboxes is not None:
+            gt_rbboxes_poly = gt_rbboxes
+        else:
+            gt_rbboxes_poly = mask_2_rbbox_list(gt_masks)  # list(ndarray)
+            gt_rbboxes_poly = ndarray2tensor(gt_rbboxes_poly,
+                                             gt_bboxes[0].device)
 
         gt_rbboxes_poly = get_best_begin_point_list(gt_rbboxes_poly)
 
@@ -241,6 +247,17 @@ class MRDet(BaseDetector, RPNTestMixin, BBoxTestMixin):
 
     def simple_test(self, img, img_meta, proposals=None, rescale=False):
         """Test without augmentation."""
+        assert img.size(0) == 1, \
+            'simple_test tests a single image, see batch_simple_test'
+        return self.batch_simple_test(img, img_meta, proposals, rescale)[0]
+
+    def batch_simple_test(self, img, img_meta, proposals=None, rescale=False):
+        """Test the images of a batch without augmentation, the RoI head
+        runs once over the rois of all of them.
+
+        Returns:
+            list: The rbbox results of each image.
+        """
         assert self.with_bbox, "Bbox head must be implemented."
 
         x = self.extract_feat(img)
@@ -249,6 +266,7 @@ class MRDet(BaseDetector, RPNTestMixin, BBoxTestMixin):
             x, img_meta, self.test_cfg.rpn) if proposals is None else proposals
 
         if self.with_bbox:
+            # the rois of all images go through the head at once
             rois = rbboxPoly2rroiRec(proposal_rotate_list)
             bbox_cls_feats = self.bbox_roi_extractor(x[:self.bbox_roi_extractor.num_inputs],
                                                      rois)
@@ -258,39 +276,88 @@ class MRDet(BaseDetector, RPNTestMixin, BBoxTestMixin):
                 bbox_reg_feats = self.shared_head(bbox_reg_feats)
             cls_score, bbox_xy_pred, bbox_wh_pred, bbox_theta_pred = self.bbox_head(bbox_cls_feats, bbox_reg_feats)
 
-            img_shape = img_meta[0]['ori_shape']
-            scale_factor = img_meta[0]['scale_factor']
-            det_bboxes, det_labels = self.bbox_head.get_det_rbbox2rbbox(
-                rois,
-                cls_score,
-                bbox_xy_pred,
-                bbox_wh_pred,
-                bbox_theta_pred,
-                img_shape,
-                scale_factor,
-                rescale=True,
-                cfg=self.test_cfg.rcnn)
-            rbbox_results = rbbox2result(det_bboxes, det_labels,
-                                    self.bbox_head.num_classes)
+            # then the detections are decoded image by image
+            num_rois = [
+                proposals.size(0) for proposals in proposal_rotate_list
+            ]
+            rbbox_results = []
+            for i, (img_rois, img_cls_score, img_xy_pred, img_wh_pred,
+                    img_theta_pred) in enumerate(zip(
+                        rois.split(num_rois), cls_score.split(num_rois),
+                        bbox_xy_pred.split(num_rois),
+                        bbox_wh_pred.split(num_rois),
+                        bbox_theta_pred.split(num_rois))):
+                img_shape = img_meta[i]['ori_shape']
+                scale_factor = img_meta[i]['scale_factor']
+                det_bboxes, det_labels = self.bbox_head.get_det_rbbox2rbbox(
+                    img_rois,
+                    img_cls_score,
+                    img_xy_pred,
+                    img_wh_pred,
+                    img_theta_pred,
+                    img_shape,
+                    scale_factor,
+                    rescale=True,
+                    cfg=self.test_cfg.rcnn)
+                rbbox_results.append(rbbox2result(det_bboxes, det_labels,
+                                                  self.bbox_head.num_classes))
 
         if not self.with_mask:
             return rbbox_results
         else:
             return
 
+    def aug_test_feats(self, imgs, img_metas):
+        """Run the rpn on all the augmentations and return the merged
+        proposals and the features of each augmentation for the RoI head.
+
+        ``test_cfg.aug_feats`` sets what is done with the features between
+        the two passes:
+
+        - 'recompute' (default): extract them again, the lowest memory
+        - 'keep': keep them, the backbone and neck run once per augmentation
+        - 'half': keep them in half precision, they are cast back to the
+          original dtype one augmentation at a time
+        """
+        policy = self.test_cfg.get('aug_feats', 'recompute')
+        if policy not in ('recompute', 'keep', 'half'):
+            raise ValueError(
+                'aug_feats must be "recompute", "keep" or "half", '
+                'but got {}'.format(policy))
+        if policy == 'recompute':
+            proposal_list = self.aug_test_rotate_rpn(
+                self.extract_feats(imgs), img_metas, self.test_cfg.rpn)
+            return proposal_list, self.extract_feats(imgs)
+
+        stored_feats = []
+
+        def store_feats():
+            for x in self.extract_feats(imgs):
+                if policy == 'half':
+                    stored_feats.append(tuple(
+                        (feat.half(), feat.dtype) for feat in x))
+                else:
+                    stored_feats.append(x)
+                yield x
+
+        proposal_list = self.aug_test_rotate_rpn(store_feats(), img_metas,
+                                                 self.test_cfg.rpn)
+        if policy == 'half':
+            return proposal_list, (tuple(
+                feat.to(dtype) for feat, dtype in x) for x in stored_feats)
+        return proposal_list, stored_feats
+
     def aug_test(self, imgs, img_metas, rescale=False):
         """Test with augmentations.
 
         If rescale is False, then returned bboxes and masks will fit the scale
         of imgs[0].
         """
-        # recompute feats to save memory
-        proposal_list = self.aug_test_rotate_rpn(
-            self.extract_feats(imgs), img_metas, self.test_cfg.rpn)
+        proposal_list, aug_feats = self.aug_test_feats(imgs, img_metas)
 
         aug_bboxes = []
         aug_scores = []
-        for x, img_meta in zip(self.extract_feats(imgs), img_metas):
+        for x, img_meta in zip(aug_feats, img_metas):
             # only one image in the batch
             img_shape = img_meta[0]['img_shape']
             scale_factor = img_meta[0]['scale_factor']
@@ -1,6 +1,23 @@
 import numpy as np
 import torch
-from .import poly_nms_cuda, poly_soft_nms_cpu
+from .import poly_nms_cpu, poly_nms_cuda, poly_soft_nms_cpu
+
+
+class PolyNMSOp(torch.autograd.Function):
+    """The poly NMS kernels as a function that traces, it is exported as the
+    ``mmdet::PolyNMS`` custom op returning the int64 indices of the kept
+    dets in ascending order."""
+
+    @staticmethod
+    def forward(ctx, dets, iou_thr):
+        if dets.is_cuda:
+            return poly_nms_cuda.poly_nms(dets, iou_thr)
+        return poly_nms_cpu.poly_nms(dets, iou_thr)
+
+    @staticmethod
+    def symbolic(g, dets, iou_thr):
+        return g.op('mmdet::PolyNMS', dets, iou_threshold_f=float(iou_thr))
+
 
 def poly_nms(dets, iou_thr, device_id=None):
     """Dispatch to either CPU or GPU NMS implementations.
@@ -18,6 +35,15 @@ def poly_nms(dets, iou_thr, device_id=None):
     Returns:
         tuple: kept bboxes and indice, which is always the same data type as
             the input.
+
+    Example:
+        >>> dets = np.array([[0., 0., 10., 0., 10., 10., 0., 10., 0.9],
+        >>>                  [1., 0., 11., 0., 11., 10., 1., 10., 0.8],
+        >>>                  [20., 20., 30., 20., 30., 30., 20., 30., 0.7]],
+        >>>                 dtype=np.float32)
+        >>> iou_thr = 0.5
+        >>> supressed, inds = poly_nms(dets, iou_thr)
+        >>> assert len(inds) == len(supressed) == 2
     """
     # convert dets (tensor or numpy array) to tensor
     # import pdb
@@ -39,15 +65,38 @@ def poly_nms(dets, iou_thr, device_id=None):
     if dets_th.shape[0] == 0:
         inds = dets_th.new_zeros(0, dtype=torch.long)
     else:
-        if dets_th.is_cuda:
-            inds = poly_nms_cuda.poly_nms(dets_th, iou_thr)
-        else:
-            raise NotImplementedError
+        inds = PolyNMSOp.apply(dets_th, iou_thr)
 
     if is_numpy:
-        raise NotImplementedError
+        inds = inds.cpu().numpy()
+    return dets[inds, :], inds
+
+
+def batched_poly_nms(dets, idxs, iou_thr):
+    """Polygon NMS of several groups of dets in a single call.
+
+    The polygons of each group are shifted into a disjoint coordinate range,
+    so dets of different groups never suppress each other.
+
+    Arguments:
+        dets (torch.Tensor): (n, 9) polygons with scores.
+        idxs (torch.Tensor): (n, ) group of each det, e.g. the image or the
+            class.
+        iou_thr (float): IoU threshold for NMS.
+
+    Returns:
+        tuple: kept dets and their indices.
+    """
+    if dets.shape[0] == 0:
+        return dets, idxs.new_zeros(0, dtype=torch.long)
+    polys = dets[:, :8]
+    span = polys.max() - polys.min() + 1
+    offsets = idxs.type_as(polys) * span
+    _, inds = poly_nms(
+        torch.cat([polys + offsets[:, None], dets[:, 8:]], dim=1), iou_thr)
     return dets[inds, :], inds
 
+
 def poly_soft_nms(dets, iou_thr, method='linear', sigma=0.5, min_score=1e-2):
     """
     Example:
@@ -4,7 +4,8 @@ from setuptools import setup, Extension
 import numpy as np
 from Cython.Build import cythonize
 from Cython.Distutils import build_ext
-from torch.utils.cpp_extension import BuildExtension, CUDAExtension
+from torch.utils.cpp_extension import (BuildExtension, CppExtension,
+                                       CUDAExtension)
 
 ext_args = dict(
     include_dirs=[np.get_include()],
@@ -67,8 +68,9 @@ setup(
             'src/poly_nms_cuda.cpp',
             'src/poly_nms_kernel.cu',
         ]),
-        # CUDAExtension('nms_cpu', [
-        #     'src/nms_cpu.cpp',
-        # ]),
+        CppExtension(
+            'poly_nms_cpu', ['src/poly_nms_cpu.cpp'],
+            extra_compile_args=['-fopenmp'],
+            extra_link_args=['-fopenmp']),
     ],
     cmdclass={'build_ext': BuildExtension})
@@ -0,0 +1,248 @@
+#include <torch/extension.h>
+
+#include <algorithm>
+#include <cmath>
+#include <vector>
+
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+
+#define CHECK_CPU(x) TORCH_CHECK(!x.type().is_cuda(), #x, " must be a CPU tensor ")
+
+#define maxn 10
+const double eps = 1E-8;
+int const bitsPerBlock = sizeof(unsigned long long) * 8;
+
+template <typename T>
+struct Point {
+  T x, y;
+  Point() : x(0), y(0) {}
+  Point(T _x, T _y) : x(_x), y(_y) {}
+};
+
+template <typename T>
+inline int sig(T d) {
+  return (d > eps) - (d < -eps);
+}
+
+template <typename T>
+inline bool point_eq(const Point<T> &a, const Point<T> &b) {
+  return sig(a.x - b.x) == 0 && sig(a.y - b.y) == 0;
+}
+
+template <typename T>
+inline T cross(const Point<T> &o, const Point<T> &a, const Point<T> &b) {
+  return (a.x - o.x) * (b.y - o.y) - (b.x - o.x) * (a.y - o.y);
+}
+
+template <typename T>
+inline T area(Point<T> *ps, int n) {
+  ps[n] = ps[0];
+  T res = 0;
+  for (int i = 0; i < n; i++) {
+    res += ps[i].x * ps[i + 1].y - ps[i].y * ps[i + 1].x;
+  }
+  return res / 2.0;
+}
+
+template <typename T>
+inline int lineCross(const Point<T> &a, const Point<T> &b, const Point<T> &c,
+                     const Point<T> &d, Point<T> &p) {
+  T s1, s2;
+  s1 = cross(a, b, c);
+  s2 = cross(a, b, d);
+  if (sig(s1) == 0 && sig(s2) == 0) return 2;
+  if (sig(s2 - s1) == 0) return 0;
+  p.x = (c.x * s2 - d.x * s1) / (s2 - s1);
+  p.y = (c.y * s2 - d.y * s1) / (s2 - s1);
+  return 1;
+}
+
+// Clip polygon p (n vertices) with the half plane on the left of a->b.
+template <typename T>
+inline void polygon_cut(Point<T> *p, int &n, const Point<T> &a,
+                        const Point<T> &b, Point<T> *pp) {
+  int m = 0;
+  p[n] = p[0];
+  for (int i = 0; i < n; i++) {
+    if (sig(cross(a, b, p[i])) > 0) pp[m++] = p[i];
+    if (sig(cross(a, b, p[i])) != sig(cross(a, b, p[i + 1])))
+      lineCross(a, b, p[i], p[i + 1], pp[m++]);
+  }
+  n = 0;
+  for (int i = 0; i < m; i++)
+    if (!i || !(point_eq(pp[i], pp[i - 1]))) p[n++] = pp[i];
+  while (n > 1 && point_eq(p[n - 1], p[0])) n--;
+}
+
+// Signed intersection area of triangles oab and ocd, o is the origin.
+template <typename T>
+inline T intersectArea(Point<T> a, Point<T> b, Point<T> c, Point<T> d) {
+  Point<T> o(0, 0);
+  int s1 = sig(cross(o, a, b));
+  int s2 = sig(cross(o, c, d));
+  if (s1 == 0 || s2 == 0) return 0.0;  // degenerated, zero area
+  if (s1 == -1) std::swap(a, b);
+  if (s2 == -1) std::swap(c, d);
+  Point<T> p[maxn] = {o, a, b};
+  int n = 3;
+  Point<T> pp[maxn];
+  polygon_cut(p, n, o, c, pp);
+  polygon_cut(p, n, c, d, pp);
+  polygon_cut(p, n, d, o, pp);
+  T res = std::fabs(area(p, n));
+  if (s1 * s2 == -1) res = -res;
+  return res;
+}
+
+// Intersection area of two polygons.
+template <typename T>
+inline T intersectArea(Point<T> *ps1, int n1, Point<T> *ps2, int n2) {
+  if (area(ps1, n1) < 0) std::reverse(ps1, ps1 + n1);
+  if (area(ps2, n2) < 0) std::reverse(ps2, ps2 + n2);
+  ps1[n1] = ps1[0];
+  ps2[n2] = ps2[0];
+  T res = 0;
+  for (int i = 0; i < n1; i++) {
+    for (int j = 0; j < n2; j++) {
+      res += intersectArea(ps1[i], ps1[i + 1], ps2[j], ps2[j + 1]);
+    }
+  }
+  return res;  // assume res is positive!
+}
+
+template <typename T>
+inline T polyIoU(const T *p, const T *q) {
+  Point<T> ps1[maxn], ps2[maxn];
+  int n1 = 4;
+  int n2 = 4;
+  // work relative to the first vertex of p, the areas are summed over
+  // triangles fanned from the origin and lose precision far from it
+  const T ox = p[0];
+  const T oy = p[1];
+  for (int i = 0; i < 4; i++) {
+    ps1[i].x = p[i * 2] - ox;
+    ps1[i].y = p[i * 2 + 1] - oy;
+
+    ps2[i].x = q[i * 2] - ox;
+    ps2[i].y = q[i * 2 + 1] - oy;
+  }
+  T inter_area = intersectArea(ps1, n1, ps2, n2);
+  T union_area = std::fabs(area(ps1, n1)) + std::fabs(area(ps2, n2)) - inter_area;
+  T iou = 0;
+  if (union_area == 0) {
+    iou = (inter_area + 1) / (union_area + 1);
+  } else {
+    iou = inter_area / union_area;
+  }
+  return iou;
+}
+
+template <typename scalar_t>
+at::Tensor poly_nms_cpu_kernel(const at::Tensor &dets, const float threshold) {
+  AT_ASSERTM(!dets.type().is_cuda(), "dets must be a CPU tensor");
+
+  auto scores = dets.select(1, 8);
+  auto order_t = std::get<1>(scores.sort(0, /*descending=*/true));
+  auto dets_sorted = dets.index_select(0, order_t).contiguous();
+
+  const int ndets = dets.size(0);
+  const int col_blocks = (ndets + bitsPerBlock - 1) / bitsPerBlock;
+  const scalar_t *polys = dets_sorted.data<scalar_t>();
+
+  // Enclosing horizontal boxes, used to skip pairs that cannot overlap
+  // before paying for the exact polygon intersection.
+  std::vector<scalar_t> hbbs(ndets * 4);
+  for (int i = 0; i < ndets; i++) {
+    const scalar_t *p = polys + i * 9;
+    scalar_t xmin = p[0], ymin = p[1], xmax = p[0], ymax = p[1];
+    for (int k = 1; k < 4; k++) {
+      xmin = std::min(xmin, p[k * 2]);
+      xmax = std::max(xmax, p[k * 2]);
+      ymin = std::min(ymin, p[k * 2 + 1]);
+      ymax = std::max(ymax, p[k * 2 + 1]);
+    }
+    hbbs[i * 4 + 0] = xmin;
+    hbbs[i * 4 + 1] = ymin;
+    hbbs[i * 4 + 2] = xmax;
+    hbbs[i * 4 + 3] = ymax;
+  }
+
+  // Boxes ordered by the left edge of their horizontal box. A box j can only
+  // overlap box i if its left edge lies in [xmin_i - max_width, xmax_i], so
+  // each row only scans that window instead of every lower scored box.
+  std::vector<int> x_order(ndets);
+  std::vector<scalar_t> x_sorted(ndets);
+  scalar_t max_width = 0;
+  for (int i = 0; i < ndets; i++) {
+    x_order[i] = i;
+    max_width = std::max(max_width, hbbs[i * 4 + 2] - hbbs[i * 4 + 0]);
+  }
+  std::sort(x_order.begin(), x_order.end(), [&hbbs](int a, int b) {
+    return hbbs[a * 4] < hbbs[b * 4];
+  });
+  for (int i = 0; i < ndets; i++) x_sorted[i] = hbbs[x_order[i] * 4];
+
+  // Row i of the mask marks every lower scored box that box i suppresses.
+  // Rows are independent, so they are filled in parallel.
+  std::vector<unsigned long long> mask(
+      static_cast<size_t>(ndets) * col_blocks, 0);
+#pragma omp parallel for schedule(dynamic, 16)
+  for (int i = 0; i < ndets; i++) {
+    const scalar_t *bi = &hbbs[i * 4];
+    unsigned long long *row = &mask[static_cast<size_t>(i) * col_blocks];
+    const int lo = std::lower_bound(x_sorted.begin(), x_sorted.end(),
+                                    bi[0] - max_width) - x_sorted.begin();
+    const int hi = std::upper_bound(x_sorted.begin(), x_sorted.end(),
+                                    bi[2]) - x_sorted.begin();
+    for (int k = lo; k < hi; k++) {
+      const int j = x_order[k];
+      if (j <= i) continue;
+      const scalar_t *bj = &hbbs[j * 4];
+      if (bj[0] > bi[2] || bj[2] < bi[0] || bj[1] > bi[3] || bj[3] < bi[1])
+        continue;
+      if (polyIoU(polys + i * 9, polys + j * 9) > threshold) {
+        row[j / bitsPerBlock] |= 1ULL << (j % bitsPerBlock);
+      }
+    }
+  }
+
+  std::vector<unsigned long long> remv(col_blocks, 0);
+  at::Tensor keep =
+      at::empty({ndets}, dets.options().dtype(at::kLong).device(at::kCPU));
+  int64_t *keep_out = keep.data<int64_t>();
+
+  int num_to_keep = 0;
+  for (int i = 0; i < ndets; i++) {
+    int nblock = i / bitsPerBlock;
+    int inblock = i % bitsPerBlock;
+
+    if (!(remv[nblock] & (1ULL << inblock))) {
+      keep_out[num_to_keep++] = i;
+      const unsigned long long *p = &mask[static_cast<size_t>(i) * col_blocks];
+      for (int j = nblock; j < col_blocks; j++) {
+        remv[j] |= p[j];
+      }
+    }
+  }
+
+  return std::get<0>(
+      order_t.index({keep.narrow(/*dim=*/0, /*start=*/0, /*length=*/num_to_keep)})
+          .sort(0, false));
+}
+
+at::Tensor poly_nms(const at::Tensor &dets, const float threshold) {
+  CHECK_CPU(dets);
+  if (dets.numel() == 0)
+    return at::empty({0}, dets.options().dtype(at::kLong).device(at::kCPU));
+  at::Tensor result;
+  AT_DISPATCH_FLOATING_TYPES(dets.scalar_type(), "poly_nms", [&] {
+    result = poly_nms_cpu_kernel<scalar_t>(dets, threshold);
+  });
+  return result;
+}
+
+PYBIND11_MODULE(TORCH_EXTENSION_NAME, m) {
+  m.def("poly_nms", &poly_nms, "polygon non-maximum suppression (CPU)");
+}
@@ -118,17 +118,40 @@ __device__ inline float intersectArea(float2*ps1,int n1,float2*ps2,int n2){
     return res;//assumeresispositive!
 }
 
-// TODO: optimal if by first calculate the iou between two hbbs
+__device__ inline void devPolyHbb(float const * const p, float * const hbb) {
+    hbb[0] = hbb[2] = p[0];
+    hbb[1] = hbb[3] = p[1];
+    for (int i = 1; i < 4; i++) {
+        hbb[0] = fminf(hbb[0], p[i * 2]);
+        hbb[2] = fmaxf(hbb[2], p[i * 2]);
+        hbb[1] = fminf(hbb[1], p[i * 2 + 1]);
+        hbb[3] = fmaxf(hbb[3], p[i * 2 + 1]);
+    }
+}
+
 __device__ inline float devPolyIoU(float const * const p, float const * const q) {
+    // polygons whose hbbs do not overlap are rejected before clipping, as
+    // in the cpu kernel, most pairs of a batch (other images, levels or
+    // classes) end here
+    float bp[4], bq[4];
+    devPolyHbb(p, bp);
+    devPolyHbb(q, bq);
+    if (bq[0] > bp[2] || bq[2] < bp[0] || bq[1] > bp[3] || bq[3] < bp[1]) {
+        return 0;
+    }
     float2 ps1[maxn], ps2[maxn];
     int n1 = 4;
     int n2 = 4;
+    // work relative to the first vertex of p, the areas are summed over
+    // triangles fanned from the origin and lose precision far from it
+    const float ox = p[0];
+    const float oy = p[1];
     for (int i = 0; i < 4; i++) {
-        ps1[i].x = p[i * 2];
-        ps1[i].y = p[i * 2 + 1];
+        ps1[i].x = p[i * 2] - ox;
+        ps1[i].y = p[i * 2 + 1] - oy;
 
-        ps2[i].x = q[i * 2];
-        ps2[i].y = q[i * 2 + 1];
+        ps2[i].x = q[i * 2] - ox;
+        ps2[i].y = q[i * 2 + 1] - oy;
     }
     float inter_area = intersectArea(ps1, n1, ps2, n2);
     float union_area = fabs(area(ps1, n1)) + fabs(area(ps2, n2)) - inter_area;
@@ -1,9 +1,24 @@
 from torch.autograd import Function
+from torch.nn.modules.utils import _pair
 
-from .. import rroi_align_cuda
+from .. import rroi_align_cpu, rroi_align_cuda
 
 class RRoIAlignFunction(Function):
 
+    @staticmethod
+    def symbolic(g, features, rois, out_size, spatial_scale, sample_num=0):
+        """Export as the ``mmdet::RRoIAlign`` custom op, the runtime has to
+        provide it with the semantics of the CPU/CUDA kernels."""
+        out_h, out_w = _pair(out_size)
+        return g.op(
+            'mmdet::RRoIAlign',
+            features,
+            rois,
+            out_height_i=out_h,
+            out_width_i=out_w,
+            spatial_scale_f=spatial_scale,
+            sample_num_i=sample_num)
+
     @staticmethod
     def forward(ctx, features, rois, out_size, spatial_scale, sample_num=0):
         if isinstance(out_size, int):
@@ -30,7 +45,9 @@ class RRoIAlignFunction(Function):
             rroi_align_cuda.forward(features, rois, out_h, out_w, spatial_scale,
                                    sample_num, output)
         else:
-            raise NotImplementedError
+            rroi_align_cpu.forward(features.contiguous(), rois.contiguous(),
+                                   out_h, out_w, spatial_scale, sample_num,
+                                   output)
 
         return output
 
@@ -40,7 +57,7 @@ class RRoIAlignFunction(Function):
         spatial_scale = ctx.spatial_scale
         sample_num = ctx.sample_num
         rois = ctx.saved_tensors[0]
-        assert (feature_size is not None and grad_output.is_cuda)
+        assert feature_size is not None
 
         batch_size, num_channels, data_height, data_width = feature_size
         out_w = grad_output.size(3)
@@ -50,9 +67,14 @@ class RRoIAlignFunction(Function):
         if ctx.needs_input_grad[0]:
             grad_input = rois.new_zeros(batch_size, num_channels, data_height,
                                         data_width)
-            rroi_align_cuda.backward(grad_output.contiguous(), rois, out_h,
-                                    out_w, spatial_scale, sample_num,
-                                    grad_input)
+            if grad_output.is_cuda:
+                rroi_align_cuda.backward(grad_output.contiguous(), rois, out_h,
+                                         out_w, spatial_scale, sample_num,
+                                         grad_input)
+            else:
+                rroi_align_cpu.backward(grad_output.contiguous(),
+                                        rois.contiguous(), out_h, out_w,
+                                        spatial_scale, sample_num, grad_input)
 
         return grad_input, grad_rois, None, None, None
 
@@ -111,5 +111,54 @@ class test_op_roi_align_rotated(unittest.TestCase):
         test = gradcheck(RRoIAlign(4, spatial_scale, 2), inputs, atol=1e-3, eps=1e-3)
         print(test)
 
+    def test_roi_align_rotated_value_cpu(self):
+        data = torch.arange(16).reshape(1, 1, 4, 4).float()
+        rois = torch.tensor([[0, 1.0, 1.0, 2., 2., -np.pi/2.],
+                             [0, 1.0, 1.0, 2., 2., 0],
+                             [0, 1.0, 1.0, 2., 2., np.pi/2.],
+                             [0, 1.0, 1.0, 2., 2., np.pi]])
+        expected_feat = np.array([[[[6.5, 2.5], [7.5, 3.5]]],
+                                  [[[2.5, 3.5], [6.5, 7.5]]],
+                                  [[[3.5, 7.5], [2.5, 6.5]]],
+                                  [[[7.5, 6.5], [3.5, 2.5]]]])
+
+        roialign_rotated = RRoIAlign(out_size=2, spatial_scale=1, sample_num=0)
+        results = roialign_rotated(data, rois).numpy()
+        np.testing.assert_almost_equal(results, expected_feat, decimal=6)
+
+    def test_roi_align_rotated_autograd_cpu(self):
+        x2 = np.array([[0, 6.2, 6.0, 4.0, 4.0, np.pi / 2.],
+                       [0, 6.3, 6.0, 4.0, 4.0, -np.pi / 2.],
+                       [0, 6.0, 6.0, 4.0, 4.0, -np.pi],
+                       [0, 6.0, 6.0, 4.3, 4.0, np.pi],
+                       [1, 6.0, 6.0, 4.0, 4.0, np.pi / 3.],
+                       [2, 4.1, 4.2, 6.2, 6.0, -np.pi],
+                       [1, 6.0, 6.3, 4.0, 4.1, 3 * np.pi / 4.],
+                       [0, 6.2, 6.3, 4.2, 4.4, np.pi / 4.]
+                       ], dtype='float64')
+        # the cpu kernels support double, so gradcheck can run with tight eps
+        x1 = torch.rand(4, 2, 12, 12, requires_grad=True, dtype=torch.float64)
+        x2 = torch.from_numpy(x2)
+        inputs = (x1, x2)
+        print('Gradcheck for roi align (cpu)...')
+        spatial_scale = 1
+        self.assertTrue(gradcheck(RRoIAlign(4, spatial_scale), inputs))
+        self.assertTrue(gradcheck(RRoIAlign(4, spatial_scale, 2), inputs))
+
+    def test_roi_align_rotated_cpu_cuda_consistency(self):
+        if not torch.cuda.is_available():
+            self.skipTest('test requires GPU and torch+cuda')
+        feat = torch.randn(2, 16, 32, 32)
+        rois = torch.rand(20, 6)
+        rois[:, 0] = torch.randint(2, (20, )).float()
+        rois[:, 1:3] *= 128
+        rois[:, 3:5] = rois[:, 3:5] * 64 + 8
+        rois[:, 5] = (rois[:, 5] - 0.5) * 2 * np.pi
+        layer = RRoIAlign(7, 0.25, 2)
+        out_cpu = layer(feat, rois)
+        out_cuda = layer(feat.cuda(), rois.cuda()).cpu()
+        np.testing.assert_allclose(
+            out_cpu.numpy(), out_cuda.numpy(), rtol=1e-4, atol=1e-5)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -1,5 +1,6 @@
 from setuptools import setup
-from torch.utils.cpp_extension import BuildExtension, CUDAExtension
+from torch.utils.cpp_extension import (BuildExtension, CppExtension,
+                                       CUDAExtension)
 
 setup(
     name='rroi_align_cuda',
@@ -8,5 +9,9 @@ setup(
             'src/rroi_align_cuda.cpp',
             'src/rroi_align_kernel.cu',
         ]),
+        CppExtension(
+            'rroi_align_cpu', ['src/rroi_align_cpu.cpp'],
+            extra_compile_args=['-fopenmp'],
+            extra_link_args=['-fopenmp']),
     ],
     cmdclass={'build_ext': BuildExtension})
@@ -0,0 +1,301 @@
+#include <torch/extension.h>
+
+#include <cmath>
+#include <vector>
+
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+
+#define CHECK_CPU(x) TORCH_CHECK(!x.type().is_cuda(), #x, " must be a CPU tensor ")
+#define CHECK_CONTIGUOUS(x) \
+  TORCH_CHECK(x.is_contiguous(), #x, " must be contiguous ")
+#define CHECK_INPUT(x) \
+  CHECK_CPU(x);        \
+  CHECK_CONTIGUOUS(x)
+
+// Bilinear sampling position of one grid point: the four neighbour offsets
+// in a (height, width) plane and their weights. Points falling outside the
+// feature map get zero weights, same as the CUDA kernel.
+template <typename scalar_t>
+struct PreCalc {
+  int pos1;
+  int pos2;
+  int pos3;
+  int pos4;
+  scalar_t w1;
+  scalar_t w2;
+  scalar_t w3;
+  scalar_t w4;
+};
+
+template <typename scalar_t>
+void bilinear_interpolate_weights(const int height, const int width,
+                                  scalar_t y, scalar_t x,
+                                  PreCalc<scalar_t> &pc) {
+  // deal with cases that inverse elements are out of feature map boundary
+  if (y < -1.0 || y > height || x < -1.0 || x > width) {
+    pc.pos1 = pc.pos2 = pc.pos3 = pc.pos4 = 0;
+    pc.w1 = pc.w2 = pc.w3 = pc.w4 = 0.;
+    return;
+  }
+
+  if (y <= 0) y = 0;
+  if (x <= 0) x = 0;
+
+  int y_low = (int)y;
+  int x_low = (int)x;
+  int y_high;
+  int x_high;
+
+  if (y_low >= height - 1) {
+    y_high = y_low = height - 1;
+    y = (scalar_t)y_low;
+  } else {
+    y_high = y_low + 1;
+  }
+
+  if (x_low >= width - 1) {
+    x_high = x_low = width - 1;
+    x = (scalar_t)x_low;
+  } else {
+    x_high = x_low + 1;
+  }
+
+  scalar_t ly = y - y_low;
+  scalar_t lx = x - x_low;
+  scalar_t hy = 1. - ly;
+  scalar_t hx = 1. - lx;
+
+  pc.pos1 = y_low * width + x_low;
+  pc.pos2 = y_low * width + x_high;
+  pc.pos3 = y_high * width + x_low;
+  pc.pos4 = y_high * width + x_high;
+  pc.w1 = hy * hx;
+  pc.w2 = hy * lx;
+  pc.w3 = ly * hx;
+  pc.w4 = ly * lx;
+}
+
+// Compute the sampling grid of a single rotated RoI. The grid only depends
+// on the RoI, so it is shared by all channels. Returns the number of samples
+// per bin (roi_bin_grid_h * roi_bin_grid_w).
+template <typename scalar_t>
+int pre_calc_for_rroi(const scalar_t *roi, const scalar_t spatial_scale,
+                      const int sample_num, const int height, const int width,
+                      const int pooled_height, const int pooled_width,
+                      std::vector<PreCalc<scalar_t> > &pre_calc) {
+  // Do not using rounding; this implementation detail is critical
+  scalar_t roi_center_w = roi[1] * spatial_scale;
+  scalar_t roi_center_h = roi[2] * spatial_scale;
+  scalar_t roi_width = roi[3] * spatial_scale;
+  scalar_t roi_height = roi[4] * spatial_scale;
+  scalar_t theta = roi[5];
+
+  // Force malformed ROIs to be 1x1
+  roi_width = std::max(roi_width, (scalar_t)1.);
+  roi_height = std::max(roi_height, (scalar_t)1.);
+  scalar_t bin_size_h = roi_height / static_cast<scalar_t>(pooled_height);
+  scalar_t bin_size_w = roi_width / static_cast<scalar_t>(pooled_width);
+
+  // We use roi_bin_grid to sample the grid and mimic integral
+  int roi_bin_grid_h = (sample_num > 0)
+      ? sample_num
+      : std::ceil(roi_height / pooled_height);  // e.g., = 2
+  int roi_bin_grid_w =
+      (sample_num > 0) ? sample_num : std::ceil(roi_width / pooled_width);
+
+  // roi_start_h and roi_start_w are computed wrt the center of RoI (x, y).
+  // Appropriate translation needs to be applied after.
+  scalar_t roi_start_h = -roi_height / 2.0;
+  scalar_t roi_start_w = -roi_width / 2.0;
+  scalar_t cos_theta = std::cos(theta);
+  scalar_t sin_theta = std::sin(theta);
+
+  const int count = roi_bin_grid_h * roi_bin_grid_w;
+  pre_calc.resize(pooled_height * pooled_width * count);
+
+  int idx = 0;
+  for (int ph = 0; ph < pooled_height; ph++) {
+    for (int pw = 0; pw < pooled_width; pw++) {
+      for (int iy = 0; iy < roi_bin_grid_h; iy++) {
+        const scalar_t yy = roi_start_h + ph * bin_size_h +
+            static_cast<scalar_t>(iy + .5f) * bin_size_h /
+                static_cast<scalar_t>(roi_bin_grid_h);
+        for (int ix = 0; ix < roi_bin_grid_w; ix++) {
+          const scalar_t xx = roi_start_w + pw * bin_size_w +
+              static_cast<scalar_t>(ix + .5f) * bin_size_w /
+                  static_cast<scalar_t>(roi_bin_grid_w);
+
+          // Rotate by theta around the center and translate
+          scalar_t x = xx * cos_theta - yy * sin_theta + roi_center_w;
+          scalar_t y = xx * sin_theta + yy * cos_theta + roi_center_h;
+
+          bilinear_interpolate_weights<scalar_t>(height, width, y, x,
+                                                 pre_calc[idx++]);
+        }
+      }
+    }
+  }
+  return count;
+}
+
+template <typename scalar_t>
+void RROIAlignForwardCPU(const scalar_t *bottom_data,
+                         const scalar_t *bottom_rois,
+                         const scalar_t spatial_scale, const int sample_num,
+                         const int channels, const int height, const int width,
+                         const int num_rois, const int pooled_height,
+                         const int pooled_width, scalar_t *top_data) {
+  // RoIs are independent, each thread works on its own slice of the output
+#pragma omp parallel for schedule(dynamic)
+  for (int n = 0; n < num_rois; n++) {
+    const scalar_t *offset_bottom_rois = bottom_rois + n * 6;
+    int roi_batch_ind = offset_bottom_rois[0];
+
+    std::vector<PreCalc<scalar_t> > pre_calc;
+    const int count = pre_calc_for_rroi<scalar_t>(
+        offset_bottom_rois, spatial_scale, sample_num, height, width,
+        pooled_height, pooled_width, pre_calc);
+    const scalar_t inv_count = 1. / static_cast<scalar_t>(count);
+
+    for (int c = 0; c < channels; c++) {
+      const scalar_t *offset_bottom_data =
+          bottom_data + (roi_batch_ind * channels + c) * height * width;
+      scalar_t *offset_top_data =
+          top_data + (n * channels + c) * pooled_height * pooled_width;
+
+      int idx = 0;
+      for (int p = 0; p < pooled_height * pooled_width; p++) {
+        scalar_t output_val = 0.;
+        for (int i = 0; i < count; i++) {
+          const PreCalc<scalar_t> &pc = pre_calc[idx++];
+          output_val += pc.w1 * offset_bottom_data[pc.pos1] +
+                        pc.w2 * offset_bottom_data[pc.pos2] +
+                        pc.w3 * offset_bottom_data[pc.pos3] +
+                        pc.w4 * offset_bottom_data[pc.pos4];
+        }
+        offset_top_data[p] = output_val * inv_count;
+      }
+    }
+  }
+}
+
+template <typename scalar_t>
+void RROIAlignBackwardCPU(const scalar_t *top_diff,
+                          const scalar_t *bottom_rois,
+                          const scalar_t spatial_scale, const int sample_num,
+                          const int channels, const int height,
+                          const int width, const int num_rois,
+                          const int pooled_height, const int pooled_width,
+                          scalar_t *bottom_diff) {
+  // Several RoIs may scatter into the same feature plane, so the sampling
+  // grids are computed once up front and the scatter is parallelized over
+  // channels, whose gradient planes never overlap.
+  std::vector<std::vector<PreCalc<scalar_t> > > pre_calcs(num_rois);
+  std::vector<int> counts(num_rois);
+#pragma omp parallel for schedule(dynamic)
+  for (int n = 0; n < num_rois; n++) {
+    counts[n] = pre_calc_for_rroi<scalar_t>(
+        bottom_rois + n * 6, spatial_scale, sample_num, height, width,
+        pooled_height, pooled_width, pre_calcs[n]);
+  }
+
+#pragma omp parallel for
+  for (int c = 0; c < channels; c++) {
+    for (int n = 0; n < num_rois; n++) {
+      int roi_batch_ind = bottom_rois[n * 6];
+      const std::vector<PreCalc<scalar_t> > &pre_calc = pre_calcs[n];
+      const int count = counts[n];
+
+      scalar_t *offset_bottom_diff =
+          bottom_diff + (roi_batch_ind * channels + c) * height * width;
+      const scalar_t *offset_top_diff =
+          top_diff + (n * channels + c) * pooled_height * pooled_width;
+
+      int idx = 0;
+      for (int p = 0; p < pooled_height * pooled_width; p++) {
+        const scalar_t top_diff_this_bin =
+            offset_top_diff[p] / static_cast<scalar_t>(count);
+        for (int i = 0; i < count; i++) {
+          const PreCalc<scalar_t> &pc = pre_calc[idx++];
+          // out-of-boundary samples carry zero weights
+          offset_bottom_diff[pc.pos1] += top_diff_this_bin * pc.w1;
+          offset_bottom_diff[pc.pos2] += top_diff_this_bin * pc.w2;
+          offset_bottom_diff[pc.pos3] += top_diff_this_bin * pc.w3;
+          offset_bottom_diff[pc.pos4] += top_diff_this_bin * pc.w4;
+        }
+      }
+    }
+  }
+}
+
+int rroi_align_forward_cpu(at::Tensor features, at::Tensor rois,
+                           int pooled_height, int pooled_width,
+                           float spatial_scale, int sample_num,
+                           at::Tensor output) {
+  CHECK_INPUT(features);
+  CHECK_INPUT(rois);
+  CHECK_INPUT(output);
+
+  // Number of ROIs
+  int num_rois = rois.size(0);
+  int size_rois = rois.size(1);
+
+  if (size_rois != 6) {
+    printf("wrong roi size\n");
+    return 0;
+  }
+
+  int num_channels = features.size(1);
+  int data_height = features.size(2);
+  int data_width = features.size(3);
+
+  AT_DISPATCH_FLOATING_TYPES(
+      features.scalar_type(), "RROIAlignForwardCPU", ([&] {
+        RROIAlignForwardCPU<scalar_t>(
+            features.data<scalar_t>(), rois.data<scalar_t>(),
+            scalar_t(spatial_scale), sample_num, num_channels, data_height,
+            data_width, num_rois, pooled_height, pooled_width,
+            output.data<scalar_t>());
+      }));
+
+  return 1;
+}
+
+int rroi_align_backward_cpu(at::Tensor top_grad, at::Tensor rois,
+                            int pooled_height, int pooled_width,
+                            float spatial_scale, int sample_num,
+                            at::Tensor bottom_grad) {
+  CHECK_INPUT(top_grad);
+  CHECK_INPUT(rois);
+  CHECK_INPUT(bottom_grad);
+
+  // Number of ROIs
+  int num_rois = rois.size(0);
+  int size_rois = rois.size(1);
+  if (size_rois != 6) {
+    printf("wrong roi size\n");
+    return 0;
+  }
+
+  int num_channels = bottom_grad.size(1);
+  int data_height = bottom_grad.size(2);
+  int data_width = bottom_grad.size(3);
+
+  AT_DISPATCH_FLOATING_TYPES(
+      top_grad.scalar_type(), "RROIAlignBackwardCPU", ([&] {
+        RROIAlignBackwardCPU<scalar_t>(
+            top_grad.data<scalar_t>(), rois.data<scalar_t>(),
+            scalar_t(spatial_scale), sample_num, num_channels, data_height,
+            data_width, num_rois, pooled_height, pooled_width,
+            bottom_grad.data<scalar_t>());
+      }));
+
+  return 1;
+}
+
+PYBIND11_MODULE(TORCH_EXTENSION_NAME, m) {
+  m.def("forward", &rroi_align_forward_cpu, "Roi_Align_Rotated forward (CPU)");
+  m.def("backward", &rroi_align_backward_cpu, "Roi_Align_Rotated backward (CPU)");
+}
@@ -118,10 +118,21 @@ def make_cython_ext(name, module, sources):
     extension, = cythonize(extension)
     return extension
 
-def make_cpp_ext(name, module, sources):
+
+def make_cpp_ext(name, module, sources, openmp=False):
+    extra_compile_args = []
+    extra_link_args = []
+    if openmp:
+        if platform.system() == 'Windows':
+            extra_compile_args.append('/openmp')
+        else:
+            extra_compile_args.append('-fopenmp')
+            extra_link_args.append('-fopenmp')
     extension = CppExtension(
         name='{}.{}'.format(module, name),
         sources=[os.path.join(*module.split('.'), p) for p in sources],
+        extra_compile_args=extra_compile_args,
+        extra_link_args=extra_link_args,
     )
     return extension
 
@@ -197,6 +208,11 @@ if __name__ == '__main__':
                 name='rroi_align_cuda',
                 module='mmdet.ops.rroi_align',
                 sources=['src/rroi_align_cuda.cpp', 'src/rroi_align_kernel.cu']),
+            make_cpp_ext(
+                name='rroi_align_cpu',
+                module='mmdet.ops.rroi_align',
+                sources=['src/rroi_align_cpu.cpp'],
+                openmp=True),
             ########## add psroi pool###############
             make_cuda_ext(
                 name='psroi_pool_cuda',
@@ -217,6 +233,11 @@ if __name__ == '__main__':
                 name='poly_nms_cuda',
                 module='mmdet.ops.poly_nms',
                 sources=['src/poly_nms_cuda.cpp', 'src/poly_nms_kernel.cu']),
+            make_cpp_ext(
+                name='poly_nms_cpu',
+                module='mmdet.ops.poly_nms',
+                sources=['src/poly_nms_cpu.cpp'],
+                openmp=True),
             ##################################################
             make_cuda_ext(
                 name='deform_conv_cuda',
@@ -0,0 +1,115 @@
+"""
+CommandLine:
+    pytest tests/test_aorpn_head.py
+"""
+import mmcv
+import pytest
+import torch
+
+from mmdet.core import delta2bbox, hbbox2rec, target2poly
+from mmdet.models.anchor_heads import AO_RPNHead
+from mmdet.ops import poly_nms
+
+
+def _get_bboxes_loop(head, cls_scores, bbox_preds, obb_preds, img_metas,
+                     cfg):
+    """Proposals of each image and level selected one at a time, as
+    AO_RPNHead did before its batched selection, kept for reference.
+
+    The proposals cut to ``nms_post`` and ``max_num`` are the top scored
+    ones."""
+    num_levels = len(cls_scores)
+    mlvl_anchors = [
+        head.anchor_generators[i].grid_anchors(
+            cls_scores[i].size()[-2:],
+            head.anchor_strides[i],
+            device=cls_scores[i].device) for i in range(num_levels)
+    ]
+    result_list = []
+    for img_id, img_meta in enumerate(img_metas):
+        mlvl_proposals = []
+        for level in range(num_levels):
+            cls_score = cls_scores[level][img_id].permute(1, 2, 0)
+            scores = cls_score.reshape(-1).sigmoid()
+            bbox_pred = bbox_preds[level][img_id].permute(1, 2, 0).reshape(
+                -1, 4)
+            obb_pred = obb_preds[level][img_id].permute(1, 2, 0).reshape(
+                -1, 4)
+            anchors = mlvl_anchors[level]
+            if cfg.nms_pre > 0 and scores.shape[0] > cfg.nms_pre:
+                scores, topk_inds = scores.topk(cfg.nms_pre)
+                bbox_pred = bbox_pred[topk_inds]
+                obb_pred = obb_pred[topk_inds]
+                anchors = anchors[topk_inds]
+            proposals = hbbox2rec(
+                delta2bbox(anchors, bbox_pred, head.target_means_hbb,
+                           head.target_stds_hbb))
+            if cfg.min_bbox_size > 0:
+                valid_inds = torch.nonzero(
+                    (proposals[:, 2] >= cfg.min_bbox_size)
+                    & (proposals[:, 3] >= cfg.min_bbox_size)).view(-1)
+                proposals = proposals[valid_inds]
+                obb_pred = obb_pred[valid_inds]
+                scores = scores[valid_inds]
+            proposals = target2poly(proposals, obb_pred,
+                                    img_meta['img_shape'],
+                                    head.target_means_obb,
+                                    head.target_stds_obb)
+            proposals = torch.cat([proposals, scores[:, None]], dim=1)
+            proposals, _ = poly_nms(proposals, cfg.nms_thr)
+            mlvl_proposals.append(_topk(proposals, cfg.nms_post))
+        proposals = torch.cat(mlvl_proposals)
+        if cfg.nms_across_levels:
+            proposals, _ = poly_nms(proposals, cfg.nms_thr)
+        result_list.append(_topk(proposals, cfg.max_num))
+    return result_list
+
+
+def _topk(proposals, k):
+    _, inds = proposals[:, 8].sort(descending=True)
+    return proposals[inds[:k]]
+
+
+@pytest.mark.parametrize('min_bbox_size', [0, 12])
+@pytest.mark.parametrize('nms_across_levels', [False, True])
+def test_aorpn_head_get_bboxes(min_bbox_size, nms_across_levels):
+    head = AO_RPNHead(
+        num_classes=2,
+        in_channels=4,
+        feat_channels=4,
+        anchor_scales=[4],
+        anchor_ratios=[0.5, 1.0, 2.0],
+        anchor_strides=[4, 8, 16],
+        target_stds_hbb=(0.5, 0.5, 0.5, 0.5),
+        target_stds_obb=(0.5, 0.5, 0.5, 0.5))
+    # the images of the batch have different shapes
+    img_metas = [
+        dict(img_shape=(96, 80, 3), scale_factor=1.0),
+        dict(img_shape=(64, 96, 3), scale_factor=1.0),
+        dict(img_shape=(96, 96, 3), scale_factor=1.0),
+    ]
+    cfg = mmcv.Config(
+        dict(
+            nms_across_levels=nms_across_levels,
+            nms_pre=200,
+            nms_post=60,
+            max_num=100,
+            nms_thr=0.5,
+            min_bbox_size=min_bbox_size))
+    torch.manual_seed(0)
+    cls_scores, bbox_preds, obb_preds = [], [], []
+    for size in [24, 12, 6]:
+        cls_scores.append(torch.randn(len(img_metas), 3, size, size))
+        bbox_preds.append(torch.randn(len(img_metas), 12, size, size))
+        obb_preds.append(torch.randn(len(img_metas), 12, size, size))
+
+    result_list = head.get_bboxes(cls_scores, bbox_preds, obb_preds,
+                                  img_metas, cfg)
+    expected_list = _get_bboxes_loop(head, cls_scores, bbox_preds, obb_preds,
+                                     img_metas, cfg)
+    assert len(result_list) == len(expected_list)
+    for proposals, expected in zip(result_list, expected_list):
+        assert 0 < len(proposals) <= cfg.max_num
+        # the proposals of each image are sorted by score
+        assert (proposals[1:, 8] <= proposals[:-1, 8]).all()
+        assert torch.allclose(proposals, _topk(expected, cfg.max_num))
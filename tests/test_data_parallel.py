@@ -0,0 +1,33 @@
+"""
+CommandLine:
+    pytest tests/test_data_parallel.py
+"""
+import torch
+import torch.nn as nn
+from mmcv.parallel import DataContainer, collate
+
+from mmdet.core import CPUDataParallel, scatter_cpu
+
+
+class _Echo(nn.Module):
+
+    def forward(self, return_loss=True, **kwargs):
+        return kwargs
+
+
+def test_cpu_data_parallel():
+    samples = [
+        dict(
+            img=[DataContainer(torch.rand(3, 8, 8), stack=True)],
+            img_meta=[DataContainer(dict(id=i), cpu_only=True)])
+        for i in range(2)
+    ]
+    data = collate(samples, samples_per_gpu=2)
+
+    unwrapped = scatter_cpu(data)
+    assert unwrapped['img'][0].shape == (2, 3, 8, 8)
+    assert unwrapped['img_meta'][0] == [dict(id=0), dict(id=1)]
+
+    outputs = CPUDataParallel(_Echo())(return_loss=False, **data)
+    assert torch.equal(outputs['img'][0], unwrapped['img'][0])
+    assert not outputs['img'][0].is_cuda
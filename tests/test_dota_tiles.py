@@ -0,0 +1,114 @@
+"""
+CommandLine:
+    pytest tests/test_dota_tiles.py
+"""
+import os.path as osp
+import pickle
+
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip('cv2')
+pytest.importorskip('shapely')
+
+from mmdet.datasets import DOTADatasetCoco, DOTADatasetTiles  # noqa: E402
+from mmdet.datasets.pipelines import LoadTileFromScene  # noqa: E402
+
+
+def _write_scenes(tmpdir):
+    images = tmpdir.mkdir('src').mkdir('images')
+    labels = tmpdir.join('src').mkdir('labelTxt')
+    rng = np.random.RandomState(0)
+    for i, (name, h, w) in enumerate([('P0000', 300, 280),
+                                      ('P0001', 150, 420)]):
+        img = rng.randint(0, 256, (h, w, 3)).astype(np.uint8)
+        cv2.imwrite(str(images.join(name + '.png')), img)
+        lines = []
+        for j in range(40):
+            x, y = rng.randint(0, w - 20), rng.randint(0, h - 20)
+            dx, dy = rng.randint(3, 80, 2)
+            lines.append('{} {} {} {} {} {} {} {} {} {}\n'.format(
+                x, y, x + dx, y, x + dx + 5, y + dy, x, y + dy,
+                ['plane', 'ship'][j % 2], j % 3 % 2))
+        labels.join(name + '.txt').write(''.join(lines))
+
+
+def _anns(dataset):
+    anns = {}
+    for i, img_info in enumerate(dataset.img_infos):
+        ann = dataset.get_ann_info(i)
+        anns[img_info['filename']] = (img_info['width'], img_info['height'],
+                                      ann['bboxes'].tolist(),
+                                      ann['labels'].tolist(),
+                                      np.array(ann['masks']).tolist())
+    return anns
+
+
+@pytest.mark.parametrize('padding', [True, False])
+def test_dota_dataset_tiles(tmpdir, monkeypatch, padding):
+    monkeypatch.syspath_prepend(
+        osp.join(osp.dirname(osp.dirname(__file__)), 'DOTA_devkit'))
+    from ImgSplit_multi_process import splitbase
+    from DOTA2COCO import DOTA2COCOTrain
+
+    _write_scenes(tmpdir)
+    out = tmpdir.join('out')
+    splitter = splitbase(
+        str(tmpdir.join('src')), str(out), gap=50, subsize=200,
+        num_process=1, padding=padding)
+    splitter.splitdata(1)
+    splitter.splitdata(0.5)
+    splitter.pool.close()
+    DOTA2COCOTrain(str(out), str(out.join('coco.json')),
+                   list(DOTADatasetCoco.CLASSES))
+    expected = DOTADatasetCoco(
+        ann_file=str(out.join('coco.json')),
+        img_prefix=str(out.join('images')),
+        pipeline=[])
+
+    dataset = DOTADatasetTiles(
+        ann_file=str(tmpdir.join('src', 'labelTxt')),
+        img_prefix=str(tmpdir.join('src', 'images')),
+        pipeline=[dict(type='LoadTileFromScene')],
+        subsize=200,
+        gap=50,
+        rates=(1, 0.5),
+        padding=padding)
+    assert tmpdir.join('src', 'images_raw', 'P0001__0.5__.npy').check()
+    assert _anns(dataset) == _anns(expected)
+
+    # the patches are the ones of the split
+    dataset = pickle.loads(pickle.dumps(dataset))
+    for i, img_info in enumerate(dataset.img_infos):
+        results = dataset[i]
+        patch = cv2.imread(str(out.join('images', img_info['filename'])))
+        assert np.array_equal(results['img'], patch)
+        assert results['img_shape'] == patch.shape
+
+    # all the patches are listed in test mode
+    dataset = DOTADatasetTiles(
+        ann_file=None,
+        img_prefix=str(tmpdir.join('src', 'images')),
+        pipeline=[dict(type='LoadTileFromScene', to_float32=True)],
+        subsize=200,
+        gap=50,
+        padding=padding,
+        test_mode=True)
+    assert sorted(img_info['filename'] for img_info in dataset.img_infos) \
+        == sorted(path.basename for path in out.join('images').listdir()
+                  if path.basename.split('__')[1] == '1')
+    assert dataset[0]['img'].dtype == np.float32
+
+
+def test_load_tile_from_scene():
+    scene = np.arange(5 * 7 * 3, dtype=np.uint8).reshape(5, 7, 3)
+    results = dict(
+        img_prefix=None,
+        scene=scene,
+        img_info=dict(filename='P0000__1__4___2.png', left=4, up=2, width=4,
+                      height=4))
+    results = LoadTileFromScene()(results)
+    assert 'scene' not in results
+    assert results['img'].shape == (4, 4, 3)
+    assert np.array_equal(results['img'][:3, :3], scene[2:, 4:])
+    assert not results['img'][3:].any() and not results['img'][:, 3:].any()
@@ -5,6 +5,7 @@ import copy
 from os.path import dirname, exists, join
 
 import numpy as np
+import pytest
 import torch
 
 
@@ -168,6 +169,45 @@ def test_retina_ghm_forward():
                 batch_results.append(result)
 
 
+def test_mrdet_batched_forward():
+    model, train_cfg, test_cfg = _get_detector_cfg(
+        'mrdet/mrdet_r101_fpn_2x_dota.py')
+    model['pretrained'] = None
+    # a lighter backbone, the test is about the batch of the heads
+    model['backbone']['depth'] = 18
+    model['neck']['in_channels'] = [64, 128, 256, 512]
+    # few proposals, the scores of the random heads are close to ties
+    test_cfg.rpn.update(nms_pre=100, nms_post=100, max_num=100)
+
+    from mmdet.models import build_detector
+    detector = build_detector(model, train_cfg=train_cfg, test_cfg=test_cfg)
+    detector.eval()
+
+    mm_inputs = _demo_mm_inputs((2, 3, 128, 128))
+    imgs = mm_inputs.pop('imgs')
+    img_metas = mm_inputs.pop('img_metas')
+    with torch.no_grad():
+        batch_results = detector.forward([imgs], [img_metas],
+                                         return_loss=False, batched=True)
+        assert len(batch_results) == 2
+        for i, batch_result in enumerate(batch_results):
+            result = detector.forward([imgs[i:i + 1]], [img_metas[i:i + 1]],
+                                      return_loss=False)
+            assert len(result) == len(batch_result)
+            for cls_result, cls_batch_result in zip(result, batch_result):
+                assert np.allclose(cls_result, cls_batch_result, atol=1e-3)
+            # a single image still gives a list with its results
+            result = detector.forward([imgs[i:i + 1]], [img_metas[i:i + 1]],
+                                      return_loss=False, batched=True)
+            assert len(result) == 1 and len(result[0]) == len(batch_result)
+
+        # the inputs are still checked
+        with pytest.raises(TypeError):
+            detector.forward(imgs, img_metas, return_loss=False, batched=True)
+        with pytest.raises(AssertionError):
+            detector.forward([imgs], [img_metas], return_loss=False)
+
+
 def _demo_mm_inputs(input_shape=(1, 3, 300, 300),
                     num_items=None, num_classes=10):  # yapf: disable
     """
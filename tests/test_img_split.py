@@ -0,0 +1,58 @@
+"""
+CommandLine:
+    pytest tests/test_img_split.py
+"""
+import os.path as osp
+
+import numpy as np
+import pytest
+
+pytest.importorskip('cv2')
+pytest.importorskip('shapely')
+
+
+def test_savepatches(tmpdir, monkeypatch):
+    monkeypatch.syspath_prepend(
+        osp.join(osp.dirname(osp.dirname(__file__)), 'DOTA_devkit'))
+    from ImgSplit_multi_process import splitbase
+
+    tmpdir.mkdir('src')
+    splitter = splitbase(
+        str(tmpdir.join('src')), str(tmpdir.join('out')), subsize=100,
+        num_process=1, num_threads=0)
+    splitter.pool.close()
+    objects = [
+        # within the patch
+        dict(poly=[60, 60, 80, 60, 80, 80, 60, 80], name='a', difficult='0'),
+        # mostly in the patch
+        dict(poly=[90, 60, 160, 60, 160, 70, 90, 70], name='b', difficult='1'),
+        # outside of it
+        dict(poly=[200, 60, 210, 60, 210, 70, 200, 70], name='c',
+             difficult='0'),
+        # degenerate
+        dict(poly=[70, 70, 70, 70, 70, 70, 70, 70], name='d', difficult='0'),
+        # half in the patch
+        dict(poly=[99, 20, 159, 20, 159, 30, 99, 30], name='e', difficult='0'),
+    ]
+    img = np.zeros((150, 200, 3), dtype=np.uint8)
+    objindex = splitter.indexobjects(objects)
+    assert list(objindex['valid']) == [True, True, True, False, True]
+
+    splitter.savepatches(img, objects, 'P0000__1__50___50', 50, 50, 149, 149,
+                         objindex)
+    lines = tmpdir.join('out', 'labelTxt',
+                        'P0000__1__50___50.txt').read().splitlines()
+    assert lines == [
+        '10.0 10.0 30.0 10.0 30.0 30.0 10.0 30.0 a 0',
+        '40.0 10.0 99.0 10.0 99.0 20.0 40.0 20.0 b 1'
+    ]
+    # the objects are indexed when they are not given
+    splitter.savepatches(img, objects, 'P0000__1__100___0', 100, 0, 199, 99)
+    lines = tmpdir.join('out', 'labelTxt',
+                        'P0000__1__100___0.txt').read().splitlines()
+    assert [line.split()[-2:] for line in lines] == [['b', '1'], ['e', '0']]
+    assert tmpdir.join('out', 'images', 'P0000__1__100___0.png').check()
+
+    objindex = splitter.indexobjects([])
+    splitter.savepatches(img, [], 'P0000__1__0___0', 0, 0, 99, 99, objindex)
+    assert tmpdir.join('out', 'labelTxt', 'P0000__1__0___0.txt').read() == ''
@@ -0,0 +1,45 @@
+"""
+CommandLine:
+    pytest tests/test_max_iou_assigner.py
+"""
+import numpy as np
+import torch
+
+from mmdet.core.bbox.assigners import MaxIoUAssigner
+
+
+def _random_bboxes(num, rng, span=200, max_size=40):
+    xy = rng.randint(0, span, size=(num, 2))
+    wh = rng.randint(1, max_size, size=(num, 2))
+    return torch.from_numpy(np.concatenate([xy, xy + wh], axis=1)).float()
+
+
+def test_max_iou_assigner_chunked():
+    rng = np.random.RandomState(0)
+    bboxes = _random_bboxes(1000, rng)
+    # duplicated anchors make several bboxes share the max iou of a gt
+    bboxes = torch.cat([bboxes, bboxes[:100]])
+    gt_bboxes = _random_bboxes(30, rng)
+    gt_bboxes[1] = gt_bboxes[0]
+    gt_bboxes_ignore = _random_bboxes(5, rng)
+    gt_labels = torch.arange(1, 31)
+
+    for gt_max_assign_all in [True, False]:
+        for ignore_wrt_candidates in [True, False]:
+            cfg = dict(
+                pos_iou_thr=0.5,
+                neg_iou_thr=0.3,
+                min_pos_iou=0.1,
+                gt_max_assign_all=gt_max_assign_all,
+                ignore_iof_thr=0.5,
+                ignore_wrt_candidates=ignore_wrt_candidates)
+            expected = MaxIoUAssigner(**cfg).assign(
+                bboxes, gt_bboxes, gt_bboxes_ignore, gt_labels)
+            for chunk_size in [1, 64, 999]:
+                result = MaxIoUAssigner(
+                    chunk_size=chunk_size, **cfg).assign(
+                        bboxes, gt_bboxes, gt_bboxes_ignore, gt_labels)
+                assert result.num_gts == expected.num_gts
+                assert torch.equal(result.gt_inds, expected.gt_inds)
+                assert torch.equal(result.max_overlaps, expected.max_overlaps)
+                assert torch.equal(result.labels, expected.labels)
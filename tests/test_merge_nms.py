@@ -0,0 +1,69 @@
+"""
+CommandLine:
+    pytest tests/test_merge_nms.py
+"""
+import numpy as np
+import pytest
+
+from mmdet.core.bbox.demodata import random_rbboxes
+
+pytest.importorskip('DOTA_devkit.polyiou')
+from DOTA_devkit.nms import (  # noqa: E402
+    py_cpu_nms_poly_fast, py_cpu_nms_poly_grid)
+
+
+def _random_dets(rng, num_dets, span=1000):
+    return np.concatenate([
+        random_rbboxes(num_dets, span=span, size_range=(5, 65), rng=rng),
+        rng.rand(num_dets, 1)
+    ], axis=1)
+
+
+def test_py_cpu_nms_poly_grid():
+    rng = np.random.RandomState(0)
+    dets = _random_dets(rng, 500)
+    # the same objects detected again in an overlapping patch
+    dets = np.concatenate([dets, dets + np.append(rng.rand(8) * 3, 0)])
+
+    for thresh in [0.1, 0.5]:
+        keep = py_cpu_nms_poly_grid(dets, thresh)
+        assert list(keep) == list(py_cpu_nms_poly_fast(dets, thresh))
+        # the cell size only changes the speed
+        keep = py_cpu_nms_poly_grid(dets, thresh, cell_size=7)
+        assert list(keep) == list(py_cpu_nms_poly_fast(dets, thresh))
+
+    assert py_cpu_nms_poly_grid(dets[:0], 0.1) == []
+
+
+def test_mergebypoly_arrays(tmpdir):
+    from DOTA_devkit.ResultMerge_multi_process import (mergebypoly_arrays,
+                                                       mergesingle)
+    rng = np.random.RandomState(0)
+    subnames = ['P0000__1__0___0.png', 'P0000__1__824___0.png',
+                'P0001__0.5__0___0.png']
+    classes = ['plane', 'ship']
+    num_dets = 300
+    image_ids = rng.randint(0, len(subnames), num_dets)
+    class_ids = rng.randint(0, len(classes), num_dets)
+    dets = _random_dets(rng, num_dets, span=300)
+    # the values as they are read back from the result files
+    dets = np.array([list(map(float, map(str, det))) for det in dets])
+
+    mergebypoly_arrays(str(tmpdir.join('arrays')), subnames, classes,
+                       image_ids, class_ids, dets)
+
+    # the same detections merged from the result files
+    tmpdir.mkdir('text')
+    for i, cls in enumerate(classes):
+        srcfile = str(tmpdir.join(cls + '.txt'))
+        with open(srcfile, 'w') as f:
+            for image_id, det in zip(image_ids[class_ids == i],
+                                     dets[class_ids == i]):
+                f.write(subnames[image_id] + ' ' + str(det[-1]) + ' ' +
+                        ' '.join(map(str, det[:-1])) + '\n')
+        mergesingle(str(tmpdir.join('text')), py_cpu_nms_poly_fast, 0.1,
+                    srcfile)
+        merged = sorted(tmpdir.join('arrays', cls + '.txt').readlines())
+        expected = sorted(tmpdir.join('text', cls + '.txt').readlines())
+        assert len(merged) > 0
+        assert merged == expected
@@ -0,0 +1,54 @@
+"""
+CommandLine:
+    pytest tests/test_mrdet_aug_feats.py
+"""
+import pytest
+import torch
+
+from mmdet.models.detectors import MRDet
+
+
+class _Cfg(dict):
+
+    def __getattr__(self, name):
+        return self[name]
+
+
+class _StubDetector(object):
+    """Just what MRDet.aug_test_feats uses, counting the feature passes."""
+
+    def __init__(self, aug_feats):
+        self.test_cfg = _Cfg(rpn=None, aug_feats=aug_feats)
+        self.num_extracted = 0
+
+    def extract_feats(self, imgs):
+        for img in imgs:
+            self.num_extracted += 1
+            yield (img * 2, img * 3)
+
+    def aug_test_rotate_rpn(self, feats, img_metas, rpn_test_cfg):
+        return [sum(x[0].sum() for x in feats)]
+
+
+@pytest.mark.parametrize('policy,num_extracted', [('recompute', 4),
+                                                  ('keep', 2),
+                                                  ('half', 2)])
+def test_aug_test_feats(policy, num_extracted):
+    imgs = [torch.rand(1, 3, 8, 8), torch.rand(1, 3, 8, 8)]
+    detector = _StubDetector(policy)
+    proposal_list, feats = MRDet.aug_test_feats(detector, imgs, [None, None])
+    feats = list(feats)
+    assert detector.num_extracted == num_extracted
+    assert len(feats) == len(imgs)
+    for x, img in zip(feats, imgs):
+        assert x[0].dtype == torch.float32
+        # half precision keeps about 3 significant digits
+        tol = 1e-2 if policy == 'half' else 0
+        assert torch.allclose(x[0], img * 2, rtol=tol, atol=0)
+        assert torch.allclose(x[1], img * 3, rtol=tol, atol=0)
+
+
+def test_aug_test_feats_invalid():
+    detector = _StubDetector('float16')
+    with pytest.raises(ValueError):
+        MRDet.aug_test_feats(detector, [], [])
@@ -0,0 +1,40 @@
+"""
+CommandLine:
+    pytest tests/test_patch_writer.py
+"""
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip('cv2')
+from DOTA_devkit.patch_writer import PatchWriter  # noqa: E402
+
+
+@pytest.mark.parametrize('num_threads', [0, 2])
+def test_patch_writer(tmpdir, num_threads):
+    rng = np.random.RandomState(0)
+    img = rng.randint(0, 256, (300, 250, 3)).astype(np.uint8)
+    subsize = 128
+    crops = [(0, 0), (200, 0), (0, 180), (200, 180), (64, 64)]
+    with PatchWriter(subsize, num_threads=num_threads,
+                     max_pending=2) as writer:
+        for left, up in crops:
+            writer.write(img[up:up + subsize, left:left + subsize],
+                         str(tmpdir.join('{}_{}.png'.format(left, up))))
+    with PatchWriter(subsize, padding=False,
+                     num_threads=num_threads) as writer:
+        writer.write(img[180:, 200:], str(tmpdir.join('nopad.png')))
+
+    for left, up in crops:
+        # the patches written by the float64 canvas before
+        crop = img[up:up + subsize, left:left + subsize]
+        expected = np.zeros((subsize, subsize, 3))
+        expected[:crop.shape[0], :crop.shape[1]] = crop
+        patch = cv2.imread(str(tmpdir.join('{}_{}.png'.format(left, up))))
+        assert np.array_equal(patch, expected.astype(np.uint8))
+    assert np.array_equal(cv2.imread(str(tmpdir.join('nopad.png'))),
+                          img[180:, 200:])
+
+    with pytest.raises(IOError):
+        with PatchWriter(subsize, num_threads=num_threads) as writer:
+            writer.write(img[:subsize, :subsize],
+                         str(tmpdir.join('missing', 'patch.png')))
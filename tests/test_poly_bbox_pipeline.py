@@ -0,0 +1,62 @@
+"""
+CommandLine:
+    pytest tests/test_poly_bbox_pipeline.py
+"""
+import numpy as np
+
+from mmdet.datasets.pipelines import (LoadAnnotations, RandomFlip, Resize,
+                                      RotateAugmentation)
+
+
+def _poly_area(rbboxes):
+    x, y = rbboxes[:, 0::2], rbboxes[:, 1::2]
+    return 0.5 * (x * np.roll(y, -1, axis=1) -
+                  np.roll(x, -1, axis=1) * y).sum(1)
+
+
+def _results():
+    masks = [[[10., 10., 50., 10., 50., 30., 10., 30.]],
+             [[60., 40., 80., 60., 60., 80., 40., 60.]]]
+    return dict(
+        img=np.zeros((100, 120, 3), dtype=np.uint8),
+        img_shape=(100, 120, 3),
+        img_info=dict(filename='test.png', height=100, width=120),
+        img_prefix=None,
+        ann_info=dict(
+            bboxes=np.array([[10, 10, 50, 30], [40, 40, 80, 80]],
+                            dtype=np.float32),
+            labels=np.array([1, 7], dtype=np.int64),
+            masks=masks),
+        bbox_fields=[],
+        mask_fields=[],
+        rbbox_fields=[])
+
+
+def test_load_poly_bboxes():
+    results = LoadAnnotations(with_poly_bbox=True)(_results())
+    assert 'gt_masks' not in results
+    assert results['rbbox_fields'] == ['gt_rbboxes']
+    gt_rbboxes = results['gt_rbboxes']
+    assert gt_rbboxes.shape == (2, 8) and gt_rbboxes.dtype == np.float32
+    assert np.allclose(np.abs(_poly_area(gt_rbboxes)), [800., 800.])
+
+
+def test_poly_bbox_transforms():
+    results = LoadAnnotations(with_poly_bbox=True)(_results())
+    area = _poly_area(results['gt_rbboxes'])
+
+    results['flip'] = True
+    results = RandomFlip(flip_ratio=0.5)(results)
+    # flipping keeps the orientation of the polygons
+    assert np.allclose(_poly_area(results['gt_rbboxes']), area)
+    assert np.allclose(results['gt_rbboxes'][:, 0::2].min(1),
+                       120 - 1 - np.array([50., 80.]))
+
+    results['scale'] = (240, 200)
+    results = Resize(img_scale=(240, 200), keep_ratio=True)(results)
+    assert np.allclose(_poly_area(results['gt_rbboxes']), area * 4)
+
+    results = RotateAugmentation(rotate_ratio=1, small_filter=0)(results)
+    assert results['gt_rbboxes'].shape == (2, 8)
+    assert np.allclose(_poly_area(results['gt_rbboxes']), area * 4, rtol=1e-4)
+    assert results['gt_bboxes'].shape == (2, 4)
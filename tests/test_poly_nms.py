@@ -0,0 +1,188 @@
+"""
+CommandLine:
+    pytest tests/test_poly_nms.py
+"""
+import numpy as np
+import torch
+
+from mmdet.core.bbox.demodata import random_rbboxes
+from mmdet.core.post_processing.bbox_nms import (
+    multiclass_poly_nms_8_points, multiclass_poly_nms_candidates,
+    select_multiclass_candidates)
+from mmdet.ops.poly_nms.poly_nms_wrapper import batched_poly_nms, poly_nms
+
+
+def _base_dets():
+    # two heavily overlapping squares, one rotated square far away and one
+    # square whose horizontal box overlaps the first one but whose polygon
+    # barely does
+    return np.array([[0., 0., 10., 0., 10., 10., 0., 10., 0.9],
+                     [1., 0., 11., 0., 11., 10., 1., 10., 0.8],
+                     [30., 25., 35., 30., 30., 35., 25., 30., 0.7],
+                     [10., 5., 15., 10., 10., 15., 5., 10., 0.6]])
+
+
+def test_poly_nms_device_and_dtypes_cpu():
+    """
+    CommandLine:
+        xdoctest -m tests/test_poly_nms.py test_poly_nms_device_and_dtypes_cpu
+    """
+    iou_thr = 0.5
+    base_dets = _base_dets()
+
+    # CPU can handle float32 and float64
+    dets = base_dets.astype(np.float32)
+    supressed, inds = poly_nms(dets, iou_thr)
+    assert dets.dtype == supressed.dtype
+    assert isinstance(inds, np.ndarray)
+    assert inds.tolist() == [0, 2, 3]
+
+    dets = torch.FloatTensor(base_dets)
+    surpressed, inds = poly_nms(dets, iou_thr)
+    assert dets.dtype == surpressed.dtype
+    assert inds.tolist() == [0, 2, 3]
+
+    dets = base_dets.astype(np.float64)
+    supressed, inds = poly_nms(dets, iou_thr)
+    assert dets.dtype == supressed.dtype
+    assert inds.tolist() == [0, 2, 3]
+
+    dets = torch.DoubleTensor(base_dets)
+    surpressed, inds = poly_nms(dets, iou_thr)
+    assert dets.dtype == surpressed.dtype
+    assert inds.tolist() == [0, 2, 3]
+
+    # empty input
+    dets = torch.zeros((0, 9))
+    surpressed, inds = poly_nms(dets, iou_thr)
+    assert len(inds) == len(surpressed) == 0
+
+
+def test_batched_poly_nms():
+    iou_thr = 0.5
+    dets = torch.FloatTensor(np.concatenate([_base_dets()] * 3))
+    idxs = torch.LongTensor([0] * 4 + [2] * 4 + [1] * 4)
+
+    # the groups are suppressed independently
+    kept, inds = batched_poly_nms(dets, idxs, iou_thr)
+    assert sorted(inds.tolist()) == [0, 2, 3, 4, 6, 7, 8, 10, 11]
+    assert torch.equal(kept, dets[inds])
+
+    # a single group is plain poly_nms
+    _, inds = batched_poly_nms(dets[:4], idxs[:4], iou_thr)
+    assert inds.tolist() == poly_nms(dets[:4], iou_thr)[1].tolist()
+
+    kept, inds = batched_poly_nms(dets[:0], idxs[:0], iou_thr)
+    assert len(kept) == len(inds) == 0
+
+
+def test_multiclass_poly_nms_batched():
+    rng = np.random.RandomState(0)
+    num_dets, num_classes = 200, 4
+    base = np.tile(_base_dets()[:, :8], (num_dets // 4, 1))
+    base += rng.rand(*base.shape) * 2 + np.repeat(
+        rng.rand(num_dets // 4, 1) * 100, 4, axis=0)
+    multi_bboxes = torch.from_numpy(
+        np.tile(base, (1, num_classes)) + rng.rand(num_dets, 8 * num_classes))
+    multi_scores = torch.from_numpy(rng.rand(num_dets, num_classes))
+
+    for max_num in [1000, 50]:
+        bboxes, labels = multiclass_poly_nms_8_points(
+            multi_bboxes, multi_scores, 0.3,
+            dict(type='poly_nms', iou_thr=0.2), max_num)
+        bboxes_b, labels_b = multiclass_poly_nms_8_points(
+            multi_bboxes, multi_scores, 0.3,
+            dict(type='poly_nms', iou_thr=0.2, batched=True), max_num)
+        assert len(bboxes_b) == len(bboxes) <= max_num
+        _, inds = bboxes[:, -1].sort(descending=True)
+        _, inds_b = bboxes_b[:, -1].sort(descending=True)
+        assert torch.allclose(bboxes[inds], bboxes_b[inds_b])
+        assert torch.equal(labels[inds], labels_b[inds_b])
+
+
+def test_multiclass_poly_nms_candidates():
+    rng = np.random.RandomState(0)
+    num_dets, num_classes = 200, 4
+    base = np.tile(_base_dets()[:, :8], (num_dets // 4, 1))
+    base += np.repeat(rng.rand(num_dets // 4, 1) * 100, 4, axis=0)
+    multi_bboxes = torch.from_numpy(
+        np.tile(base, (1, num_classes)) + rng.rand(num_dets, 8 * num_classes))
+    multi_scores = torch.from_numpy(rng.rand(num_dets, num_classes))
+
+    bbox_inds, labels, scores = select_multiclass_candidates(multi_scores, 0.3)
+    assert (labels[1:] >= labels[:-1]).all()
+    assert torch.equal(scores, multi_scores[bbox_inds, labels + 1])
+
+    # decoding only the candidates gives the same detections
+    bboxes = multi_bboxes.reshape(num_dets, -1, 8)[bbox_inds, labels + 1]
+    for batched in [False, True]:
+        nms_cfg = dict(type='poly_nms', iou_thr=0.2, batched=batched)
+        dets, det_labels = multiclass_poly_nms_candidates(
+            bboxes, scores, labels, nms_cfg, 50)
+        expected, expected_labels = multiclass_poly_nms_8_points(
+            multi_bboxes, multi_scores, 0.3, nms_cfg, 50)
+        assert torch.equal(dets, expected)
+        assert torch.equal(det_labels, expected_labels)
+
+    # the top nms_pre candidates of each class, still in box order
+    bbox_inds, labels, scores = select_multiclass_candidates(
+        multi_scores, 0.3, nms_pre=20)
+    for i in range(num_classes - 1):
+        cls_inds = labels == i
+        assert cls_inds.sum() == 20
+        assert (bbox_inds[cls_inds][1:] > bbox_inds[cls_inds][:-1]).all()
+        assert torch.equal(scores[cls_inds].sort()[0],
+                           multi_scores[:, i + 1].topk(20)[0].sort()[0])
+
+
+def test_poly_nms_cpu_gpu_consistency():
+    """
+    CommandLine:
+        xdoctest -m tests/test_poly_nms.py test_poly_nms_cpu_gpu_consistency
+    """
+    if not torch.cuda.is_available():
+        import pytest
+        pytest.skip('test requires GPU and torch+cuda')
+
+    rng = np.random.RandomState(0)
+    num_dets = 500
+    dets = np.concatenate([
+        random_rbboxes(num_dets, span=300, size_range=(5, 65), rng=rng),
+        rng.rand(num_dets, 1)
+    ], axis=1).astype(np.float32)
+
+    for iou_thr in [0.1, 0.5, 0.7]:
+        _, inds_cpu = poly_nms(dets, iou_thr)
+        _, inds_gpu = poly_nms(dets, iou_thr, device_id=0)
+        assert np.array_equal(inds_cpu, inds_gpu)
+
+
+def test_poly_nms_cpu_gpu_disjoint_hbbs():
+    """The pairs whose horizontal boxes are disjoint or only touch."""
+    dets = np.array([
+        [0, 0, 10, 0, 10, 10, 0, 10, 0.9],
+        # touching the first one along an edge, at a corner
+        [10, 0, 20, 0, 20, 10, 10, 10, 0.8],
+        [10, 10, 20, 10, 20, 20, 10, 20, 0.7],
+        # disjoint
+        [40, 0, 50, 0, 50, 10, 40, 10, 0.6],
+        # diamonds whose horizontal boxes overlap but not the polygons
+        [20, 35, 25, 30, 30, 35, 25, 40, 0.5],
+        [28, 43, 33, 38, 38, 43, 33, 48, 0.4],
+        # degenerate polygons far from each other
+        [100, 100, 100, 100, 100, 100, 100, 100, 0.3],
+        [200, 200, 200, 200, 200, 200, 200, 200, 0.2],
+        # mostly covered by the first one
+        [1, 0, 11, 0, 11, 10, 1, 10, 0.1],
+    ], dtype=np.float32)
+    for iou_thr in [0.01, 0.5]:
+        _, inds_cpu = poly_nms(dets, iou_thr)
+        assert list(inds_cpu) == list(range(8))
+
+    if not torch.cuda.is_available():
+        import pytest
+        pytest.skip('test requires GPU and torch+cuda')
+    for iou_thr in [0.01, 0.5]:
+        _, inds_cpu = poly_nms(dets, iou_thr)
+        _, inds_gpu = poly_nms(dets, iou_thr, device_id=0)
+        assert np.array_equal(inds_cpu, inds_gpu)
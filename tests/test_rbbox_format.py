@@ -0,0 +1,48 @@
+"""
+CommandLine:
+    pytest tests/test_rbbox_format.py
+"""
+import numpy as np
+
+from mmdet.core.evaluation.rbbox_format import rbboxes2lines, rbboxes2text
+
+
+def _str_lines(filenames, rbboxes, int_points=False):
+    lines = []
+    for filename, rbbox in zip(filenames, rbboxes):
+        poly = rbbox[:-1].astype(np.int64) if int_points else rbbox[:-1]
+        lines.append(filename + ' ' + str(float(rbbox[-1])) + ' ' +
+                     ' '.join(map(str, poly)))
+    return lines
+
+
+def test_rbboxes2lines():
+    rng = np.random.RandomState(0)
+    values = np.concatenate([
+        rng.rand(4000) * 2048 - 512,
+        10**rng.uniform(-6, 8, 4000),
+        # ties, powers of two and the values str() prints in scientific
+        # notation
+        np.arange(1000, 1001, 1 / 64),
+        2.0**np.arange(-20, 24),
+        [0, -0.0, 1e-4, 2e-4, 1e6, 9e5, 1e7, np.inf, -np.inf, np.nan],
+    ]).astype(np.float32)
+    values = np.concatenate([values, -values])
+    values = values[:len(values) // 9 * 9]
+    rbboxes = rng.permutation(values).reshape(-1, 9)
+    filenames = ['P{:04d}__1__0___0'.format(i) for i in range(len(rbboxes))]
+
+    assert rbboxes2lines(filenames, rbboxes) == _str_lines(filenames, rbboxes)
+
+    # the points as ints, as in write_dota_results
+    finite = rbboxes[np.isfinite(rbboxes).all(axis=1)]
+    lines = _str_lines(filenames, finite, int_points=True)
+    assert rbboxes2text(filenames[:len(finite)], finite,
+                        int_points=True) == ''.join(
+                            line + '\n' for line in lines)
+
+    # float64 results
+    assert rbboxes2lines(filenames[:10], rbboxes[:10].astype(
+        np.float64)) == _str_lines(filenames, rbboxes[:10].astype(np.float64))
+    assert rbboxes2lines([], np.zeros((0, 9), dtype=np.float32)) == []
+    assert rbboxes2text([], np.zeros((0, 9), dtype=np.float32)) == ''
@@ -0,0 +1,47 @@
+"""
+CommandLine:
+    pytest tests/test_rbbox_overlaps.py
+"""
+import numpy as np
+import torch
+
+from mmdet.core.bbox.demodata import random_rbboxes
+from mmdet.core.bbox.geometry import rbbox_overlaps, rbbox_overlaps_batched
+
+
+def _random_rbboxes(num, rng, span=200):
+    rbboxes = random_rbboxes(num, span=span, rng=rng)
+    # mix clockwise and counter-clockwise vertex orders
+    rbboxes[::2] = rbboxes[::2].reshape(-1, 4, 2)[:, ::-1].reshape(-1, 8)
+    return torch.from_numpy(rbboxes).float()
+
+
+def test_rbbox_overlaps_batched():
+    rng = np.random.RandomState(0)
+    rbboxes1 = _random_rbboxes(40, rng)
+    rbboxes2 = _random_rbboxes(30, rng)
+    rbboxes2[0] = rbboxes1[0]
+
+    expected = rbbox_overlaps(rbboxes1, rbboxes2)
+    ious = rbbox_overlaps_batched(rbboxes1, rbboxes2)
+    assert ious.shape == (40, 30)
+    assert ious.dtype == rbboxes1.dtype
+    assert (expected > 0).any()
+    assert torch.allclose(ious, expected, atol=1e-5)
+    assert torch.allclose(ious[0, 0], torch.tensor(1.))
+
+    # chunking must not change the result
+    ious = rbbox_overlaps_batched(rbboxes1, rbboxes2, chunk_size=7)
+    assert torch.allclose(ious, expected, atol=1e-5)
+
+    # empty input
+    ious = rbbox_overlaps_batched(rbboxes1[:0], rbboxes2)
+    assert ious.shape == (0, 30)
+
+
+def test_rbbox_overlaps_batched_iof():
+    rbboxes1 = torch.FloatTensor([[0, 0, 10, 0, 10, 10, 0, 10]])
+    rbboxes2 = torch.FloatTensor([[5, 0, 15, 0, 15, 10, 5, 10],
+                                  [-5, -5, 15, -5, 15, 15, -5, 15]])
+    iofs = rbbox_overlaps_batched(rbboxes1, rbboxes2, mode='iof')
+    assert torch.allclose(iofs, torch.FloatTensor([[0.5, 1.0]]))
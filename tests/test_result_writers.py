@@ -0,0 +1,130 @@
+"""
+CommandLine:
+    pytest tests/test_result_writers.py
+"""
+import os.path as osp
+import tempfile
+
+import numpy as np
+
+from mmdet.core.evaluation.result_writers import (DetectionStore,
+                                                  DetectionStoreWriter,
+                                                  Task1ResultWriter,
+                                                  task1_filename)
+
+
+def _random_results(rng, num_imgs, num_classes):
+    results = []
+    for _ in range(num_imgs):
+        result = []
+        for _ in range(num_classes):
+            num = rng.randint(0, 4)
+            rbboxes = np.concatenate(
+                [rng.rand(num, 8) * 1024, rng.rand(num, 1)], axis=1)
+            result.append(rbboxes.astype(np.float32))
+        results.append(result)
+    return results
+
+
+def test_detection_store():
+    rng = np.random.RandomState(0)
+    num_imgs, classes = 7, ['plane', 'ship', 'harbor']
+    img_names = ['P{:04d}.png'.format(i) for i in range(num_imgs)]
+    results = _random_results(rng, num_imgs, len(classes))
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # written by two writers out of image order, as two ranks would, and
+        # in several shards
+        inds = [list(range(0, num_imgs, 2)), list(range(1, num_imgs, 2))]
+        for i, part_inds in enumerate(inds):
+            with DetectionStoreWriter(
+                    tmpdir,
+                    img_names,
+                    classes,
+                    shard_size=4,
+                    prefix='shard_r{}'.format(i),
+                    prefixes=['shard_r0', 'shard_r1']) as writer:
+                for j in range(0, len(part_inds), 2):
+                    writer.write(part_inds[j:j + 2],
+                                 [results[k] for k in part_inds[j:j + 2]])
+        store = DetectionStore.load(tmpdir)
+        assert len(store) == sum(
+            len(rbboxes) for result in results for rbboxes in result)
+        assert store.img_names == img_names and store.classes == classes
+        assert store.polys.dtype == store.scores.dtype == np.float32
+        loaded = store.to_results()
+
+        # a single shard is memory mapped
+        store.select(store.scores > 0.5).dump(osp.join(tmpdir, 'high'))
+        high = DetectionStore.load(osp.join(tmpdir, 'high'))
+        assert isinstance(high.polys, np.memmap)
+        assert np.array_equal(high.dets, store.dets[store.scores > 0.5])
+
+    assert len(loaded) == num_imgs
+    for result, loaded_result in zip(results, loaded):
+        assert len(loaded_result) == len(classes)
+        for rbboxes, loaded_rbboxes in zip(result, loaded_result):
+            assert np.array_equal(rbboxes, loaded_rbboxes)
+
+    store = DetectionStore.from_results(results, img_names, classes)
+    for result, loaded_result in zip(results, store.to_results()):
+        for rbboxes, loaded_rbboxes in zip(result, loaded_result):
+            assert np.array_equal(rbboxes, loaded_rbboxes)
+
+
+def test_detection_store_rerun():
+    rng = np.random.RandomState(0)
+    num_imgs, classes = 6, ['plane', 'ship']
+    img_names = ['P{:04d}.png'.format(i) for i in range(num_imgs)]
+    results = _random_results(rng, num_imgs, len(classes))
+    num_dets = sum(len(rbboxes) for result in results for rbboxes in result)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # a run with two ranks
+        prefixes = ['shard_r0', 'shard_r1']
+        for i, prefix in enumerate(prefixes):
+            with DetectionStoreWriter(
+                    tmpdir, img_names, classes, shard_size=4, prefix=prefix,
+                    prefixes=prefixes) as writer:
+                inds = list(range(i, num_imgs, 2))
+                writer.write(inds, [results[k] for k in inds])
+        assert len(DetectionStore.load(tmpdir)) == num_dets
+
+        # then with a single one, the shards of the two ranks are not loaded
+        with DetectionStoreWriter(tmpdir, img_names, classes,
+                                  shard_size=4) as writer:
+            writer.write(range(num_imgs), results)
+        store = DetectionStore.load(tmpdir)
+        assert len(store) == num_dets
+        for result, loaded_result in zip(results, store.to_results()):
+            for rbboxes, loaded_rbboxes in zip(result, loaded_result):
+                assert np.array_equal(rbboxes, loaded_rbboxes)
+
+        # a writer without detections leaves an empty store
+        DetectionStoreWriter(tmpdir, img_names, classes).close()
+        assert len(DetectionStore.load(tmpdir)) == 0
+
+
+def test_task1_result_writer():
+    rng = np.random.RandomState(0)
+    classes = ['plane', 'ship']
+    img_names = ['P0000__1__0___0.png', 'P0001__1__824___0.png']
+    results = _random_results(rng, len(img_names), len(classes))
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with Task1ResultWriter(tmpdir, classes, img_names,
+                               score_thr=0.5) as writer:
+            for i in range(len(img_names)):
+                writer.write([i], results[i:i + 1])
+        for j, cls in enumerate(classes):
+            with open(task1_filename(tmpdir, cls)) as f:
+                lines = f.read().splitlines()
+            # same lines as OBBDet2Comp4
+            expected = []
+            for img_name, result in zip(img_names, results):
+                for rbbox in result[j]:
+                    if rbbox[-1] > 0.5:
+                        expected.append(' '.join(
+                            [img_name, str(float(rbbox[-1]))] +
+                            list(map(str, rbbox[:-1]))))
+            assert lines == expected
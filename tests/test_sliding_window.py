@@ -0,0 +1,95 @@
+"""
+CommandLine:
+    pytest tests/test_sliding_window.py
+"""
+import mmcv
+import numpy as np
+import pytest
+import torch
+from torch import nn
+
+from mmdet.apis import get_sliding_windows, inference_detector_sliding_window
+
+
+def test_get_sliding_windows():
+    # the last patch of each row and column is aligned with the border
+    assert get_sliding_windows(2000, 1024) == [(0, 0), (824, 0), (976, 0)]
+    windows = get_sliding_windows(2500, 1800, subsize=1024, gap=200)
+    lefts = sorted(set(left for left, _ in windows))
+    ups = sorted(set(up for _, up in windows))
+    assert lefts == [0, 824, 1476]
+    assert ups == [0, 776]
+    assert len(windows) == len(lefts) * len(ups)
+
+    # images smaller than a patch give a single patch
+    assert get_sliding_windows(500, 300) == [(0, 0)]
+
+
+class _SquareDetector(nn.Module):
+    """Detects the pixels brighter than 127 as one box of the first class,
+    and records the patches it sees."""
+
+    CLASSES = ('bright', 'other')
+
+    def __init__(self):
+        super(_SquareDetector, self).__init__()
+        self.cfg = mmcv.Config(
+            dict(
+                data=dict(
+                    test=dict(pipeline=[
+                        dict(type='LoadImageFromFile'),
+                        dict(type='ImageToTensor', keys=['img']),
+                        dict(type='Collect', keys=['img'], meta_keys=()),
+                    ]))))
+        self.weight = nn.Parameter(torch.zeros(1))
+        self.patches = []
+
+    def forward(self, img, img_meta, return_loss=True, rescale=False,
+                batched=False):
+        assert batched
+        results = []
+        for patch in img:
+            patch = patch.permute(1, 2, 0).numpy()
+            self.patches.append(patch)
+            ys, xs = np.nonzero(patch[..., 0] > 127)
+            dets = np.zeros((0, 9), dtype=np.float32)
+            if len(xs) > 0:
+                x1, y1 = xs.min(), ys.min()
+                x2, y2 = xs.max() + 1, ys.max() + 1
+                dets = np.array([[x1, y1, x2, y1, x2, y2, x1, y2, 0.9]],
+                                dtype=np.float32)
+            results.append([dets, np.zeros((0, 9), dtype=np.float32)])
+        return results
+
+
+@pytest.mark.parametrize('imgs_per_batch', [1, 3])
+def test_inference_detector_sliding_window(imgs_per_batch):
+    img = np.full((300, 260, 3), 50, dtype=np.uint8)
+    # in the overlap of the 4 patches
+    img[120:150, 100:130] = 255
+    model = _SquareDetector()
+    results = inference_detector_sliding_window(
+        model, img, subsize=200, gap=100, imgs_per_batch=imgs_per_batch)
+    # the 4 patches see the square at their own offsets, which are removed
+    assert len(model.patches) == 4
+    assert len(results) == 2 and results[1].shape == (0, 9)
+    assert results[0].tolist() == [
+        [100, 120, 130, 120, 130, 150, 100, 150, np.float32(0.9)]
+    ]
+
+    model = _SquareDetector()
+    results = inference_detector_sliding_window(
+        model, img, subsize=200, gap=100, rates=(0.5, ),
+        imgs_per_batch=imgs_per_batch)
+    # the image at half its size fits in a single patch, padded with zeros
+    assert len(model.patches) == 1
+    patch = model.patches[0]
+    assert patch.shape == (200, 200, 3)
+    assert patch[:150, :130].all()
+    assert not patch[150:].any() and not patch[:, 130:].any()
+    # the points are scaled back to the image, the scores are not
+    dets = results[0]
+    assert dets.shape == (1, 9)
+    assert np.abs(dets[0, :8] - [100, 120, 130, 120, 130, 150, 100, 150]
+                  ).max() <= 2
+    assert dets[0, 8] == np.float32(0.9)
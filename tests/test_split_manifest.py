@@ -0,0 +1,238 @@
+"""
+CommandLine:
+    pytest tests/test_split_manifest.py
+"""
+import json
+import os.path as osp
+
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip('cv2')
+pytest.importorskip('shapely')
+
+
+def _write_image(tmpdir, name, h, w, seed):
+    img = np.random.RandomState(seed).randint(0, 256, (h, w, 3))
+    cv2.imwrite(str(tmpdir.join('src', 'images', name + '.png')),
+                img.astype(np.uint8))
+
+
+def _write_label(tmpdir, name, x):
+    tmpdir.join('src', 'labelTxt', name + '.txt').write(
+        '{0} 10 {1} 10 {1} 40 {0} 40 plane 0\n'.format(x, x + 30))
+
+
+def _mtimes(dirname):
+    return {
+        path.basename: path.mtime()
+        for path in dirname.visit() if path.isfile()
+    }
+
+
+def test_split_manifest(tmpdir, monkeypatch):
+    monkeypatch.syspath_prepend(
+        osp.join(osp.dirname(osp.dirname(__file__)), 'DOTA_devkit'))
+    from ImgSplit_multi_process import splitbase
+
+    tmpdir.mkdir('src').mkdir('images')
+    tmpdir.join('src').mkdir('labelTxt')
+    for i, name in enumerate(['P0000', 'P0001']):
+        _write_image(tmpdir, name, 300, 280, i)
+        _write_label(tmpdir, name, 20)
+    out = tmpdir.join('out')
+
+    def split(**kwargs):
+        splitter = splitbase(
+            str(tmpdir.join('src')), str(out), gap=50, subsize=200,
+            num_process=1, **kwargs)
+        splitter.splitdata(1)
+        splitter.pool.close()
+        return _mtimes(out.join('images')), _mtimes(out.join('labelTxt'))
+
+    images, labels = split()
+    assert len(images) == 8 and len(labels) == 8
+    assert out.join('split_manifest.jsonl').check()
+
+    # nothing changed
+    assert split() == (images, labels)
+
+    # only the tiles of the relabeled image are written again
+    _write_label(tmpdir, 'P0001', 60)
+    new_images, new_labels = split()
+    assert sorted(new_labels) == sorted(labels)
+    for name in labels:
+        assert (new_labels[name] != labels[name]) == name.startswith('P0001')
+    assert 'plane' in out.join('labelTxt', 'P0001__1__0___0.txt').read()
+
+    # the tiles the resized image no longer has are removed
+    _write_image(tmpdir, 'P0000', 180, 180, 0)
+    images, labels = split()
+    assert sorted(name for name in images if name.startswith('P0000')) == [
+        'P0000__1__0___0.png'
+    ]
+    assert len(images) == len(labels) == 5
+
+    # everything is split again without resume
+    new_images, _ = split(resume=False)
+    assert all(new_images[name] != images[name] for name in images)
+
+
+def test_split_manifest_other_version(tmpdir, monkeypatch):
+    monkeypatch.syspath_prepend(
+        osp.join(osp.dirname(osp.dirname(__file__)), 'DOTA_devkit'))
+    from ImgSplit_multi_process import splitbase
+    from DOTA2COCO import SplitManifest2COCO
+    from split_manifest import MANIFEST_VERSION
+
+    tmpdir.mkdir('src').mkdir('images')
+    tmpdir.join('src').mkdir('labelTxt')
+    _write_image(tmpdir, 'P0000', 300, 280, 0)
+    _write_label(tmpdir, 'P0000', 20)
+    out = tmpdir.join('out')
+
+    def split():
+        splitter = splitbase(
+            str(tmpdir.join('src')), str(out), gap=50, subsize=200,
+            num_process=1)
+        splitter.splitdata(1)
+        splitter.pool.close()
+        return _mtimes(out.join('images'))
+
+    images = split()
+
+    manifest = out.join('split_manifest.jsonl')
+    records = [json.loads(line) for line in manifest.readlines()]
+    for record in records:
+        record['version'] = MANIFEST_VERSION - 1
+    manifest.write(''.join(json.dumps(record) + '\n' for record in records))
+    with pytest.raises(ValueError):
+        SplitManifest2COCO(str(manifest), str(tmpdir.join('coco.json')),
+                           ['plane'])
+
+    # the image is split again
+    new_images = split()
+    assert sorted(new_images) == sorted(images)
+    assert all(new_images[name] != images[name] for name in images)
+    record = json.loads(manifest.readlines()[-1])
+    assert record['version'] == MANIFEST_VERSION
+    SplitManifest2COCO(str(manifest), str(tmpdir.join('coco.json')),
+                       ['plane'])
+
+
+def test_split_manifest_removed_source(tmpdir, monkeypatch):
+    monkeypatch.syspath_prepend(
+        osp.join(osp.dirname(osp.dirname(__file__)), 'DOTA_devkit'))
+    from ImgSplit_multi_process import splitbase
+    from split_manifest import SplitManifest
+
+    tmpdir.mkdir('src').mkdir('images')
+    tmpdir.join('src').mkdir('labelTxt')
+    for i, name in enumerate(['P0000', 'P0001']):
+        _write_image(tmpdir, name, 300, 280, i)
+        _write_label(tmpdir, name, 20)
+    out = tmpdir.join('out')
+
+    def split(rate):
+        splitter = splitbase(
+            str(tmpdir.join('src')), str(out), gap=50, subsize=200,
+            num_process=1)
+        splitter.splitdata(rate)
+        splitter.pool.close()
+        return splitter
+
+    split(1)
+    split(0.5)
+    tmpdir.join('src', 'images', 'P0001.png').remove()
+    tmpdir.join('src', 'labelTxt', 'P0001.txt').remove()
+    splitter = split(1)
+
+    # the records and the tiles of the removed image at this rate are gone
+    records = SplitManifest(splitter.manifestfile).records
+    assert sorted(records) == ['P0000__0.5__', 'P0000__1__', 'P0001__0.5__']
+    lines = out.join('split_manifest.jsonl').readlines()
+    assert sorted(json.loads(line)['key'] for line in lines) == sorted(records)
+    assert sorted(path.basename for path in out.join('images').listdir()
+                  if path.basename.startswith('P0001')) == [
+                      'P0001__0.5__0___0.png'
+                  ]
+    assert not any(
+        path.basename.startswith('P0001__1__')
+        for path in out.join('labelTxt').listdir())
+
+    split(0.5)
+    records = SplitManifest(splitter.manifestfile).records
+    assert sorted(records) == ['P0000__0.5__', 'P0000__1__']
+    assert not any(
+        path.basename.startswith('P0001')
+        for path in out.join('images').listdir())
+
+
+def _by_file_name(coco):
+    file_names = {img['id']: img['file_name'] for img in coco['images']}
+    anns = {name: [] for name in file_names.values()}
+    for ann in coco.get('annotations', []):
+        ann = dict(ann, bbox=list(ann['bbox']))
+        ann.pop('id')
+        anns[file_names[ann.pop('image_id')]].append(ann)
+    imgs = {img['file_name']: (img['width'], img['height'])
+            for img in coco['images']}
+    return imgs, anns
+
+
+@pytest.mark.parametrize('padding', [True, False])
+def test_split_manifest2coco(tmpdir, monkeypatch, padding):
+    monkeypatch.syspath_prepend(
+        osp.join(osp.dirname(osp.dirname(__file__)), 'DOTA_devkit'))
+    from ImgSplit_multi_process import splitbase
+    from DOTA2COCO import DOTA2COCOTrain, SplitManifest2COCO
+
+    tmpdir.mkdir('src').mkdir('images')
+    labels = tmpdir.join('src').mkdir('labelTxt')
+    rng = np.random.RandomState(0)
+    for i, name in enumerate(['P0000', 'P0001']):
+        _write_image(tmpdir, name, 300, 280, i)
+        lines = []
+        for j in range(30):
+            x, y = rng.randint(0, 260, 2)
+            w, h = rng.randint(3, 60, 2)
+            lines.append('{} {} {} {} {} {} {} {} {} {}\n'.format(
+                x, y, x + w, y, x + w + 5, y + h, x, y + h,
+                ['plane', 'ship'][j % 2], j % 2))
+        labels.join(name + '.txt').write(''.join(lines))
+    out = str(tmpdir.join('out'))
+    splitter = splitbase(
+        str(tmpdir.join('src')), out, gap=50, subsize=200, num_process=1,
+        padding=padding)
+    splitter.splitdata(1)
+    splitter.splitdata(0.5)
+    splitter.pool.close()
+
+    for difficult in ['-1', '1']:
+        DOTA2COCOTrain(out, str(tmpdir.join('expected.json')),
+                       ['plane', 'ship'], difficult=difficult)
+        SplitManifest2COCO(splitter.manifestfile,
+                           str(tmpdir.join('coco.json')), ['plane', 'ship'],
+                           difficult=difficult)
+        expected = json.loads(tmpdir.join('expected.json').read())
+        coco = json.loads(tmpdir.join('coco.json').read())
+        assert _by_file_name(coco) == _by_file_name(expected)
+        assert len(coco['annotations']) > 0
+
+    # the patches of a removed image are not in the annotations
+    tmpdir.join('src', 'images', 'P0001.png').remove()
+    labels.join('P0001.txt').remove()
+    splitter = splitbase(
+        str(tmpdir.join('src')), out, gap=50, subsize=200, num_process=1,
+        padding=padding)
+    splitter.splitdata(1)
+    splitter.splitdata(0.5)
+    splitter.pool.close()
+    DOTA2COCOTrain(out, str(tmpdir.join('expected.json')), ['plane', 'ship'])
+    SplitManifest2COCO(splitter.manifestfile, str(tmpdir.join('coco.json')),
+                       ['plane', 'ship'])
+    expected = json.loads(tmpdir.join('expected.json').read())
+    coco = json.loads(tmpdir.join('coco.json').read())
+    assert _by_file_name(coco) == _by_file_name(expected)
+    assert not any(img['file_name'].startswith('P0001')
+                   for img in coco['images'])
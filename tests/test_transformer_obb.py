@@ -0,0 +1,26 @@
+"""
+CommandLine:
+    pytest tests/test_transformer_obb.py
+"""
+import numpy as np
+import torch
+
+from mmdet.core.bbox.transformer_obb import (rbboxPoly2Rectangle,
+                                             rbboxRec2Poly)
+
+
+def test_rbboxPoly2Rectangle():
+    polys = torch.FloatTensor([[0., 0., 10., 0., 10., 20., 0., 20.],
+                               [10., 0., 10., 20., 0., 20., 0., 0.]])
+    recs = rbboxPoly2Rectangle(polys)
+    expected = torch.FloatTensor([[5., 10., 11., 21., 0.],
+                                  [5., 10., 21., 11., np.pi / 2]])
+    assert torch.allclose(recs, expected)
+
+    # round trip through rbboxRec2Poly for rotated rectangles
+    recs = torch.FloatTensor([[50., 60., 31., 11., 0.3],
+                              [20., 30., 8., 40., -1.2]])
+    assert torch.allclose(
+        rbboxPoly2Rectangle(rbboxRec2Poly(recs)), recs, atol=1e-4)
+
+    assert rbboxPoly2Rectangle(polys[:0]).shape == (0, 5)
@@ -0,0 +1,102 @@
+"""
+CommandLine:
+    pytest tests/test_transformer_rbbox.py
+"""
+import math
+
+import numpy as np
+import torch
+
+from mmdet.core.bbox.transformer_rbbox import (cal_line_length,
+                                               choose_best_match,
+                                               get_best_begin_point)
+
+
+def test_get_best_begin_point():
+    square = [0., 0., 10., 0., 10., 10., 0., 10.]
+    rbboxes = torch.FloatTensor([
+        square,
+        # the same square starting from each of the other corners
+        [10., 0., 10., 10., 0., 10., 0., 0.],
+        [10., 10., 0., 10., 0., 0., 10., 0.],
+        [0., 10., 0., 0., 10., 0., 10., 10.],
+        # a diamond keeps its first point on ties
+        [5., 0., 10., 5., 5., 10., 0., 5.],
+    ])
+    rbboxes_best = get_best_begin_point(rbboxes)
+    assert rbboxes_best.shape == rbboxes.shape
+    assert torch.equal(rbboxes_best[:4], rbboxes.new_tensor([square] * 4))
+    assert torch.equal(rbboxes_best[4], rbboxes[4])
+
+    # empty input
+    rbboxes_best = get_best_begin_point(rbboxes[:0])
+    assert rbboxes_best.shape == (0, 8)
+
+
+def _get_best_begin_point_loop(rbboxes):
+    """Polygon-by-polygon reference of get_best_begin_point."""
+    rbboxes_best = rbboxes.new_zeros(rbboxes.size())
+    for i in range(len(rbboxes)):
+        points = rbboxes[i].view(4, 2)
+        xmin, ymin = points.min(dim=0)[0]
+        xmax, ymax = points.max(dim=0)[0]
+        dst_coordinate = [[xmin, ymin], [xmax, ymin], [xmax, ymax],
+                          [xmin, ymax]]
+        force, force_flag = 100000000.0, 0
+        for j in range(4):
+            combinate = points.roll(-j, dims=0)
+            temp_force = sum(
+                cal_line_length(combinate[k], dst_coordinate[k])
+                for k in range(4))
+            if temp_force < force:
+                force, force_flag = temp_force, j
+        rbboxes_best[i] = points.roll(-force_flag, dims=0).view(8)
+    return rbboxes_best
+
+
+def test_get_best_begin_point_near_ties():
+    # flat quadrilaterals whose begin points are tied to within the float32
+    # rounding of the distances
+    rbboxes = torch.FloatTensor([
+        [1080, 2675, 1323, 2677, 1083, 2679, 838, 2674],
+        [209, 3039, 208, 3300, 208, 3562, 208, 3301],
+        [3157, 1522, 3444, 1526, 3157, 1525, 2863, 1526],
+        [2576, 774, 2580, 1050, 2578, 1321, 2577, 1048],
+        [2634, -92, 2633, 164, 2633, 422, 2629, 165],
+        [462, 2290, 467, 2567, 462, 2842, 463, 2567],
+    ])
+    assert torch.equal(
+        get_best_begin_point(rbboxes), _get_best_begin_point_loop(rbboxes))
+
+
+def _choose_best_match_loop(rrois, gt_rrois):
+    """Row-by-row reference of choose_best_match."""
+    gt_rrois_new = torch.zeros_like(gt_rrois)
+    for i in range(gt_rrois.size(0)):
+        x, y, w, h, angle = gt_rrois[i].tolist()
+        candidates = [[x, y, h, w, angle - math.pi / 2.],
+                      [x, y, w, h, angle],
+                      [x, y, h, w, angle + math.pi / 2.],
+                      [x, y, w, h, angle + math.pi]]
+        dists = [abs(rrois[i, 4].item() - c[4]) for c in candidates]
+        best = candidates[int(np.argmin(dists))]
+        gt_rrois_new[i] = gt_rrois.new_tensor(best)
+    return gt_rrois_new
+
+
+def test_choose_best_match():
+    rng = np.random.RandomState(0)
+    num = 128
+    rrois = torch.from_numpy(np.concatenate([
+        rng.rand(num, 2) * 1000, rng.rand(num, 2) * 100 + 1,
+        (rng.rand(num, 1) - 0.5) * 2 * np.pi], axis=1)).float()
+    gt_rrois = torch.from_numpy(np.concatenate([
+        rng.rand(num, 2) * 1000, rng.rand(num, 2) * 100 + 1,
+        (rng.rand(num, 1) - 0.5) * 2 * np.pi], axis=1)).float()
+
+    gt_rrois_new = choose_best_match(rrois, gt_rrois)
+    expected = _choose_best_match_loop(rrois, gt_rrois)
+    assert gt_rrois_new.shape == gt_rrois.shape
+    assert torch.allclose(gt_rrois_new, expected, atol=1e-5)
+
+    assert choose_best_match(rrois[:0], gt_rrois[:0]).shape == (0, 5)
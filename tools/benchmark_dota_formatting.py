@@ -0,0 +1,139 @@
+import argparse
+import os
+import os.path as osp
+import tempfile
+import time
+
+import numpy as np
+
+from mmdet.core import OBBDet2Comp4
+from test_dota import write_dota_results
+
+
+def OBBDet2Comp4_legacy(dataset, results):
+    """Per-box implementation of OBBDet2Comp4, kept for reference."""
+    results_dict = {}
+    for idx in range(len(dataset)):
+        filename = dataset.img_infos[idx]['filename']
+        filename = os.path.basename(filename)
+        result = results[idx]
+        for label in range(len(result)):
+            rbboxes = result[label]
+            cls_name = dataset.CLASSES[label]
+            if cls_name not in results_dict:
+                results_dict[cls_name] = []
+            for i in range(rbboxes.shape[0]):
+                poly = rbboxes[i][:-1]
+                score = float(rbboxes[i][-1])
+                outline = filename + ' ' + str(score) + ' ' + ' '.join(
+                    map(str, poly))
+                results_dict[cls_name].append(outline)
+    return results_dict
+
+
+def write_dota_results_legacy(path, boxes, dataset, threshold=0.001):
+    """Per-box implementation of write_dota_results, kept for reference."""
+    for i, img_info in enumerate(dataset.img_infos):
+        img_id = img_info['id']
+        for j, cls in enumerate(dataset.CLASSES):
+            txt_path = osp.join(path, 'Task1_' + cls + '.txt')
+            with open(txt_path, 'a') as f:
+                box = boxes[i][j]
+                box = box[box[:, 8] > threshold]
+                for k in range(box.shape[0]):
+                    f.write('{} {} {} {} {} {} {} {} {} {}\n'.format(
+                        img_id, box[k, 8], int(box[k, 0]), int(box[k, 1]),
+                        int(box[k, 2]), int(box[k, 3]), int(box[k, 4]),
+                        int(box[k, 5]), int(box[k, 6]), int(box[k, 7])))
+
+
+class FakeDataset(object):
+
+    CLASSES = ('plane', 'baseball-diamond', 'bridge', 'ground-track-field',
+               'small-vehicle', 'large-vehicle', 'ship', 'tennis-court',
+               'basketball-court', 'storage-tank', 'soccer-ball-field',
+               'roundabout', 'harbor', 'swimming-pool', 'helicopter')
+
+    def __init__(self, num_imgs):
+        self.img_infos = [
+            dict(id='P{:04d}__1__0___0'.format(i),
+                 filename='P{:04d}__1__0___0.png'.format(i))
+            for i in range(num_imgs)
+        ]
+
+    def __len__(self):
+        return len(self.img_infos)
+
+
+def random_results(num_imgs, num_dets, num_classes):
+    rng = np.random.RandomState(0)
+    results = []
+    for _ in range(num_imgs):
+        labels = rng.randint(0, num_classes, num_dets)
+        rbboxes = np.concatenate(
+            [rng.rand(num_dets, 8) * 1024,
+             rng.rand(num_dets, 1)], axis=1).astype(np.float32)
+        results.append([rbboxes[labels == i] for i in range(num_classes)])
+    return results
+
+
+def read_files(path):
+    return {
+        name: open(osp.join(path, name), 'rb').read()
+        for name in sorted(os.listdir(path))
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the formatting of DOTA results against the '
+        'per-box versions')
+    parser.add_argument(
+        '--num_imgs', type=int, default=200, help='number of images')
+    parser.add_argument(
+        '--num_dets',
+        type=int,
+        default=2000,
+        help='number of detections of each image')
+    args = parser.parse_args()
+    return args
+
+
+def main():
+    args = parse_args()
+    dataset = FakeDataset(args.num_imgs)
+    results = random_results(args.num_imgs, args.num_dets,
+                             len(dataset.CLASSES))
+    print('formatting {} detections'.format(args.num_imgs * args.num_dets))
+
+    start = time.time()
+    legacy = OBBDet2Comp4_legacy(dataset, results)
+    legacy_time = time.time() - start
+    start = time.time()
+    batched = OBBDet2Comp4(dataset, results)
+    batched_time = time.time() - start
+    assert legacy == batched, 'OBBDet2Comp4 outputs differ'
+    print('OBBDet2Comp4 per-box: {:.2f} s, batched: {:.2f} s, '
+          'speedup: {:.1f}x'.format(legacy_time, batched_time,
+                                    legacy_time / batched_time))
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        legacy_dir, batched_dir = osp.join(tmpdir, 'legacy'), osp.join(
+            tmpdir, 'batched')
+        os.makedirs(legacy_dir)
+        os.makedirs(batched_dir)
+        start = time.time()
+        write_dota_results_legacy(legacy_dir, results, dataset)
+        legacy_time = time.time() - start
+        start = time.time()
+        write_dota_results(batched_dir, results, dataset)
+        batched_time = time.time() - start
+        assert read_files(legacy_dir) == read_files(batched_dir), \
+            'write_dota_results outputs differ'
+    print('write_dota_results per-box: {:.2f} s, batched: {:.2f} s, '
+          'speedup: {:.1f}x'.format(legacy_time, batched_time,
+                                    legacy_time / batched_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+import argparse
+import time
+
+import numpy as np
+import torch
+
+from mmdet.core.bbox.demodata import random_rbboxes
+from mmdet.core.bbox.transformer_obb import rbboxPoly2Rectangle
+
+
+def rbboxPoly2Rectangle_legacy(rbbox):
+    """Per-box implementation of rbboxPoly2Rectangle, kept for reference."""
+    if rbbox.size(0) == 0:
+        return rbbox.new_zeros(0, 5)
+    rbbox = rbbox.view(-1, 4, 2)
+    rbbox = rbbox.permute(0, 2, 1)
+    angle = torch.atan2((rbbox[:, 1, 1] - rbbox[:, 1, 0]),
+                        (rbbox[:, 0, 1] - rbbox[:, 0, 0]))
+    center = rbbox.new_zeros((rbbox.shape[0], 2, 1))
+    for i in range(4):
+        center[:, 0, 0] += rbbox[:, 0, i]
+        center[:, 1, 0] += rbbox[:, 1, i]
+    center = center / 4.0
+
+    R = rbbox.new_tensor([[[torch.cos(_angle), -torch.sin(_angle)],
+                           [torch.sin(_angle), torch.cos(_angle)]]
+                          for _angle in angle])
+    RT = R.permute(0, 2, 1)
+    normalized = [
+        torch.mm(RT[i], rbbox[i] - center[i]) for i in range(rbbox.shape[0])
+    ]
+    normalized = torch.stack(normalized, dim=0)
+
+    xmin = torch.min(normalized[:, 0, :], dim=1)[0]
+    ymin = torch.min(normalized[:, 1, :], dim=1)[0]
+    xmax = torch.max(normalized[:, 0, :], dim=1)[0]
+    ymax = torch.max(normalized[:, 1, :], dim=1)[0]
+
+    w = xmax - xmin + 1
+    h = ymax - ymin + 1
+    return torch.stack([center[:, 0, 0], center[:, 1, 0], w, h, angle],
+                       dim=-1)
+
+
+def timeit(func, inputs, repeat):
+    func(inputs)
+    if inputs.is_cuda:
+        torch.cuda.synchronize()
+    start = time.time()
+    for _ in range(repeat):
+        func(inputs)
+    if inputs.is_cuda:
+        torch.cuda.synchronize()
+    return (time.time() - start) / repeat
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark rbboxPoly2Rectangle against the per-box '
+        'version')
+    parser.add_argument(
+        '--num', type=int, default=2000, help='number of polygons')
+    parser.add_argument(
+        '--repeat', type=int, default=10, help='number of timed runs')
+    parser.add_argument('--device', default='cpu', help='cpu or cuda')
+    args = parser.parse_args()
+    return args
+
+
+def main():
+    args = parse_args()
+    img_size = 1024
+    polys = torch.from_numpy(
+        random_rbboxes(
+            args.num,
+            span=img_size,
+            size_range=(2, img_size / 8 + 2),
+            theta_range=(-np.pi / 2, np.pi / 2))).float().to(args.device)
+
+    legacy = rbboxPoly2Rectangle_legacy(polys)
+    batched = rbboxPoly2Rectangle(polys)
+    assert torch.equal(legacy, batched), 'outputs differ'
+
+    legacy_time = timeit(rbboxPoly2Rectangle_legacy, polys, args.repeat)
+    batched_time = timeit(rbboxPoly2Rectangle, polys, args.repeat)
+    print('rbboxPoly2Rectangle on {} polygons ({})'.format(
+        args.num, args.device))
+    print('per-box: {:.3f} ms, batched: {:.3f} ms, speedup: {:.1f}x'.format(
+        legacy_time * 1000, batched_time * 1000, legacy_time / batched_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,296 @@
+"""Export MRDet to ONNX.
+
+The exported graph takes a normalized image of a fixed shape and returns the
+detections ``MRDet.simple_test`` gives for it, post-processing included.
+RRoIAlign and the poly NMS are exported as the ``mmdet::RRoIAlign`` and
+``mmdet::PolyNMS`` custom ops, so the runtime has to provide them, e.g. as a
+custom op library built from the kernels in ``mmdet/ops``.
+"""
+import argparse
+import inspect
+
+import mmcv
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from mmcv.runner import load_checkpoint
+
+from mmdet.core import rbbox2result, rbboxPoly2rroiRec
+from mmdet.models import build_detector
+from mmdet.ops import batched_poly_nms, poly_nms
+
+
+def _topk(scores, k):
+    """Indices of the top ``k`` scores, or of all of them if there are fewer,
+    sorted by score.
+
+    When exporting, the number of scores is a tensor, the ``min`` is then
+    done in the graph instead of being frozen by the trace.
+    """
+    num = scores.size(0)
+    if isinstance(num, torch.Tensor):
+        k = num.clamp(max=k)
+    else:
+        k = min(num, k)
+    return scores.topk(k)[1]
+
+
+def _keep_top(scores, k):
+    """Indices of the top ``k`` scores if there are more than ``k``, of all
+    of them in their order otherwise, as the eager post-processing keeps
+    them."""
+    num = scores.size(0)
+    if not isinstance(num, torch.Tensor):
+        if num > k:
+            return scores.topk(k)[1]
+        return torch.arange(num, device=scores.device)
+    inds = _topk(scores, k)
+    return torch.where(num > k, inds,
+                       torch.arange(inds.size(0), device=scores.device))
+
+
+class MRDetExport(nn.Module):
+    """``MRDet.simple_test`` of a single image of a fixed shape, with the
+    post-processing written with ops that trace.
+
+    The detections do not depend on any branch taken on the number of
+    proposals or detections, so the traced graph gives the same results as
+    ``simple_test(img, img_meta, rescale=True)`` for an image whose
+    ``ori_shape`` is its ``img_shape``.
+
+    Args:
+        model (MRDet): The detector, in eval mode.
+        img_shape (tuple): (h, w, c) shape of the input images.
+
+    Returns:
+        tuple[Tensor]: (k, 9) detections and their (k, ) 0-based labels.
+    """
+
+    def __init__(self, model, img_shape):
+        super(MRDetExport, self).__init__()
+        rcnn_cfg = model.test_cfg.rcnn
+        if rcnn_cfg.nms.get('type') != 'poly_nms':
+            raise NotImplementedError('only poly_nms can be exported')
+        if rcnn_cfg.get('nms_pre', -1) > 0:
+            raise NotImplementedError('rcnn.nms_pre can not be exported')
+        self.model = model
+        self.img_shape = img_shape
+
+    def forward(self, img):
+        model = self.model
+        x = model.extract_feat(img)
+        proposals = self.get_proposals(x)
+        rois = rbboxPoly2rroiRec([proposals])
+        roi_feats = self.extract_roi_feats(
+            x[:model.bbox_roi_extractor.num_inputs], rois)
+        if model.with_shared_head:
+            roi_feats = model.shared_head(roi_feats)
+        cls_score, bbox_xy_pred, bbox_wh_pred, bbox_theta_pred = \
+            model.bbox_head(roi_feats, roi_feats)
+        return self.get_dets(rois, cls_score, bbox_xy_pred, bbox_wh_pred,
+                             bbox_theta_pred)
+
+    def get_proposals(self, x):
+        """``AO_RPNHead.get_bboxes`` of a single image."""
+        rpn_head = self.model.rpn_head
+        cfg = self.model.test_cfg.rpn
+        cls_scores, bbox_preds, obb_preds = rpn_head(x)
+        num_levels = len(cls_scores)
+        mlvl_anchors = [
+            rpn_head.anchor_generators[i].grid_anchors(
+                cls_scores[i].size()[-2:],
+                rpn_head.anchor_strides[i],
+                device=cls_scores[i].device) for i in range(num_levels)
+        ]
+        proposals, _, level_ids = rpn_head.get_candidates_batch(
+            cls_scores, bbox_preds, obb_preds, mlvl_anchors,
+            [dict(img_shape=self.img_shape)], cfg)
+        proposals, keep = batched_poly_nms(proposals, level_ids, cfg.nms_thr)
+        level_ids = level_ids[keep]
+        # a level has no more than nms_pre proposals, so nms_post only cuts
+        # when it is lower
+        if cfg.nms_post > 0 and not 0 < cfg.nms_pre <= cfg.nms_post:
+            keep = []
+            for level in range(num_levels):
+                inds = torch.nonzero(level_ids == level).view(-1)
+                keep.append(inds[_topk(proposals[inds, 8], cfg.nms_post)])
+            proposals = proposals[torch.cat(keep)]
+        if cfg.nms_across_levels:
+            proposals, _ = poly_nms(proposals, cfg.nms_thr)
+        if cfg.max_num > 0:
+            return proposals[_topk(proposals[:, 8], cfg.max_num)]
+        return proposals[proposals[:, 8].argsort(descending=True)]
+
+    def extract_roi_feats(self, feats, rois):
+        """``SingleRRoIExtractor.forward``, without skipping the levels that
+        get no rois: which ones do is only known at run time."""
+        extractor = self.model.bbox_roi_extractor
+        if len(feats) == 1:
+            return extractor.roi_layers[0](feats[0], rois)
+        target_lvls = extractor.map_roi_levels(rois, len(feats))
+        roi_feats = feats[0].new_zeros(
+            rois.size(0), extractor.out_channels,
+            *extractor.roi_layers[0].out_size)
+        for i, feat in enumerate(feats):
+            inds = torch.nonzero(target_lvls == i).view(-1)
+            roi_feats[inds] = extractor.roi_layers[i](feat, rois[inds])
+        return roi_feats
+
+    def get_dets(self, rois, cls_score, bbox_xy_pred, bbox_wh_pred,
+                 bbox_theta_pred):
+        """``MHNet.get_det_rbbox2rbbox`` with a ``cfg``, the NMS of all the
+        classes being a single batched one."""
+        bbox_head = self.model.bbox_head
+        cfg = self.model.test_cfg.rcnn
+        num_rois = cls_score.size(0)
+        scores = F.softmax(cls_score, dim=1)
+        bbox_pred = torch.cat([
+            bbox_xy_pred.view(num_rois, -1, 2),
+            bbox_wh_pred.view(num_rois, -1, 2),
+            bbox_theta_pred.view(num_rois, -1, 1)
+        ],
+                              dim=-1).view(num_rois, -1)
+        polys, scores, labels = bbox_head.get_det_candidates(
+            rois, scores, bbox_pred, self.img_shape, 1.0, False, cfg)
+
+        nms_cfg = cfg.nms.copy()
+        nms_cfg.pop('type')
+        batched = nms_cfg.pop('batched', False)
+        # shifted by one as in multiclass_poly_nms_candidates
+        dets, keep = batched_poly_nms(
+            torch.cat([polys + 1, scores[:, None]], dim=1), labels,
+            **nms_cfg)
+        labels = labels[keep]
+        if cfg.max_per_img > 0:
+            inds = _keep_top(dets[:, 8], cfg.max_per_img)
+        elif not batched:
+            # the per class NMS sorts the detections in this case
+            inds = dets[:, 8].argsort(descending=True)
+        else:
+            return dets, labels
+        return dets[inds], labels[inds]
+
+
+def load_img(filename, img_shape, img_norm_cfg):
+    """Load an image as the test pipeline does, resized to ``img_shape``."""
+    img = mmcv.imread(filename)
+    img = mmcv.imresize(img, (img_shape[1], img_shape[0]))
+    img = mmcv.imnormalize(img, np.array(img_norm_cfg['mean']),
+                           np.array(img_norm_cfg['std']),
+                           img_norm_cfg['to_rgb'])
+    return torch.from_numpy(img.transpose(2, 0, 1)).unsqueeze(0)
+
+
+def verify(model, export_model, img):
+    """Check that the module to export gives the detections of
+    ``simple_test``, returns the largest difference."""
+    h, w = img.shape[-2:]
+    img_meta = dict(
+        img_shape=(h, w, 3),
+        ori_shape=(h, w, 3),
+        pad_shape=(h, w, 3),
+        scale_factor=1.0,
+        flip=False)
+    with torch.no_grad():
+        expected = model.simple_test(img, [img_meta], rescale=True)
+        dets, labels = export_model(img)
+    results = rbbox2result(dets, labels, model.bbox_head.num_classes)
+    max_diff = 0
+    for cls_expected, cls_result in zip(expected, results):
+        if cls_expected.shape != cls_result.shape:
+            raise AssertionError(
+                'the exported module keeps {} detections of a class, '
+                'simple_test {}'.format(len(cls_result), len(cls_expected)))
+        if len(cls_expected) > 0:
+            max_diff = max(max_diff, np.abs(cls_expected - cls_result).max())
+    return max_diff
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Export MRDet to ONNX')
+    parser.add_argument('config', help='test config file path')
+    parser.add_argument('checkpoint', help='checkpoint file')
+    parser.add_argument('--out', default='mrdet.onnx', help='ONNX file')
+    parser.add_argument(
+        '--shape',
+        type=int,
+        nargs='+',
+        default=[1024, 1024],
+        help='input image size, a multiple of 32')
+    parser.add_argument(
+        '--img',
+        help='image traced through the model, a random one by default')
+    parser.add_argument(
+        '--device',
+        choices=['cuda', 'cpu'],
+        default='cuda',
+        help='device the model is traced on')
+    parser.add_argument('--opset', type=int, default=11, help='ONNX opset')
+    parser.add_argument(
+        '--verify',
+        action='store_true',
+        help='check that the exported module gives the detections of '
+        'simple_test before exporting it')
+    args = parser.parse_args()
+    return args
+
+
+def main():
+    args = parse_args()
+
+    if len(args.shape) == 1:
+        img_shape = (args.shape[0], args.shape[0], 3)
+    elif len(args.shape) == 2:
+        img_shape = tuple(args.shape) + (3, )
+    else:
+        raise ValueError('invalid input shape')
+
+    cfg = mmcv.Config.fromfile(args.config)
+    cfg.model.pretrained = None
+    model = build_detector(cfg.model, train_cfg=None, test_cfg=cfg.test_cfg)
+    load_checkpoint(model, args.checkpoint, map_location='cpu')
+    model = model.to(args.device)
+    # the export restores the training flag of the module afterwards, which
+    # would put the detector in training mode if the wrapper were left in it
+    export_model = MRDetExport(model, img_shape).eval()
+
+    if args.img is not None:
+        img = load_img(args.img, img_shape, cfg.img_norm_cfg)
+    else:
+        img = torch.randn(1, 3, img_shape[0], img_shape[1])
+    img = img.to(args.device)
+
+    if args.verify:
+        max_diff = verify(model, export_model, img)
+        print('the detections match simple_test, max difference: '
+              '{:.3g}'.format(max_diff))
+
+    kwargs = dict()
+    # the symbolic functions of the custom ops are only used by the
+    # TorchScript based exporter
+    if 'dynamo' in inspect.signature(torch.onnx.export).parameters:
+        kwargs['dynamo'] = False
+    with torch.no_grad():
+        torch.onnx.export(
+            export_model,
+            img,
+            args.out,
+            input_names=['img'],
+            output_names=['dets', 'labels'],
+            dynamic_axes={
+                'dets': {
+                    0: 'num_dets'
+                },
+                'labels': {
+                    0: 'num_dets'
+                }
+            },
+            opset_version=args.opset,
+            custom_opsets={'mmdet': 1},
+            **kwargs)
+    print('exported to {}'.format(args.out))
+
+
+if __name__ == '__main__':
+    main()
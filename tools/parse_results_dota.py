@@ -9,12 +9,13 @@ import mmcv
 from mmdet.apis import init_dist
 from mmdet.core import results2json, coco_eval, \
     HBBSeg2Comp4, OBBDet2Comp4, \
-    HBBOBB2Comp4, HBBDet2Comp4
+    HBBOBB2Comp4, HBBDet2Comp4, DetectionStore
 
 import argparse
 from mmdet.datasets import build_dataset, build_dataloader
 from mmcv import Config
 from DOTA_devkit.ResultMerge_multi_process import *
+from DOTA_devkit.ResultMerge_multi_process import mergebypoly_arrays
 import DOTA_devkit.utils as util
 # import pdb; pdb.set_trace()
 def parse_args():
@@ -22,6 +23,8 @@ def parse_args():
     parser.add_argument('--config', default='configs/DOTA/faster_rcnn_r101_fpn_1x_dota2_v3_RoITrans_v5.py')
     parser.add_argument('--outdir')
     parser.add_argument('--pkl_file')
+    parser.add_argument('--store', help='detection store dir in outdir, '
+                        'used instead of --pkl_file')
     parser.add_argument('--type', default=r'HBB',
                         help='parse type of detector')
     args = parser.parse_args()
@@ -49,12 +52,27 @@ def OBB2HBB(srcpath, dstpath):
                         outline = outline + '\n'
                     f_out.write(outline)
 
+
+def parse_store(storedir, dstpath, o_thresh=0.1):
+    """Merge the OBB results of a detection store without formatting the
+    unmerged results."""
+    store = DetectionStore.load(storedir)
+    mergebypoly_arrays(os.path.join(dstpath, 'Task1_results_nms'),
+                       store.img_names, store.classes, store.image_ids,
+                       store.class_ids, store.dets,
+                       nms_type=r'py_cpu_nms_poly_grid', o_thresh=o_thresh)
+    OBB2HBB(os.path.join(dstpath, 'Task1_results_nms'),
+            os.path.join(dstpath, 'Transed_Task2_results_nms'))
+
 def parse_results(config_file, resultfile, dstpath, type):
     cfg = Config.fromfile(config_file)
     cfg.data.test.test_mode = True
     data_test = cfg.data.test
     dataset = build_dataset(data_test)
-    outputs = mmcv.load(resultfile)
+    if os.path.isdir(resultfile):
+        outputs = DetectionStore.load(resultfile).to_results()
+    else:
+        outputs = mmcv.load(resultfile)
     if type == 'OBB':
         #  dota1 has tested
         obb_results_dict = OBBDet2Comp4(dataset, outputs)
@@ -91,7 +109,9 @@ def parse_results(config_file, resultfile, dstpath, type):
             os.makedirs(os.path.join(dstpath, 'Task1_results_nms'))
 
         mergebypoly_multiprocess(os.path.join(dstpath, 'Task1_results'),
-                                 os.path.join(dstpath, 'Task1_results_nms'), nms_type=r'py_cpu_nms_poly_fast', o_thresh=current_thresh)
+                                 os.path.join(dstpath, 'Task1_results_nms'),
+                                 nms_type=r'py_cpu_nms_poly_grid',
+                                 o_thresh=current_thresh)
 
         OBB2HBB(os.path.join(dstpath, 'Task1_results_nms'),
                          os.path.join(dstpath, 'Transed_Task2_results_nms'))
@@ -116,8 +136,11 @@ if __name__ == '__main__':
     args = parse_args()
     config_file = args.config
     config_name = os.path.splitext(os.path.basename(config_file))[0]
-    pkl_file = os.path.join(args.outdir, args.pkl_file)
     output_path = args.outdir
     type = args.type
-    parse_results(config_file, pkl_file, output_path, type)
+    if args.store and type == 'OBB':
+        parse_store(os.path.join(args.outdir, args.store), output_path)
+    else:
+        pkl_file = os.path.join(args.outdir, args.store or args.pkl_file)
+        parse_results(config_file, pkl_file, output_path, type)
 
@@ -11,8 +11,12 @@ import torch.distributed as dist
 from mmcv.parallel import MMDataParallel, MMDistributedDataParallel
 from mmcv.runner import get_dist_info, load_checkpoint
 
-from mmdet.apis import init_dist
-from mmdet.core import coco_eval, results2json, wrap_fp16_model, get_classes, tensor2imgs
+from mmdet.apis import init_cpu_env, init_dist
+from mmdet.core import CPUDataParallel, rbboxes2text, wrap_fp16_model
+from mmdet.core.evaluation.result_writers import (DetectionStore,
+                                                  DetectionStoreWriter,
+                                                  Task1ResultWriter,
+                                                  merge_parts, task1_filename)
 from mmdet.datasets import build_dataloader, build_dataset
 from mmdet.models import build_detector
 from DOTA_devkit.ResultMerge_multi_process import mergebypoly_multiprocess
@@ -56,14 +60,14 @@ def draw_bbox(img, bboxes, labels, path, class_names):
         #             cv2.FONT_HERSHEY_COMPLEX, font, text_color)
         cv2.imwrite(path, img)
 
-def draw_result(data, result, outdir, class_names, score_thr=0.001):
-    bbox_result = result
+
+def draw_result(data, results, outdir, class_names, score_thr=0.001):
     img_metas = data['img_meta'][0].data[0]
 
     if not os.path.exists(outdir):
         os.makedirs(outdir)
 
-    for img_meta in img_metas:
+    for img_meta, bbox_result in zip(img_metas, results):
         h, w, _ = img_meta['ori_shape']
         filename = img_meta['filename']
         img = mmcv.imread(filename)
@@ -89,27 +93,45 @@ def draw_result(data, result, outdir, class_names, score_thr=0.001):
         draw_bbox(img_show, bboxes, labels, path, class_names)
 
 
-def single_gpu_test(model, data_loader, outdir, show=False):
+def single_gpu_test(model, data_loader, outdir, show=False, writers=None):
+    """Test model with a single gpu.
+
+    If ``writers`` are given the results of each batch are handed to them and
+    dropped, otherwise all the results are collected and returned.
+    """
     model.eval()
     # model.eval()，让model变成测试模式，对dropout和batch normalization的操作在训练和测试的时候是不一样的
     results = []
     dataset = data_loader.dataset
     prog_bar = mmcv.ProgressBar(len(dataset))
+    num_done = 0
     for i, data in enumerate(data_loader):
         with torch.no_grad():
-            result = model(return_loss=False, rescale=not show, **data)
-        results.append(result)
+            batch_results = model(
+                return_loss=False, rescale=not show, batched=True, **data)
+        batch_size = data['img'][0].size(0)
+        if writers is None:
+            results.extend(batch_results)
+        else:
+            img_inds = range(num_done, num_done + batch_size)
+            for writer in writers:
+                writer.write(img_inds, batch_results)
+        num_done += batch_size
 
         if show:
-            draw_result(data, result, osp.join(outdir, 'images'), dataset.CLASSES, score_thr=0.001)
+            draw_result(data, batch_results, osp.join(outdir, 'images'),
+                        dataset.CLASSES, score_thr=0.001)
 
-        batch_size = data['img'][0].size(0)
         for _ in range(batch_size):
             prog_bar.update()
-    return results
+    return results if writers is None else None
 
 
-def multi_gpu_test(model, data_loader, tmpdir=None, gpu_collect=False):
+def multi_gpu_test(model,
+                   data_loader,
+                   tmpdir=None,
+                   gpu_collect=False,
+                   writers=None):
     """Test model with multiple gpus.
 
     This method tests model with multiple gpus and collects the results
@@ -124,9 +146,11 @@ def multi_gpu_test(model, data_loader, tmpdir=None, gpu_collect=False):
         tmpdir (str): Path of directory to save the temporary results from
             different gpus under cpu mode.
         gpu_collect (bool): Option to use either gpu or cpu to collect results.
+        writers (list[ResultWriter], optional): Writers of this rank, the
+            results of each batch are handed to them instead of collected.
 
     Returns:
-        list: The prediction results.
+        list: The prediction results, None if ``writers`` are given.
     """
     model.eval()
     results = []
@@ -134,16 +158,31 @@ def multi_gpu_test(model, data_loader, tmpdir=None, gpu_collect=False):
     rank, world_size = get_dist_info()
     if rank == 0:
         prog_bar = mmcv.ProgressBar(len(dataset))
+    num_done = 0
     for i, data in enumerate(data_loader):
         with torch.no_grad():
-            result = model(return_loss=False, rescale=True, **data)
-        results.append(result)
+            batch_results = model(
+                return_loss=False, rescale=True, batched=True, **data)
+        batch_size = data['img'][0].size(0)
+        if writers is None:
+            results.extend(batch_results)
+        else:
+            # the sampler gives every world_size-th image to this rank and
+            # pads the end with images of other ranks, which are skipped
+            img_inds = [
+                rank + (num_done + j) * world_size for j in range(batch_size)
+            ]
+            num_valid = sum(ind < len(dataset) for ind in img_inds)
+            for writer in writers:
+                writer.write(img_inds[:num_valid], batch_results[:num_valid])
+        num_done += batch_size
 
         if rank == 0:
-            batch_size = data['img'][0].size(0)
             for _ in range(batch_size * world_size):
                 prog_bar.update()
 
+    if writers is not None:
+        return None
     # collect results from all ranks
     if gpu_collect:
         results = collect_results_gpu(results, len(dataset))
@@ -152,6 +191,11 @@ def multi_gpu_test(model, data_loader, tmpdir=None, gpu_collect=False):
     return results
 
 
+def comm_device():
+    """Device of the tensors exchanged between ranks, gloo runs on the cpu."""
+    return 'cuda' if dist.get_backend() == 'nccl' else 'cpu'
+
+
 def collect_results_cpu(result_part, size, tmpdir=None):
     rank, world_size = get_dist_info()
     # create a tmp dir if it is not specified
@@ -161,11 +205,13 @@ def collect_results_cpu(result_part, size, tmpdir=None):
         dir_tensor = torch.full((MAX_LEN, ),
                                 32,
                                 dtype=torch.uint8,
-                                device='cuda')
+                                device=comm_device())
         if rank == 0:
             tmpdir = tempfile.mkdtemp()
             tmpdir = torch.tensor(
-                bytearray(tmpdir.encode()), dtype=torch.uint8, device='cuda')
+                bytearray(tmpdir.encode()),
+                dtype=torch.uint8,
+                device=comm_device())
             dir_tensor[:len(tmpdir)] = tmpdir
         dist.broadcast(dir_tensor, 0)
         tmpdir = dir_tensor.cpu().numpy().tobytes().decode().rstrip()
@@ -197,15 +243,16 @@ def collect_results_cpu(result_part, size, tmpdir=None):
 def collect_results_gpu(result_part, size):
     rank, world_size = get_dist_info()
     # dump result part to tensor with pickle
+    device = comm_device()
     part_tensor = torch.tensor(
-        bytearray(pickle.dumps(result_part)), dtype=torch.uint8, device='cuda')
+        bytearray(pickle.dumps(result_part)), dtype=torch.uint8, device=device)
     # gather all result part tensor shape
-    shape_tensor = torch.tensor(part_tensor.shape, device='cuda')
+    shape_tensor = torch.tensor(part_tensor.shape, device=device)
     shape_list = [shape_tensor.clone() for _ in range(world_size)]
     dist.all_gather(shape_list, shape_tensor)
     # padding result part tensor to max length
     shape_max = torch.tensor(shape_list).max()
-    part_send = torch.zeros(shape_max, dtype=torch.uint8, device='cuda')
+    part_send = torch.zeros(shape_max, dtype=torch.uint8, device=device)
     part_send[:shape_tensor[0]] = part_tensor
     part_recv_list = [
         part_tensor.new_zeros(shape_max) for _ in range(world_size)
@@ -233,11 +280,39 @@ def parse_args():
     parser.add_argument('checkpoint', help='checkpoint file')
     parser.add_argument('--outdir', help='output dir')
     parser.add_argument('--out', help='output result file') # .pkl文件
+    parser.add_argument(
+        '--task1',
+        action='store_true',
+        help='write the Task1 files of each class to outdir/Task1_results '
+        'while testing')
+    parser.add_argument(
+        '--store',
+        help='detection store directory in outdir the detections are '
+        'appended to while testing')
     parser.add_argument(
         '--gpu_collect',
         action='store_true',
         help='whether to use gpu to collect results')
     parser.add_argument('--show', action='store_true', help='show results')
+    parser.add_argument(
+        '--imgs_per_gpu',
+        type=int,
+        default=1,
+        help='number of images in each test batch')
+    parser.add_argument(
+        '--device',
+        choices=['cuda', 'cpu'],
+        default='cuda',
+        help='device the model runs on')
+    parser.add_argument(
+        '--num_threads',
+        type=int,
+        help='intra-op threads with --device cpu, by default the cores not '
+        'used by the data loader workers')
+    parser.add_argument(
+        '--num_interop_threads',
+        type=int,
+        help='inter-op threads with --device cpu')
     parser.add_argument('--tmpdir', help='tmp dir for writing some results')
     parser.add_argument(
         '--launcher',
@@ -261,36 +336,58 @@ def write_dota_results(path, boxes, dataset, threshold=0.001):
     img_infos = dataset.img_infos
     assert len(boxes) == len(img_infos)
     print("write no merge results\n")
-    for i, img_info in enumerate(img_infos):
-        # print("img {}: {}".format(i, img_info['id']))
-        img_id = img_info['id']
-        for j, cls in enumerate(classes):
-            txt_path = osp.join(path, 'Task1_' + cls + '.txt')
-            with open(txt_path, 'a') as f:
-                box = boxes[i][j] # (n, 9)
-                inds = box[:, 8] > threshold
-                box = box[inds]
-                for k in range(box.shape[0]):
-                    # print(cls)
-                    # print('{} {} {} {} {} {} {} {} {} {}\n'.format(
-                    #     img_id, box[k, 8],
-                    #     int(box[k, 0]), int(box[k, 1]),
-                    #     int(box[k, 2]), int(box[k, 3]),
-                    #     int(box[k, 4]), int(box[k, 5]),
-                    #     int(box[k, 6]), int(box[k, 7])))
-                    f.write('{} {} {} {} {} {} {} {} {} {}\n'.format(
-                        img_id, box[k, 8],
-                        int(box[k, 0]), int(box[k, 1]),
-                        int(box[k, 2]), int(box[k, 3]),
-                        int(box[k, 4]), int(box[k, 5]),
-                        int(box[k, 6]), int(box[k, 7])))
+    if len(img_infos) == 0:
+        return
+    img_ids = [str(img_info['id']) for img_info in img_infos]
+    # each class file is opened once and its lines are formatted on whole
+    # arrays, the points truncated to int
+    for j, cls in enumerate(classes):
+        box = [boxes[i][j] for i in range(len(img_infos))]
+        names = np.repeat(img_ids, [len(b) for b in box])
+        box = np.concatenate(box)  # (n, 9)
+        inds = box[:, 8] > threshold
+        names, box = names[inds], box[inds]
+        txt_path = osp.join(path, 'Task1_' + cls + '.txt')
+        with open(txt_path, 'a') as f:
+            f.write(rbboxes2text(names, box, int_points=True))
+
+
+def build_writers(args, dataset, rank, world_size):
+    """Build the result writers of this rank.
+
+    Several ranks write their own parts, they are merged by :func:`main`.
+    """
+    suffix = '.part{}'.format(rank) if world_size > 1 else ''
+    img_names = [
+        osp.basename(img_info['filename']) for img_info in dataset.img_infos
+    ]
+    writers = []
+    if args.task1:
+        writers.append(
+            Task1ResultWriter(
+                osp.join(args.outdir, 'Task1_results'),
+                dataset.CLASSES,
+                img_names,
+                suffix=suffix))
+    if args.store:
+        # the ranks write their own shards into the same store
+        writers.append(
+            DetectionStoreWriter(
+                osp.join(args.outdir, args.store),
+                img_names,
+                dataset.CLASSES,
+                prefix='shard_r{}'.format(rank) if world_size > 1 else 'shard',
+                prefixes=['shard_r{}'.format(r) for r in range(world_size)]
+                if world_size > 1 else None))
+    return writers
+
 
 def main():
     args = parse_args()
 
-    assert args.out , \
+    assert args.out or args.task1 or args.store, \
         ('Please specify at least one operation (save or show the results) '
-         'with the argument "--out"')
+         'with the argument "--out", "--task1" or "--store"')
 
     if args.out is not None and not args.out.endswith(('.pkl', '.pickle')):
         raise ValueError('The output file must be a pkl file.')
@@ -307,17 +404,27 @@ def main():
         distributed = False
     else:
         distributed = True
-        init_dist(args.launcher, **cfg.dist_params)
+        dist_params = dict(cfg.dist_params)
+        if args.device == 'cpu':
+            dist_params['backend'] = 'gloo'
+        init_dist(args.launcher, **dist_params)
+
+    # on the cpu the cores are split between the model and the workers
+    worker_init_fn = None
+    if args.device == 'cpu':
+        worker_init_fn = init_cpu_env(args.num_threads,
+                                      args.num_interop_threads,
+                                      cfg.data.workers_per_gpu)
 
     # build the dataloader
-    # TODO: support multiple images per gpu (only minor changes are needed)
     dataset = build_dataset(cfg.data.test)
     data_loader = build_dataloader(
         dataset,
-        imgs_per_gpu=1,
+        imgs_per_gpu=args.imgs_per_gpu,
         workers_per_gpu=cfg.data.workers_per_gpu,
         dist=distributed,
-        shuffle=False)
+        shuffle=False,
+        worker_init_fn=worker_init_fn)
 
     # build the model and load checkpoint
     model = build_detector(cfg.model, train_cfg=None, test_cfg=cfg.test_cfg)
@@ -332,16 +439,48 @@ def main():
     else:
         model.CLASSES = dataset.CLASSES
 
-    if not distributed:
+    rank, world_size = get_dist_info()
+    # with writers the results are streamed to disk instead of kept in
+    # memory, the pickle is then rebuilt from the store at the end
+    streaming = args.task1 or args.store
+    if streaming and args.out and not args.store:
+        args.store = osp.splitext(args.out)[0] + '_store'
+    writers = build_writers(args, dataset, rank,
+                            world_size) if streaming else None
+
+    if args.device == 'cpu':
+        # the ranks of a cpu run share nothing but the results
+        model = CPUDataParallel(model)
+        if not distributed:
+            outputs = single_gpu_test(model, data_loader, args.outdir,
+                                      args.show, writers)
+        else:
+            outputs = multi_gpu_test(model, data_loader, args.tmpdir,
+                                     args.gpu_collect, writers)
+    elif not distributed:
         model = MMDataParallel(model, device_ids=[0])
-        outputs = single_gpu_test(model, data_loader, args.outdir, args.show)
+        outputs = single_gpu_test(model, data_loader, args.outdir, args.show,
+                                  writers)
         # outputs:list(list(ndarray)),外层list:图片，内层list:类别
     else:
         model = MMDistributedDataParallel(model.cuda())
         outputs = multi_gpu_test(model, data_loader, args.tmpdir,
-                                 args.gpu_collect)
+                                 args.gpu_collect, writers)
+
+    if streaming:
+        for writer in writers:
+            writer.close()
+        if world_size > 1:
+            dist.barrier()
+            if rank == 0 and args.task1:
+                merge_parts([
+                    task1_filename(osp.join(args.outdir, 'Task1_results'), cls)
+                    for cls in dataset.CLASSES
+                ], world_size)
+        if args.out and rank == 0:
+            outputs = DetectionStore.load(osp.join(
+                args.outdir, args.store)).to_results()
 
-    rank, _ = get_dist_info()
     # 将结果保存到.pkl文件中
     if args.out and rank == 0:
         print('\nwriting results to {}'.format(args.out))
@@ -0,0 +1,84 @@
+import argparse
+import os.path as osp
+
+import mmcv
+
+from mmdet.apis import (inference_detector_sliding_window, init_cpu_env,
+                        init_detector)
+from DOTA_devkit.dota_utils import GetFileFromThisRootDir, custombasename
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Test a detector on full size DOTA images, the images '
+        'are split and the results merged in memory')
+    parser.add_argument('config', help='test config file path')
+    parser.add_argument('checkpoint', help='checkpoint file')
+    parser.add_argument('imgdir', help='directory of the full size images')
+    parser.add_argument(
+        'outdir', help='output dir of the merged Task1 result files')
+    parser.add_argument(
+        '--subsize', type=int, default=1024, help='side of the patches')
+    parser.add_argument(
+        '--gap', type=int, default=200, help='overlap between patches')
+    parser.add_argument(
+        '--rates',
+        type=float,
+        nargs='+',
+        default=[1.0],
+        help='resize rates of the images before splitting')
+    parser.add_argument(
+        '--iou_thr', type=float, default=0.1, help='iou of the merge nms')
+    parser.add_argument(
+        '--imgs_per_batch',
+        type=int,
+        default=1,
+        help='number of patches in each forward')
+    parser.add_argument('--device', default='cuda:0', help='device used')
+    parser.add_argument(
+        '--num_threads',
+        type=int,
+        help='intra-op threads with --device cpu, all the cores by default')
+    parser.add_argument(
+        '--num_interop_threads',
+        type=int,
+        help='inter-op threads with --device cpu')
+    args = parser.parse_args()
+    return args
+
+
+def main():
+    args = parse_args()
+    if args.device == 'cpu':
+        init_cpu_env(args.num_threads, args.num_interop_threads)
+    model = init_detector(args.config, args.checkpoint, device=args.device)
+    mmcv.mkdir_or_exist(args.outdir)
+
+    img_files = sorted(
+        GetFileFromThisRootDir(args.imgdir, ext=['png', 'jpg', 'tif']))
+    out_files = [
+        open(osp.join(args.outdir, 'Task1_' + cls + '.txt'), 'w')
+        for cls in model.CLASSES
+    ]
+    prog_bar = mmcv.ProgressBar(len(img_files))
+    for img_file in img_files:
+        name = custombasename(img_file)
+        result = inference_detector_sliding_window(
+            model,
+            img_file,
+            subsize=args.subsize,
+            gap=args.gap,
+            rates=args.rates,
+            nms_cfg=dict(type='poly_nms', iou_thr=args.iou_thr),
+            imgs_per_batch=args.imgs_per_batch)
+        for f_out, dets in zip(out_files, result):
+            for det in dets:
+                f_out.write('{} {} {}\n'.format(
+                    name, det[8], ' '.join(map(str, det[:8]))))
+        prog_bar.update()
+    for f_out in out_files:
+        f_out.close()
+
+
+if __name__ == '__main__':
+    main()